@@ -0,0 +1,123 @@
+# core/admin.py
+"""
+Helpers for the operator-only pages.
+
+The admin flag is read from the ADMIN_MODE secret or the TALENT_ADMIN
+environment variable; the other helpers collect runtime diagnostics
+(connection pool, Streamlit session memory, server-side activity).
+"""
+
+import os
+import sys
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import text
+
+from .db import lane_connection
+
+_TRUTHY = {'1', 'true', 'yes', 'on'}
+
+
+def is_admin_enabled():
+    """True when the ADMIN_MODE secret or the TALENT_ADMIN env var is set to a truthy value."""
+    try:
+        flag = st.secrets.get("ADMIN_MODE", "")
+    except Exception:
+        # Tidak ada secrets.toml (misalnya saat dijalankan lokal)
+        flag = ""
+    flag = flag or os.environ.get("TALENT_ADMIN", "")
+    return str(flag).strip().lower() in _TRUTHY
+
+
+def require_admin():
+    """Stop the current page unless the admin flag is enabled."""
+    if not is_admin_enabled():
+        st.error("This page is only available to operators (set ADMIN_MODE in secrets or TALENT_ADMIN=1).")
+        st.stop()
+
+
+def get_pool_status(engine):
+    """Checked-out / idle / overflow connections of the engine's QueuePool."""
+    pool = engine.pool
+    size = pool.size()
+    checked_out = pool.checkedout()
+    overflow = max(pool.overflow(), 0)
+    capacity = size + getattr(pool, '_max_overflow', 0)
+    return {
+        'pool_size': size,
+        'max_overflow': capacity - size,
+        'checked_out': checked_out,
+        'idle': pool.checkedin(),
+        'overflow_in_use': overflow,
+        'utilization': checked_out / capacity if capacity else 0.0,
+        'status': pool.status(),
+    }
+
+
+def _deep_size(value, seen=None):
+    # Perkiraan memori: DataFrame pakai memory_usage(deep=True), container ditelusuri
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    size = sys.getsizeof(value, 0)
+    if isinstance(value, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(v, seen) for v in value)
+    elif hasattr(value, '__dict__'):
+        size += _deep_size(vars(value), seen)
+    return size
+
+
+def get_session_memory(top_keys=3):
+    """
+    Approximate session_state memory per active Streamlit session.
+
+    Uses the Streamlit runtime's session manager (internal API); returns an
+    empty DataFrame when it is not available.
+    """
+    columns = ['session_id', 'keys', 'bytes', 'largest_keys']
+    try:
+        from streamlit.runtime import Runtime
+        sessions = Runtime.instance()._session_mgr.list_active_sessions()
+    except Exception:
+        return pd.DataFrame(columns=columns)
+
+    rows = []
+    for info in sessions:
+        try:
+            state = info.session.session_state.filtered_state
+        except Exception:
+            continue
+        sizes = {key: _deep_size(value) for key, value in state.items()}
+        largest = sorted(sizes.items(), key=lambda kv: kv[1], reverse=True)[:top_keys]
+        rows.append({
+            'session_id': info.session.id,
+            'keys': len(sizes),
+            'bytes': sum(sizes.values()),
+            'largest_keys': ", ".join(f"{k} ({v / 1024:.0f} KB)" for k, v in largest),
+        })
+    return pd.DataFrame(rows, columns=columns).sort_values('bytes', ascending=False, ignore_index=True)
+
+
+def get_server_activity(engine):
+    """Active statements of this database from pg_stat_activity (excluding this probe)."""
+    with lane_connection(engine, 'interactive') as conn:
+        return pd.read_sql(text("""
+            SELECT pid,
+                   state,
+                   wait_event_type,
+                   ROUND(EXTRACT(EPOCH FROM (now() - query_start))::numeric, 1) AS running_s,
+                   LEFT(REGEXP_REPLACE(query, '\\s+', ' ', 'g'), 160) AS query
+            FROM pg_stat_activity
+            WHERE datname = current_database()
+              AND pid <> pg_backend_pid()
+              AND state <> 'idle'
+            ORDER BY query_start
+        """), conn)
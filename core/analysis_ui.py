@@ -4,6 +4,7 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from core.matching_breakdown import get_detailed_match_breakdown
+from core.query_cancel import QueryCancelled
 
 def render_detailed_analysis(results_df, benchmark_ids, engine):
     """
@@ -347,6 +348,9 @@ TGV BREAKDOWN:
                 width="stretch"
             )
     
+    except QueryCancelled:
+        # Superseded by a rerun; the rerun renders the new selection
+        st.stop()
     except Exception as e:
         st.error(f"Error loading detailed analysis: {str(e)}")
         st.exception(e)
@@ -0,0 +1,132 @@
+# core/dashboard.py
+"""
+KPI aggregation for the home dashboard.
+
+Every KPI, distribution and gap metric shown on home.py is computed in one
+aggregation pass: the latest years are resolved once, performance_yearly and
+competencies_yearly are each scanned once, and the result comes back as a
+single JSON document.
+"""
+
+import pandas as pd
+from sqlalchemy import text
+
+from .db import lane_connection
+from .dimensions import get_dimension_registry
+
+# Tables the dashboard KPIs depend on (for the version probe)
+DASHBOARD_TABLES = [
+    'employees', 'performance_yearly', 'competencies_yearly',
+    'profiles_psych', 'talent_group_weights', 'dim_competency_pillars',
+]
+TOP_COMPETENCIES = 5            # pillar teratas di chart kompetensi high performer
+
+DASHBOARD_KPI_SQL = """
+WITH
+latest AS (
+    SELECT (SELECT MAX(year) FROM performance_yearly)  AS perf_year,
+           (SELECT MAX(year) FROM competencies_yearly) AS comp_year
+),
+
+-- Satu kali scan untuk data master karyawan
+emp AS (
+    SELECT COUNT(*)                    AS total_employees,
+           COUNT(DISTINCT position_id) AS position_count
+    FROM employees
+),
+
+-- Satu kali scan performance_yearly (tahun terbaru)
+perf AS (
+    SELECT py.employee_id, py.rating
+    FROM performance_yearly py
+    JOIN latest l ON py.year = l.perf_year
+),
+
+-- Satu kali scan competencies_yearly (tahun terbaru) + rating pada tahun yang sama
+comp AS (
+    SELECT cy.pillar_code, cy.score, py.rating
+    FROM competencies_yearly cy
+    JOIN latest l ON cy.year = l.comp_year
+    JOIN performance_yearly py ON py.employee_id = cy.employee_id
+                              AND py.year = cy.year
+),
+
+-- Semua pillar (jumlahnya kecil): top N diambil setelah filter label registry di Python
+top_comp AS (
+    SELECT pillar_code, AVG(score) AS avg_score
+    FROM comp
+    WHERE rating = 5
+    GROUP BY pillar_code
+)
+
+SELECT json_build_object(
+    'total_employees', (SELECT total_employees FROM emp),
+    'position_count',  (SELECT position_count FROM emp),
+    'hp_count',        (SELECT COUNT(DISTINCT employee_id) FROM perf WHERE rating = 5),
+    'perf_dist', (
+        SELECT COALESCE(json_agg(json_build_object('rating', rating, 'count', n) ORDER BY rating), '[]'::json)
+        FROM (SELECT rating, COUNT(*) AS n FROM perf GROUP BY rating) d
+    ),
+    'top_comp', (
+        SELECT COALESCE(json_agg(json_build_object('pillar_code', pillar_code, 'avg_score', avg_score)
+                                 ORDER BY avg_score DESC), '[]'::json)
+        FROM top_comp
+    ),
+    'comp_gap', (
+        SELECT json_build_object(
+            'hp_avg',     AVG(CASE WHEN rating = 5 THEN score END),
+            'non_hp_avg', AVG(CASE WHEN rating < 5 THEN score END))
+        FROM comp
+    ),
+    'cog_gap', (
+        SELECT json_build_object(
+            'hp_iq',     AVG(CASE WHEN p.rating = 5 THEN pp.iq END),
+            'non_hp_iq', AVG(CASE WHEN p.rating < 5 THEN pp.iq END))
+        FROM profiles_psych pp
+        JOIN perf p ON p.employee_id = pp.employee_id
+        WHERE pp.iq IS NOT NULL
+    ),
+    'tgv_weights', (
+        SELECT COALESCE(json_agg(json_build_object('tgv_name', tgv_name, 'tgv_weight', tgv_weight)), '[]'::json)
+        FROM talent_group_weights
+    )
+) AS kpis
+"""
+
+
+def load_dashboard_kpis(engine):
+    """
+    Load every home dashboard metric with a single query.
+
+    Returns:
+        dict with keys total_employees, hp_count, hp_pct, perf_dist, top_comp,
+        comp_gap, cog_gap, position_count and tgv_weights (same shapes the
+        dashboard used when each metric had its own query)
+    """
+    with lane_connection(engine, 'interactive') as conn:
+        kpis = conn.execute(text(DASHBOARD_KPI_SQL)).scalar()
+
+    # Label kompetensi ditempel dari registry dimensi
+    pillar_labels = get_dimension_registry(engine).lookup('competency_pillars')
+    top_comp = pd.DataFrame(kpis['top_comp'], columns=['pillar_code', 'avg_score'])
+    # Filter dulu, baru ambil top N: pillar tanpa label tidak boleh mengurangi jumlah baris
+    top_comp = top_comp[top_comp['pillar_code'].isin(pillar_labels.keys())].head(TOP_COMPETENCIES)
+    top_comp = pd.DataFrame({
+        'pillar_label': top_comp['pillar_code'].map(pillar_labels),
+        'avg_score': top_comp['avg_score'].astype(float),
+    }).reset_index(drop=True)
+
+    total_employees = kpis['total_employees']
+    hp_count = kpis['hp_count']
+
+    return {
+        'total_employees': total_employees,
+        'hp_count': int(hp_count),
+        'hp_pct': hp_count * 100.0 / total_employees if total_employees else 0.0,
+        'perf_dist': pd.DataFrame(kpis['perf_dist'], columns=['rating', 'count']),
+        'top_comp': top_comp,
+        'comp_gap': pd.DataFrame([kpis['comp_gap']], columns=['hp_avg', 'non_hp_avg']),
+        'cog_gap': pd.DataFrame([kpis['cog_gap']], columns=['hp_iq', 'non_hp_iq']),
+        'position_count': kpis['position_count'],
+        'tgv_weights': pd.DataFrame(kpis['tgv_weights'], columns=['tgv_name', 'tgv_weight']),
+    }
@@ -1,6 +1,18 @@
+import threading
+import time
+from contextlib import contextmanager
+
 import streamlit as st
 from sqlalchemy import create_engine, text
 
+from .query_cancel import query_canceller
+from .query_metrics import clear_pool_wait, instrument_engine, note_pool_wait, unrecorded
+
+# Connection pool sizing (conservative for free tier). The workload lanes below
+# split exactly this many connections between interactive and heavy work.
+POOL_SIZE = 3
+MAX_OVERFLOW = 2
+
 @st.cache_resource
 def get_engine():
     DB_USER = st.secrets["DB_USER"]
@@ -11,14 +23,22 @@ def get_engine():
 
     url = f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-    return create_engine(
+    engine = create_engine(
         url, 
         pool_pre_ping=True,      # Test connections before use
-        pool_size=3,             # Max 3 connections in pool (conservative for free tier)
-        max_overflow=2,          # Allow 2 extra connections if needed
+        pool_size=POOL_SIZE,     # Max 3 connections in pool (conservative for free tier)
+        max_overflow=MAX_OVERFLOW,  # Allow 2 extra connections if needed
         pool_recycle=300,        # Recycle connections after 5 minutes
         pool_timeout=30          # Wait max 30 seconds for connection
     )
+    # Latency per statement, pool wait, dan pemanggil (core/query_metrics.py)
+    instrument_engine(engine)
+
+    # Sekali per proses, saat engine pertama dibuat (request pertama, bukan saat server start):
+    # isi cache dimensi, index pencarian, dan default ranking di background
+    from .warmup import start_warmup
+    start_warmup(engine)
+    return engine
 
 def test_connection():
     try:
@@ -29,3 +49,165 @@ def test_connection():
     except Exception as e:
         st.error(f"DB ERROR: {e}")
         return False
+
+def get_data_version(engine, tables):
+    """
+    Cheap change token for a set of tables.
+
+    Sums the insert/update/delete counters Postgres keeps in pg_stat_user_tables,
+    so the probe never touches the tables themselves. The token changes whenever
+    any of the tables is written to (or the statistics are reset).
+    """
+    with lane_connection(engine, 'interactive') as conn:
+        row = conn.execute(text("""
+            SELECT COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0) AS changes,
+                   COUNT(*) AS n_tables
+            FROM pg_stat_user_tables
+            WHERE schemaname = 'public'
+              AND relname = ANY(:tables)
+        """), {"tables": list(tables)}).one()
+    return f"{row.n_tables}:{row.changes}"
+
+
+# ===================================================================================
+# WORKLOAD MANAGER: admission control per lane
+# ===================================================================================
+# Lane 'interactive' untuk lookup cepat (profil, dashboard, dimensi) dan lane 'heavy'
+# untuk scoring (CTE matching). Setiap lane punya batas konkurensi, antrian, dan
+# statement_timeout sendiri, sehingga beberapa run Mode A tidak menghabiskan pool.
+# ===================================================================================
+
+class WorkloadRejected(RuntimeError):
+    """Raised when a lane is saturated (queue full or queue wait timed out)."""
+
+
+class WorkloadLane:
+    """Concurrency limit + bounded wait queue + per-query statement timeout."""
+
+    def __init__(self, name, max_concurrency, max_queue, queue_timeout, statement_timeout_ms):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.statement_timeout_ms = statement_timeout_ms
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.max_wait = 0.0
+
+    @contextmanager
+    def slot(self, blocking=True, reserve=0):
+        """
+        Hold one slot of the lane.
+
+        With blocking=False (background work) the slot is only taken when nobody
+        is queued and more than `reserve` slots stay free for foreground work;
+        otherwise WorkloadRejected is raised immediately.
+        """
+        if not blocking:
+            with self._lock:
+                if self.waiting or self.active >= self.max_concurrency - reserve \
+                        or not self._slots.acquire(blocking=False):
+                    self.skipped += 1
+                    raise WorkloadRejected(f"The {self.name} workload lane is busy.")
+                self.active += 1
+                self.admitted += 1
+            try:
+                yield 0.0
+            finally:
+                with self._lock:
+                    self.active -= 1
+                self._slots.release()
+            return
+
+        started = time.monotonic()
+        with self._lock:
+            if self.active >= self.max_concurrency and self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise WorkloadRejected(
+                    f"The {self.name} workload queue is full ({self.waiting} waiting). Please try again shortly."
+                )
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        waited = time.monotonic() - started
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.timeouts += 1
+                raise WorkloadRejected(
+                    f"Timed out after {self.queue_timeout:.0f}s waiting for a {self.name} slot. Please try again shortly."
+                )
+            self.active += 1
+            self.admitted += 1
+            self.max_wait = max(self.max_wait, waited)
+        try:
+            yield waited
+        finally:
+            with self._lock:
+                self.active -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'lane': self.name,
+                'max_concurrency': self.max_concurrency,
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'skipped': self.skipped,
+                'max_wait_s': round(self.max_wait, 3),
+                'statement_timeout_ms': self.statement_timeout_ms,
+            }
+
+
+HEAVY_CONCURRENCY = 2
+WORKLOAD_LANES = {
+    # Sisa koneksi pool selalu tersedia untuk lookup interaktif
+    'interactive': WorkloadLane('interactive', max_concurrency=POOL_SIZE + MAX_OVERFLOW - HEAVY_CONCURRENCY,
+                                max_queue=20, queue_timeout=10, statement_timeout_ms=15_000),
+    'heavy':       WorkloadLane('heavy', max_concurrency=HEAVY_CONCURRENCY,
+                                max_queue=6, queue_timeout=60, statement_timeout_ms=120_000),
+}
+
+
+@contextmanager
+def lane_connection(engine, lane='interactive', blocking=True, reserve=0):
+    """
+    Connection admitted through a workload lane.
+
+    Waits for a free slot in the lane (raising WorkloadRejected when the lane
+    is saturated), then applies the lane's statement_timeout for the duration
+    of the connection's transaction. Inside a cancellable job the backend is
+    registered so a superseded run can be cancelled. Speculative work passes
+    blocking=False (and a reserve of slots to leave free), see WorkloadLane.slot.
+    """
+    workload = WORKLOAD_LANES[lane]
+    started = time.monotonic()
+    with workload.slot(blocking, reserve):
+        with engine.connect() as conn:
+            waited = time.monotonic() - started
+            # SET LOCAL berlaku sampai transaksi selesai (rollback saat koneksi kembali ke pool);
+            # tidak masuk query metrics, agar tidak menambah sampel di setiap checkout
+            with unrecorded(conn):
+                conn.execute(text(f"SET LOCAL statement_timeout = {int(workload.statement_timeout_ms)}"))
+            # Waktu tunggu antrian lane + checkout pool, dicatat pada statement pertama pemanggil
+            note_pool_wait(conn, waited)
+            try:
+                # Daftarkan backend PID ke job yang bisa dibatalkan (core/query_cancel.py)
+                with query_canceller.track_backend(conn):
+                    yield conn
+            finally:
+                clear_pool_wait(conn)
+
+
+def get_workload_stats():
+    """Current counters for every workload lane."""
+    return [lane.stats() for lane in WORKLOAD_LANES.values()]
@@ -0,0 +1,165 @@
+# core/dimensions.py
+"""
+Process-wide registry for the dim_* lookup tables.
+
+All dimension tables are loaded once, in a single round trip, into compact
+key -> name dictionaries. The registry only reloads when the cheap version
+probe from core.db.get_data_version reports that a dim table has changed (the
+probe and reload run in the background, see core/swr_cache.py), so pages and
+matching queries can work with IDs and attach names client-side.
+"""
+
+import threading
+
+import pandas as pd
+from sqlalchemy import text
+
+from .db import get_data_version, lane_connection
+from .swr_cache import get_swr_cache
+
+# name -> (table, key column, label column, integer key?)
+DIMENSION_TABLES = {
+    'positions':          ('dim_positions',          'position_id',    'name',         True),
+    'departments':        ('dim_departments',        'department_id',  'name',         True),
+    'divisions':          ('dim_divisions',          'division_id',    'name',         True),
+    'grades':             ('dim_grades',             'grade_id',       'name',         True),
+    'directorates':       ('dim_directorates',       'directorate_id', 'name',         True),
+    'education':          ('dim_education',          'education_id',   'name',         True),
+    'competency_pillars': ('dim_competency_pillars', 'pillar_code',    'pillar_label', False),
+}
+
+# ID column on employees / matching results -> (dimension, name column)
+EMPLOYEE_DIMENSION_COLUMNS = {
+    'position_id':    ('positions',    'position_name'),
+    'department_id':  ('departments',  'department_name'),
+    'division_id':    ('divisions',    'division_name'),
+    'grade_id':       ('grades',       'grade_name'),
+    'directorate_id': ('directorates', 'directorate_name'),
+    'education_id':   ('education',    'education_name'),
+}
+
+# Minimum number of seconds between two version probes
+DEFAULT_PROBE_INTERVAL = 30
+
+
+class DimensionRegistry:
+    """In-memory lookups for every dim_* table, revalidated in the background."""
+
+    def __init__(self, engine, probe_interval=DEFAULT_PROBE_INTERVAL):
+        self._engine = engine
+        # Stale-while-revalidate: hanya load pertama yang blocking
+        self._cache = get_swr_cache(
+            f"dimension_registry@{id(engine):x}",
+            self._load,
+            version_probe=self._probe,
+            probe_interval=probe_interval,
+        )
+
+    @property
+    def version(self):
+        return self._cache.version_of()
+
+    def _probe(self):
+        return get_data_version(self._engine, [t[0] for t in DIMENSION_TABLES.values()])
+
+    def _snapshot(self):
+        return self._cache.get()
+
+    def ensure_fresh(self, force=False):
+        """Make sure the lookups are loaded; force=True reloads synchronously."""
+        if force:
+            self._cache.clear()
+        self._snapshot()
+        return self
+
+    def ensure_current(self):
+        """Reload synchronously if a dim table changed since the lookups were loaded."""
+        if self.version is None or self.version != self._probe():
+            self.ensure_fresh(force=True)
+        return self
+
+    def _load(self):
+        # Satu round trip untuk semua tabel dimensi
+        union_sql = "\nUNION ALL\n".join(
+            f"SELECT '{dim}' AS dim, {key}::text AS key, {label} AS label FROM public.{table}"
+            for dim, (table, key, label, _) in DIMENSION_TABLES.items()
+        )
+        with lane_connection(self._engine, 'interactive') as conn:
+            rows = conn.execute(text(union_sql)).all()
+
+        lookups = {dim: {} for dim in DIMENSION_TABLES}
+        for dim, key, label in rows:
+            if DIMENSION_TABLES[dim][3]:
+                key = int(key)
+            lookups[dim][key] = label
+
+        frames = {}
+        for dim, (_, key_col, label_col, _) in DIMENSION_TABLES.items():
+            frame = pd.DataFrame(list(lookups[dim].items()), columns=[key_col, label_col])
+            frames[dim] = frame.sort_values(label_col, kind='stable').reset_index(drop=True)
+
+        return lookups, frames
+
+    def lookup(self, dim):
+        """Return the key -> name dictionary for one dimension."""
+        return self._snapshot()[0][dim]
+
+    def name(self, dim, key, default=None):
+        if key is None or (isinstance(key, float) and pd.isna(key)):
+            return default
+        lookup = self.lookup(dim)
+        if DIMENSION_TABLES[dim][3]:
+            try:
+                key = int(key)
+            except (TypeError, ValueError):
+                return default
+        return lookup.get(key, default)
+
+    def frame(self, dim):
+        """Return the dimension as a DataFrame sorted by name (e.g. for selectboxes)."""
+        return self._snapshot()[1][dim]
+
+    def attach_names(self, df, keep_ids=False):
+        """
+        Replace dimension ID columns in df with their names.
+
+        Each known ID column (position_id, department_id, ...) becomes the
+        matching *_name column at the same position. Pass keep_ids=True to keep
+        the ID column next to the name.
+        """
+        if df.empty and not len(df.columns):
+            return df
+        lookups = self._snapshot()[0]
+        df = df.copy()
+        for id_col, (dim, name_col) in EMPLOYEE_DIMENSION_COLUMNS.items():
+            if id_col not in df.columns:
+                continue
+            lookup = lookups[dim]
+            ids = pd.to_numeric(df[id_col], errors='coerce').astype('Int64')
+            names = ids.map(lookup).astype(object)
+            names = names.where(names.notna(), None)
+            insert_at = df.columns.get_loc(id_col) + (1 if keep_ids else 0)
+            if not keep_ids:
+                df = df.drop(columns=[id_col])
+            if name_col in df.columns:
+                df[name_col] = names.values
+            else:
+                df.insert(insert_at, name_col, names.values)
+        return df
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_dimension_registry(engine):
+    """Return the process-wide registry for this engine, loading it on first use."""
+    key = id(engine)
+    registry = _registries.get(key)
+    if registry is None:
+        with _registries_lock:
+            registry = _registries.get(key)
+            if registry is None:
+                registry = DimensionRegistry(engine)
+                _registries[key] = registry
+    return registry
@@ -0,0 +1,184 @@
+# core/employee_search.py
+"""
+Employee search service for the employee pickers.
+
+Instead of shipping the whole workforce to a Streamlit selectbox, pages ask
+this index for the top matches of whatever the user typed. The index keeps a
+trigram posting list per name (same padding rules as pg_trgm) plus a sorted
+ID list for prefix lookups, and is rebuilt in the background only when the
+employees table version changes.
+"""
+
+import bisect
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .db import get_data_version, lane_connection
+from .dimensions import DIMENSION_TABLES, EMPLOYEE_DIMENSION_COLUMNS, get_dimension_registry
+from .swr_cache import get_swr_cache
+
+SEARCH_ID_COLUMNS = ['position_id', 'department_id', 'grade_id']
+# Nama dimensi ikut disimpan di index: rename di tabel dim_* juga memicu rebuild
+SEARCH_TABLES = ['employees'] + [
+    DIMENSION_TABLES[EMPLOYEE_DIMENSION_COLUMNS[column][0]][0] for column in SEARCH_ID_COLUMNS
+]
+
+# Minimum number of seconds between two version probes
+DEFAULT_PROBE_INTERVAL = 30
+
+
+def _normalize(value):
+    return " ".join(str(value).lower().split())
+
+
+def _trigrams(value):
+    """Trigrams per word, padded like pg_trgm ('  w', ' wo', 'wor', 'ord', 'rd ')."""
+    grams = set()
+    for word in _normalize(value).split(" "):
+        if not word:
+            continue
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class EmployeeSearchIndex:
+    """Trigram + ID-prefix index over employee names."""
+
+    def __init__(self, employees_df):
+        self.employees = employees_df.reset_index(drop=True)
+        names = self.employees['fullname'].fillna('').map(_normalize).tolist()
+        self._names = names
+
+        postings = {}
+        self._gram_counts = np.zeros(len(names), dtype=np.int32)
+        for row_id, name in enumerate(names):
+            grams = _trigrams(name)
+            self._gram_counts[row_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(row_id)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+        ids = self.employees['employee_id'].astype(str).str.lower().tolist()
+        order = sorted(range(len(ids)), key=ids.__getitem__)
+        self._sorted_ids = [ids[i] for i in order]
+        self._sorted_rows = order
+
+    def __len__(self):
+        return len(self.employees)
+
+    def _id_prefix_rows(self, query, limit):
+        start = bisect.bisect_left(self._sorted_ids, query)
+        rows = []
+        for pos in range(start, min(start + limit, len(self._sorted_ids))):
+            if not self._sorted_ids[pos].startswith(query):
+                break
+            rows.append(self._sorted_rows[pos])
+        return rows
+
+    def search(self, query, limit=20):
+        """
+        Return the top `limit` employees for the typed text.
+
+        Empty queries return the first employees alphabetically. Otherwise
+        rows are ranked by trigram similarity, with exact ID prefixes, name
+        prefixes and substring hits ranked first. The result always has a
+        search_score column (0.0 for an empty query).
+        """
+        q = _normalize(query or '')
+        if not q or len(self.employees) == 0:
+            result = self.employees.head(limit).copy()
+            result['search_score'] = 0.0
+            return result
+
+        scores = np.zeros(len(self.employees), dtype=np.float32)
+
+        grams = _trigrams(q)
+        hits = [self._postings[g] for g in grams if g in self._postings]
+        if hits:
+            shared = np.bincount(np.concatenate(hits), minlength=len(scores)).astype(np.float32)
+            # Jaccard similarity, sama seperti similarity() pada pg_trgm
+            scores = shared / (len(grams) + self._gram_counts - shared)
+
+        # Kandidat terbaik berdasarkan trigram, lalu diperhalus dengan bonus prefix/substring
+        n_candidates = min(len(scores), max(limit * 5, 50))
+        candidates = np.argpartition(-scores, n_candidates - 1)[:n_candidates]
+        candidates = [int(i) for i in candidates if scores[i] > 0]
+
+        for row_id in self._id_prefix_rows(q, limit):
+            scores[row_id] += 3.0
+            candidates.append(row_id)
+
+        for row_id in set(candidates):
+            name = self._names[row_id]
+            if name.startswith(q):
+                scores[row_id] += 2.0
+            elif q in name:
+                scores[row_id] += 1.0
+
+        ranked = sorted(set(candidates), key=lambda i: (-scores[i], self._names[i]))[:limit]
+        result = self.employees.iloc[ranked].copy()
+        result['search_score'] = [float(scores[i]) for i in ranked]
+        return result
+
+    def peers(self, employee_id, column='department_id', limit=5):
+        """Other employees sharing `column` (e.g. department) with employee_id."""
+        match = self.employees[self.employees['employee_id'] == employee_id]
+        if match.empty or column not in self.employees.columns or pd.isna(match.iloc[0][column]):
+            return self.employees.iloc[0:0]
+        same = self.employees[(self.employees[column] == match.iloc[0][column])
+                              & (self.employees['employee_id'] != employee_id)]
+        return same.head(limit)
+
+
+class _EmployeeSearchService:
+    """Keeps one index per engine; rebuilds run in the background on version change."""
+
+    def __init__(self, engine, probe_interval=DEFAULT_PROBE_INTERVAL):
+        self._engine = engine
+        self._cache = get_swr_cache(
+            f"employee_search_index@{id(engine):x}",
+            self._build,
+            version_probe=lambda: get_data_version(engine, SEARCH_TABLES),
+            probe_interval=probe_interval,
+        )
+
+    def get_index(self):
+        return self._cache.get()
+
+    def _build(self):
+        with lane_connection(self._engine, 'interactive') as conn:
+            df = pd.read_sql(text(f"""
+                SELECT employee_id, fullname, {', '.join(SEARCH_ID_COLUMNS)}
+                FROM employees
+                ORDER BY fullname
+            """), conn)
+        # Rebuild karena dim_* berubah: registry (juga SWR) bisa masih memegang nama lama
+        registry = get_dimension_registry(self._engine).ensure_current()
+        df = registry.attach_names(df, keep_ids=True)
+        return EmployeeSearchIndex(df)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_employee_search_index(engine):
+    """Return the process-wide, version-checked search index for this engine."""
+    key = id(engine)
+    service = _services.get(key)
+    if service is None:
+        with _services_lock:
+            service = _services.get(key)
+            if service is None:
+                service = _EmployeeSearchService(engine)
+                _services[key] = service
+    return service.get_index()
+
+
+def search_employees(engine, query, limit=20):
+    """Top matches for the typed text (employee_id, fullname, dimension IDs and names)."""
+    return get_employee_search_index(engine).search(query, limit=limit)
@@ -0,0 +1,460 @@
+# core/fit_matrix.py
+"""
+Employee x position fit matrix.
+
+For every position the benchmark is that position's high performers (rating 5
+in the latest year), falling back to all high performers when a position has
+none, exactly like Mode B with a single position filter. Instead of running
+the matching CTE once per position, all talent data is loaded once and every
+employee is scored against every position benchmark in one vectorized numpy
+pass that reproduces the SQL semantics (PERCENTILE_CONT medians, NULLIF on
+zero baselines, reverse PAPI scales, MODE for MBTI/DISC, and NULL rows that
+still count in the TGV weight denominator).
+
+The result is kept as a float32 matrix plus forward (employee -> top
+positions) and reverse (position -> top employees) index arrays, refreshed in
+the background when the data version changes.
+"""
+
+import threading
+import warnings
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .db import get_data_version, lane_connection
+from .dimensions import get_dimension_registry
+from .precomputed import MATCHING_TABLES
+from .swr_cache import get_swr_cache
+
+COGNITIVE_TVS = ['iq', 'gtq', 'tiki', 'faxtor', 'pauli']
+CATEGORICAL_TVS = ['mbti', 'disc']
+REVERSE_PAPI_SCALES = {'Papi_I', 'Papi_K', 'Papi_Z', 'Papi_T'}
+TOTAL_TALENT_VARIABLES = 37   # 10 competencies + 5 cognitive + 20 PAPI + 2 personality
+HP_RATING = 5
+
+FORWARD_TOP_K = 50     # posisi teratas per karyawan
+REVERSE_TOP_K = 200    # kandidat teratas per posisi
+BENCHMARK_CHUNK = 32   # benchmark per blok agar memori (karyawan x benchmark x TGV) tetap kecil
+
+# Minimum number of seconds between two version probes
+DEFAULT_PROBE_INTERVAL = 300
+
+FIT_INPUT_SQL = {
+    'employees': """
+        SELECT employee_id, fullname, position_id, department_id, division_id,
+               grade_id, directorate_id, years_of_service_months
+        FROM public.employees
+    """,
+    'hp': f"""
+        SELECT DISTINCT employee_id
+        FROM public.performance_yearly
+        WHERE rating = {HP_RATING}
+          AND year = (SELECT MAX(year) FROM public.performance_yearly)
+    """,
+    'competencies': """
+        SELECT employee_id, pillar_code, score::float AS score
+        FROM public.competencies_yearly
+        WHERE year = (SELECT MAX(year) FROM public.competencies_yearly)
+    """,
+    'psych': """
+        SELECT employee_id, iq::float AS iq, gtq::float AS gtq, tiki::float AS tiki,
+               faxtor::float AS faxtor, pauli::float AS pauli, mbti, disc
+        FROM public.profiles_psych
+    """,
+    'papi': """
+        SELECT employee_id, scale_code, score::float AS score
+        FROM public.papi_scores
+    """,
+    'mapping': """
+        SELECT tgv_name, tv_name, tv_weight::float AS tv_weight
+        FROM public.talent_variables_mapping
+    """,
+    'group_weights': """
+        SELECT tgv_name, tgv_weight::float AS tgv_weight
+        FROM public.talent_group_weights
+    """,
+}
+
+
+def load_fit_inputs(engine):
+    """Load every table the matching depends on, once (heavy lane)."""
+    with lane_connection(engine, 'heavy') as conn:
+        return {name: pd.read_sql(text(sql), conn) for name, sql in FIT_INPUT_SQL.items()}
+
+
+def _normalize_category(value):
+    # UPPER(TRIM(x)) seperti di SQL; NULL tetap None
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return str(value).strip(' ').upper()
+
+
+def _mode(values):
+    # MODE() WITHIN GROUP (ORDER BY ...): nilai paling sering, seri -> nilai terkecil
+    counts = Counter(v for v in values if v is not None)
+    if not counts:
+        return None
+    best = max(counts.values())
+    return min(v for v, c in counts.items() if c == best)
+
+
+class FitMatrix:
+    """Scores of every employee against every position benchmark, with top-K indexes."""
+
+    def __init__(self, employees, position_ids, scores, benchmark_n, benchmark_fallback,
+                 forward_top_k=FORWARD_TOP_K, reverse_top_k=REVERSE_TOP_K, features=None):
+        self.employees = employees.reset_index(drop=True)
+        # Fitur per karyawan (baris sama dengan employees) untuk scoring benchmark lain
+        self.features = features
+        self.position_ids = np.asarray(position_ids, dtype=np.int64)
+        self.scores = scores.astype(np.float32)                 # karyawan x posisi, NaN = tidak ada skor
+        self.benchmark_n = np.asarray(benchmark_n, dtype=np.int32)
+        self.benchmark_fallback = np.asarray(benchmark_fallback, dtype=bool)
+        self._employee_row = {eid: i for i, eid in enumerate(self.employees['employee_id'])}
+        self._position_col = {int(pid): j for j, pid in enumerate(self.position_ids)}
+
+        ranked = np.where(np.isnan(self.scores), -np.inf, self.scores)
+        self.forward = self._top_k(ranked, forward_top_k)         # karyawan -> indeks posisi
+        self.reverse = self._top_k(ranked.T, reverse_top_k)       # posisi -> indeks karyawan
+        self._scored_positions = (~np.isnan(self.scores)).sum(axis=1)   # per karyawan
+        self._scored_employees = (~np.isnan(self.scores)).sum(axis=0)   # per posisi
+
+    @staticmethod
+    def _top_k(ranked, k):
+        k = min(k, ranked.shape[1])
+        if k == 0:
+            return np.zeros((ranked.shape[0], 0), dtype=np.int32)
+        top = np.argpartition(-ranked, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(ranked, top, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1).astype(np.int32)
+
+    @property
+    def shape(self):
+        return self.scores.shape
+
+    @property
+    def nbytes(self):
+        return self.scores.nbytes + self.forward.nbytes + self.reverse.nbytes
+
+    def score(self, employee_id, position_id):
+        i = self._employee_row.get(employee_id)
+        j = self._position_col.get(int(position_id))
+        if i is None or j is None:
+            return None
+        value = self.scores[i, j]
+        return None if np.isnan(value) else float(value)
+
+    def top_positions(self, employee_id, k=10):
+        """
+        Best positions for one employee (forward index).
+
+        Returns:
+            DataFrame [position_id, final_match_rate, benchmark_n, benchmark_fallback]
+        """
+        columns = ['position_id', 'final_match_rate', 'benchmark_n', 'benchmark_fallback']
+        i = self._employee_row.get(employee_id)
+        if i is None:
+            return pd.DataFrame(columns=columns)
+        cols = self.forward[i, :min(k, self._scored_positions[i])]
+        if k > self.forward.shape[1]:
+            # Di luar index: urutkan baris penuh (tetap satu baris, bukan scoring ulang)
+            row = np.where(np.isnan(self.scores[i]), -np.inf, self.scores[i])
+            cols = np.argsort(-row, kind='stable')[:min(k, self._scored_positions[i])]
+        return pd.DataFrame({
+            'position_id': self.position_ids[cols],
+            'final_match_rate': self.scores[i, cols].astype(float),
+            'benchmark_n': self.benchmark_n[cols],
+            'benchmark_fallback': self.benchmark_fallback[cols],
+        }, columns=columns)
+
+    def top_candidates(self, position_id, k=20, exclude_incumbents=True):
+        """
+        Best internal candidates for one position (reverse index).
+
+        Returns:
+            DataFrame of employee attributes plus final_match_rate, best first
+        """
+        j = self._position_col.get(int(position_id))
+        if j is None:
+            return self.employees.iloc[0:0].assign(final_match_rate=[])
+        rows = self.reverse[j, :self._scored_employees[j]]
+        if exclude_incumbents:
+            rows = rows[self.employees['position_id'].to_numpy()[rows] != position_id]
+        if len(rows) < k and self._scored_employees[j] > self.reverse.shape[1]:
+            # Index terlalu pendek setelah filter: urutkan kolom penuh
+            col = np.where(np.isnan(self.scores[:, j]), -np.inf, self.scores[:, j])
+            rows = np.argsort(-col, kind='stable')[:self._scored_employees[j]]
+            if exclude_incumbents:
+                rows = rows[self.employees['position_id'].to_numpy()[rows] != position_id]
+        rows = rows[:k]
+        result = self.employees.iloc[rows].copy()
+        result['final_match_rate'] = self.scores[rows, j].astype(float)
+        return result.reset_index(drop=True)
+
+    def bench_strength(self, threshold=80.0, exclude_incumbents=True):
+        """
+        Number of candidates scoring >= threshold for every position.
+
+        Returns:
+            DataFrame [position_id, ready_candidates, best_score, benchmark_n, benchmark_fallback]
+        """
+        scores = self.scores
+        if exclude_incumbents:
+            incumbent = self.employees['position_id'].to_numpy()[:, None] == self.position_ids[None, :]
+            scores = np.where(incumbent, np.nan, scores)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            best = np.nanmax(scores, axis=0)
+        return pd.DataFrame({
+            'position_id': self.position_ids,
+            'ready_candidates': (np.nan_to_num(scores, nan=-np.inf) >= threshold).sum(axis=0),
+            'best_score': best.astype(float),
+            'benchmark_n': self.benchmark_n,
+            'benchmark_fallback': self.benchmark_fallback,
+        })
+
+
+@dataclass
+class TalentFeatures:
+    """Talent variables of a set of employees, aligned for vectorized scoring."""
+    tvs: list                 # TV numerik: pillar kompetensi + kognitif + skala PAPI
+    X: np.ndarray             # karyawan x TV, NaN = skor NULL / tidak ada
+    P: np.ndarray             # karyawan x TV, True = baris data ada (meski skor NULL)
+    reverse: np.ndarray       # TV dengan skala terbalik (PAPI I, K, Z, T)
+    categorical: dict         # 'mbti' / 'disc' -> kode ternormalisasi per karyawan
+    has_psych: np.ndarray     # karyawan punya baris profiles_psych
+
+    def subset(self, rows):
+        return TalentFeatures(self.tvs, self.X[rows], self.P[rows], self.reverse,
+                              {tv: codes[rows] for tv, codes in self.categorical.items()},
+                              self.has_psych[rows])
+
+    @property
+    def all_tvs(self):
+        """Column order of the W matrices passed to score_benchmarks()."""
+        return self.tvs + CATEGORICAL_TVS
+
+
+def score_benchmarks(features, medians, exists, modes, W, W_valid, group_weights):
+    """
+    Final match rate of every employee against a block of benchmarks.
+
+    Args:
+        features (TalentFeatures): Employees to score
+        medians (ndarray): benchmark x TV baselines (NaN = no baseline)
+        exists (ndarray): benchmark x TV, True when the benchmark has rows for the TV
+        modes (list): Per benchmark, {'mbti': code, 'disc': code} (None = no mode)
+        W (ndarray): features.all_tvs x TGV summed tv_weight
+        W_valid (ndarray): features.all_tvs x TGV, 1 where a non-NULL weight exists
+        group_weights (ndarray): TGV weights
+
+    Returns:
+        ndarray: employee x benchmark final_match_rate (NaN = no score)
+    """
+    n_tvs = len(features.tvs)
+    Wn, Wn_valid = W[:n_tvs], W_valid[:n_tvs]
+    X0 = np.nan_to_num(features.X)
+    V = (~np.isnan(features.X) & features.P).astype(float)
+    Pf = features.P.astype(float)
+    exists = exists.astype(float)
+
+    ok = exists * (np.isfinite(medians) & (medians != 0))       # NULLIF(baseline, 0)
+    inv = np.divide(100.0, medians, out=np.zeros_like(medians, dtype=float), where=ok > 0)
+    sign = np.where(features.reverse, -1.0, 1.0)
+
+    # user/base*100, atau (2*base - user)/base*100 = 200 - user/base*100 untuk skala reverse
+    coef = (inv * sign)[:, :, None] * Wn[None]                 # benchmark x TV x TGV
+    const = (200.0 * ok * features.reverse)[:, :, None] * Wn[None]
+    num = np.einsum('nt,btg->nbg', X0, coef) + np.einsum('nt,btg->nbg', V, const)
+    den = np.einsum('nt,btg->nbg', Pf, exists[:, :, None] * Wn[None])
+    valid = np.einsum('nt,btg->nbg', V, ok[:, :, None] * Wn_valid[None])
+
+    psych_f = features.has_psych.astype(float)[:, None, None]
+    for c, tv in enumerate(CATEGORICAL_TVS):
+        t = n_tvs + c
+        bench_modes = np.array([m.get(tv) for m in modes], dtype=object)
+        match = (features.categorical[tv][:, None] == bench_modes[None, :]) & (bench_modes[None, :] != None)  # noqa: E711
+        num += 100.0 * match[:, :, None] * W[t][None, None, :]
+        den += psych_f * W[t][None, None, :]
+        valid += psych_f * W_valid[t][None, None, :]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tgv_rate = np.where((valid > 0) & (den != 0), num / den, np.nan)
+    weighted = tgv_rate * group_weights[None, None, :]
+    has_value = ~np.isnan(weighted)
+    return np.where(has_value.any(axis=2), np.where(has_value, weighted, 0.0).sum(axis=2), np.nan)
+
+
+def compute_fit_matrix(inputs, position_ids):
+    """
+    Score every employee against every position benchmark in one vectorized pass.
+
+    Args:
+        inputs (dict): DataFrames from load_fit_inputs()
+        position_ids (list): Positions to build benchmarks for (columns of the matrix)
+
+    Returns:
+        FitMatrix
+    """
+    employees = inputs['employees']
+    comps, psych, papi = inputs['competencies'], inputs['psych'], inputs['papi']
+    hp_ids = set(inputs['hp']['employee_id'])
+
+    # --- Semua karyawan yang muncul di tabel mana pun (benchmark fallback tidak join employees)
+    universe = pd.Index(pd.unique(pd.concat([
+        employees['employee_id'], inputs['hp']['employee_id'], comps['employee_id'],
+        psych['employee_id'], papi['employee_id'],
+    ], ignore_index=True)))
+    n = len(universe)
+
+    # --- Matriks fitur numerik (kompetensi + kognitif + PAPI) dengan mask "baris ada"
+    comp_tvs = sorted(comps['pillar_code'].dropna().unique())
+    papi_tvs = sorted(papi['scale_code'].dropna().unique())
+    tvs = comp_tvs + COGNITIVE_TVS + papi_tvs
+    tv_index = {tv: t for t, tv in enumerate(tvs)}
+    X = np.full((n, len(tvs)), np.nan)
+    P = np.zeros((n, len(tvs)), dtype=bool)
+
+    for frame, tv_col in ((comps, 'pillar_code'), (papi, 'scale_code')):
+        rows = universe.get_indexer(frame['employee_id'])
+        cols = frame[tv_col].map(tv_index).to_numpy()
+        keep = (rows >= 0) & ~pd.isna(cols)
+        rows, cols = rows[keep], cols[keep].astype(int)
+        X[rows, cols] = frame['score'].to_numpy(dtype=float)[keep]
+        P[rows, cols] = True
+
+    psych_rows = universe.get_indexer(psych['employee_id'])
+    has_psych = np.zeros(n, dtype=bool)
+    has_psych[psych_rows] = True
+    for tv in COGNITIVE_TVS:
+        X[psych_rows, tv_index[tv]] = psych[tv].to_numpy(dtype=float)
+        P[psych_rows, tv_index[tv]] = True
+    reverse = np.array([tv in REVERSE_PAPI_SCALES for tv in tvs])
+
+    categorical = {}
+    for tv in CATEGORICAL_TVS:
+        codes = np.full(n, None, dtype=object)
+        codes[psych_rows] = [_normalize_category(v) for v in psych[tv]]
+        categorical[tv] = codes
+
+    # --- Bobot TV -> TGV dan TGV -> skor akhir
+    mapping = inputs['mapping']
+    tgvs = sorted(mapping['tgv_name'].dropna().unique())
+    tgv_index = {g: k for k, g in enumerate(tgvs)}
+    all_tvs = tvs + CATEGORICAL_TVS
+    all_tv_index = {tv: t for t, tv in enumerate(all_tvs)}
+    W = np.zeros((len(all_tvs), len(tgvs)))        # SUM(tv_weight) per (tv, tgv)
+    W_valid = np.zeros((len(all_tvs), len(tgvs)))  # baris mapping dengan bobot tidak NULL
+    for tgv, tv, weight in mapping[['tgv_name', 'tv_name', 'tv_weight']].itertuples(index=False):
+        if tv in all_tv_index and tgv in tgv_index and not pd.isna(weight):
+            W[all_tv_index[tv], tgv_index[tgv]] += weight
+            W_valid[all_tv_index[tv], tgv_index[tgv]] = 1.0
+    group_weight = inputs['group_weights'].set_index('tgv_name')['tgv_weight']
+    gw = np.array([group_weight.get(g, np.nan) for g in tgvs], dtype=float)
+
+    # --- Benchmark per posisi (HP posisi tsb, fallback ke semua HP)
+    hp_by_position = (employees[employees['employee_id'].isin(hp_ids)]
+                      .groupby('position_id')['employee_id'].unique())
+    hp_global = universe.get_indexer(sorted(hp_ids))
+    benchmarks, benchmark_n, benchmark_fallback = [], [], []
+    for pid in position_ids:
+        members = hp_by_position.get(pid, [])
+        if len(members):
+            benchmarks.append(universe.get_indexer(members))
+            benchmark_fallback.append(False)
+        else:
+            benchmarks.append(hp_global)
+            benchmark_fallback.append(True)
+        benchmark_n.append(len(benchmarks[-1]))
+
+    # Baseline (median) per benchmark; benchmark fallback yang sama hanya dihitung sekali
+    baseline_cache = {}
+
+    def baseline(members):
+        key = members.tobytes()
+        if key not in baseline_cache:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                medians = np.nanmedian(X[members], axis=0) if len(members) else np.full(len(tvs), np.nan)
+            exists = P[members].any(axis=0)
+            modes = {tv: _mode(categorical[tv][members]) for tv in CATEGORICAL_TVS}
+            baseline_cache[key] = (medians, exists, modes)
+        return baseline_cache[key]
+
+    # --- Satu pass vektor per blok benchmark, hanya untuk karyawan di tabel employees
+    emp_rows = universe.get_indexer(employees['employee_id'])
+    features = TalentFeatures(tvs, X, P, reverse, categorical, has_psych).subset(emp_rows)
+    scores = np.full((len(emp_rows), len(position_ids)), np.nan)
+    for start in range(0, len(benchmarks), BENCHMARK_CHUNK):
+        bases = [baseline(m) for m in benchmarks[start:start + BENCHMARK_CHUNK]]
+        scores[:, start:start + len(bases)] = score_benchmarks(
+            features,
+            medians=np.stack([b[0] for b in bases]),
+            exists=np.stack([b[1] for b in bases]),
+            modes=[b[2] for b in bases],
+            W=W, W_valid=W_valid, group_weights=gw,
+        )
+
+    return FitMatrix(
+        employees=_employee_attributes(inputs, universe, P, has_psych, categorical, comp_tvs, tv_index),
+        position_ids=position_ids,
+        scores=scores,
+        benchmark_n=benchmark_n,
+        benchmark_fallback=benchmark_fallback,
+        features=features,
+    )
+
+
+def _employee_attributes(inputs, universe, P, has_psych, categorical, comp_tvs, tv_index):
+    # Kolom sama seperti final_results di SQL_TEMPLATE (tanpa final_match_rate)
+    employees = inputs['employees']
+    rows = universe.get_indexer(employees['employee_id'])
+    psych = inputs['psych'].set_index('employee_id')
+    comp_count = P[rows][:, [tv_index[tv] for tv in comp_tvs]].sum(axis=1)
+    papi_count = inputs['papi'].groupby('employee_id').size().reindex(employees['employee_id']).fillna(0).to_numpy()
+    cog_count = psych[COGNITIVE_TVS].notna().sum(axis=1).reindex(employees['employee_id']).fillna(0).to_numpy()
+    cat_count = sum((categorical[tv][rows] != None).astype(int) for tv in CATEGORICAL_TVS)  # noqa: E711
+    completeness = (comp_count + cog_count + papi_count + cat_count) * 100.0 / TOTAL_TALENT_VARIABLES
+
+    return pd.DataFrame({
+        'employee_id': employees['employee_id'].to_numpy(),
+        'fullname': employees['fullname'].to_numpy(),
+        'position_id': employees['position_id'].to_numpy(),
+        'department_id': employees['department_id'].to_numpy(),
+        'division_id': employees['division_id'].to_numpy(),
+        'grade_id': employees['grade_id'].to_numpy(),
+        'directorate_id': employees['directorate_id'].to_numpy(),
+        'experience_years': (employees['years_of_service_months'] / 12.0).round(1).to_numpy(),
+        'data_completeness_pct': np.round(completeness.astype(float), 1),
+    })
+
+
+def build_fit_matrix(engine):
+    """Load the talent data and compute the matrix for every position in dim_positions."""
+    positions = get_dimension_registry(engine).frame('positions')
+    return compute_fit_matrix(load_fit_inputs(engine), positions['position_id'].astype(int).tolist())
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_fit_matrix(engine, probe_interval=DEFAULT_PROBE_INTERVAL):
+    """Process-wide fit matrix for this engine, rebuilt in the background when data changes."""
+    key = id(engine)
+    with _services_lock:
+        cache = _services.get(key)
+        if cache is None:
+            tables = MATCHING_TABLES + ['dim_positions']
+            cache = get_swr_cache(
+                f"fit_matrix@{key:x}",
+                lambda: build_fit_matrix(engine),
+                version_probe=lambda: get_data_version(engine, tables),
+                probe_interval=probe_interval,
+            )
+            _services[key] = cache
+    return cache.get()
@@ -0,0 +1,253 @@
+# core/job_batch.py
+"""
+Bulk job profile generation.
+
+A batch is a CSV of roles (role_name, job_level, competencies, context).
+run_batch() generates the profiles concurrently on an asyncio worker pool:
+
+- a fixed number of workers pull items from a queue (concurrency limit),
+- a token bucket caps the request rate to the model (requests per minute);
+  items answered from the response cache do not use a token,
+- failed items are retried with exponential backoff and full jitter,
+- each attempt has its own timeout,
+- malformed responses are repaired locally and only missing sections are
+  re-requested (core/job_schema.py, also rate limited); a full retry is the
+  last resort.
+
+The model call itself is the blocking generate_text() from core/llm_client.py
+(run in a thread). A timed out attempt stops waiting for the thread, which
+still finishes and stores its response in the response cache; run_batch()
+returns once those threads are done.
+
+Used by the batch mode of pages/2_Job_Generator.py and by
+scripts/generate_job_profiles.py.
+"""
+
+import asyncio
+import csv
+import io
+import random
+import time
+from dataclasses import dataclass, field
+
+from .job_generator import build_generation_prompt
+from .job_schema import complete_job_profile
+from .llm_client import DEFAULT_MODEL, LLMResponse, cached_text, generate_text
+
+BATCH_COLUMNS = ['role_name', 'job_level', 'competencies', 'context']
+COMPETENCY_SEPARATORS = (';', '|')
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_PER_MINUTE = 30
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_TIMEOUT_S = 90
+BACKOFF_BASE_S = 1.0
+BACKOFF_CAP_S = 30.0
+
+
+@dataclass
+class BatchItem:
+    row: int
+    role_name: str
+    job_level: str = ''
+    competencies: list = field(default_factory=list)
+    context: str = ''
+
+
+@dataclass
+class BatchResult:
+    item: BatchItem
+    profile: dict = None
+    error: str = None
+    attempts: int = 0
+    cached: bool = False
+    duration_s: float = 0.0
+
+    @property
+    def ok(self):
+        return self.profile is not None
+
+    def to_vacancy(self):
+        """Row for save_job_vacancies_bulk()."""
+        return {'role_name': self.item.role_name, 'job_level': self.item.job_level, **(self.profile or {})}
+
+
+def _split_competencies(value):
+    value = (value or '').strip()
+    for sep in COMPETENCY_SEPARATORS:
+        if sep in value:
+            return [c.strip() for c in value.split(sep) if c.strip()]
+    return [value] if value else []
+
+
+def read_batch_csv(content):
+    """
+    Parse a batch CSV.
+
+    Args:
+        content (str | bytes): CSV with a header row containing role_name
+            (required), job_level, competencies (separated by ';' or '|') and context
+
+    Returns:
+        (items, errors): list of BatchItem and list of 'row N: message' strings
+    """
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    source = io.StringIO(content.lstrip('\ufeff'))
+
+    reader = csv.DictReader(source)
+    header = [h.strip().lower() for h in (reader.fieldnames or [])]
+    if 'role_name' not in header:
+        return [], ["header: missing required column 'role_name'"]
+    reader.fieldnames = header
+
+    items, errors = [], []
+    # Baris 1 adalah header
+    for row_number, row in enumerate(reader, start=2):
+        role_name = (row.get('role_name') or '').strip()
+        if not role_name:
+            if any((v or '').strip() for v in row.values() if isinstance(v, str)):
+                errors.append(f"row {row_number}: Role Name is required")
+            continue
+        if len(role_name) < 3:
+            errors.append(f"row {row_number}: Role Name must be at least 3 characters")
+            continue
+        items.append(BatchItem(
+            row=row_number,
+            role_name=role_name,
+            job_level=(row.get('job_level') or '').strip(),
+            competencies=_split_competencies(row.get('competencies')),
+            context=(row.get('context') or '').strip(),
+        ))
+    return items, errors
+
+
+def batch_csv_template():
+    """Example CSV with the expected header."""
+    return (
+        "role_name,job_level,competencies,context\n"
+        "Data Analyst,Mid Level,Curiosity & Experimentation;Insight & Decision Sharpness,Retail analytics team\n"
+        "HR Business Partner,Senior Level,Social Empathy & Awareness,\n"
+    )
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_S, cap=BACKOFF_CAP_S):
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+async def _generate_item(item, bucket, model_name, max_retries, timeout_s, use_cache):
+    result = BatchResult(item)
+    started = time.perf_counter()
+    prompt = build_generation_prompt(item.role_name, item.job_level, item.competencies, item.context)
+    use_cached = use_cache
+    loop = asyncio.get_running_loop()
+
+    def request_section(section_prompt):
+        # Dipanggil dari worker thread: request ke model tetap lewat token bucket (rate limit batch).
+        # Cache hanya jika batch memakainya dan belum dimatikan oleh respons yang tidak valid.
+        text = cached_text(section_prompt, model_name) if use_cached else None
+        if text is not None:
+            return text
+        asyncio.run_coroutine_threadsafe(bucket.acquire(), loop).result()
+        return generate_text(section_prompt, model_name, False).text
+
+    for attempt in range(1, max_retries + 2):
+        result.attempts = attempt
+        try:
+            text = await asyncio.to_thread(cached_text, prompt, model_name) if use_cached else None
+            if text is not None:
+                response = LLMResponse(text, model_name, True, 0.0)
+            else:
+                await bucket.acquire()
+                response = await asyncio.wait_for(
+                    asyncio.to_thread(generate_text, prompt, model_name, False),
+                    timeout=timeout_s,
+                )
+            # Perbaikan lokal dulu; section yang hilang diminta ulang satu per satu, bukan seluruh profil
+            check = await asyncio.wait_for(asyncio.to_thread(
+                complete_job_profile, response.text, request_section,
+                item.role_name, item.job_level, item.context,
+            ), timeout=timeout_s)
+            if check.missing:
+                raise ValueError(f"Missing sections after repair: {', '.join(check.missing)}")
+            result.profile = check.profile
+            result.cached = response.cached
+            result.error = None
+            break
+        except asyncio.TimeoutError:
+            result.error = f"timed out after {timeout_s:g}s"
+        except ValueError as e:
+            # Respons tidak bisa diparse: jangan ambil respons yang sama dari cache saat retry
+            result.error = f"{type(e).__name__}: {e}"
+            use_cached = False
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        if attempt <= max_retries:
+            await asyncio.sleep(backoff_delay(attempt))
+    result.duration_s = time.perf_counter() - started
+    return result
+
+
+async def run_batch_async(items, concurrency=DEFAULT_CONCURRENCY, rate_per_minute=DEFAULT_RATE_PER_MINUTE,
+                          max_retries=DEFAULT_MAX_RETRIES, timeout_s=DEFAULT_TIMEOUT_S,
+                          model_name=DEFAULT_MODEL, use_cache=True, progress=None):
+    """Async core of run_batch(); results are returned in input order."""
+    queue = asyncio.Queue()
+    for index, item in enumerate(items):
+        queue.put_nowait((index, item))
+    results = [None] * len(items)
+    bucket = TokenBucket(rate=rate_per_minute / 60.0)
+    done = 0
+
+    async def worker():
+        nonlocal done
+        while True:
+            try:
+                index, item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results[index] = await _generate_item(item, bucket, model_name, max_retries, timeout_s, use_cache)
+            done += 1
+            if progress:
+                progress(done, len(items), results[index])
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(items))))))
+    return results
+
+
+def run_batch(items, **kwargs):
+    """
+    Generate profiles for all items concurrently (see run_batch_async for options).
+
+    progress(done, total, result) is called on the calling thread after each
+    item, so Streamlit elements can be updated from it.
+
+    Returns:
+        list of BatchResult in input order
+    """
+    if not items:
+        return []
+    return asyncio.run(run_batch_async(items, **kwargs))
@@ -4,10 +4,18 @@ This file contains the core functions for database operations and data managemen
 """
 
 import streamlit as st
-from sqlalchemy import create_engine, text, MetaData, Table
-from typing import Optional
+import threading
+from sqlalchemy import text, MetaData, Table, Column, Integer, Text, TIMESTAMP
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.exc import ProgrammingError
+from typing import List, Optional
 import json
 
+from .db import lane_connection
+from .job_schema import repair_job_profile
+from .vacancy_benchmark import compile_vacancy_benchmarks
+from .vacancy_index import record_saved_vacancies
+
 
 def get_engine():
     """
@@ -18,6 +26,337 @@ def get_engine():
     return get_main_engine()
 
 
+def build_generation_prompt(role_name: str, job_level: str, competencies: list, job_context: str = "") -> str:
+    """
+    Prompt for generating a new job profile (JSON output).
+
+    Args:
+        role_name (str): Name of the role
+        job_level (str): Job level
+        competencies (list): Selected competency names
+        job_context (str, optional): Free-text context about the role
+
+    Returns:
+        str: Prompt text
+    """
+    # Prepare competency context
+    competency_context = ", ".join(competencies) if competencies else "No specific competencies mentioned"
+
+    return f"""
+You are an expert HR consultant.
+
+TASK: Create a **concise, high-impact** job description for:
+- **Position:** {role_name}
+- **Level:** {job_level}
+- **Key Competencies:** {competency_context}
+- **Context:** {job_context if job_context else 'Standard corporate environment'}
+
+INSTRUCTIONS:
+1. **Tone**: Professional, punchy, and direct. Avoid fluff.
+2. **Role Purpose**: 2-3 powerful sentences defining the role's core value.
+3. **Qualifications**: Be specific. Don't just list "Degree"; say "Bachelor's in X required". Don't just say "Coding"; say "Proficiency in Python/SQL".
+4. **Competencies**: Don't just state the level. Explain **briefly** how this skill is applied in THIS specific role.
+
+REQUIRED OUTPUT (JSON format):
+{{
+  "position_name": "{role_name}",
+  "level": "{job_level}",
+  "role_purpose": "Strategic summary of the role's purpose.",
+  "key_responsibilities": [
+    "Action-oriented responsibility 1",
+    "Action-oriented responsibility 2",
+    "... (6-8 items)"
+  ],
+  "qualifications": {{
+    "education": "Specific degree requirement (e.g., 'Bachelor's in Computer Science or equivalent')",
+    "experience": "Specific experience requirement (e.g., '5+ years in product management')",
+    "skills": [
+      "Hard Skill 1",
+      "Hard Skill 2",
+      "..."
+    ]
+  }},
+  "required_competencies": [
+    {{
+      "name": "Competency Name",
+      "description": "Brief, specific explanation of how this skill is applied in this role (1 sentence)."
+    }},
+    "... (6-8 items)"
+  ]
+}}
+
+IMPORTANT:
+- Return ONLY valid JSON.
+- NO Success Metrics.
+- Competencies must have 'description' explaining the application, NOT just 'level'.
+"""
+
+
+def build_refinement_prompt(job_data: dict, instructions: str) -> str:
+    """
+    Prompt for refining an existing job profile with user feedback.
+
+    Args:
+        job_data (dict): Current job profile
+        instructions (str): User feedback
+
+    Returns:
+        str: Prompt text
+    """
+    return f"""
+You are an expert HR consultant.
+TASK: Refine the following job description based on user feedback.
+
+CURRENT PROFILE (JSON):
+{json.dumps(job_data)}
+
+USER FEEDBACK:
+"{instructions}"
+
+INSTRUCTIONS:
+1. Apply the user's feedback strictly.
+2. Maintain the same JSON structure.
+3. Keep the "Concise, Punchy, Direct" tone.
+
+REQUIRED OUTPUT (JSON format):
+(Same structure as before)
+"""
+
+
+def build_enrichment_prompt(draft: dict, job_context: str = "") -> str:
+    """
+    Prompt for enriching a template draft (core/job_templates.py) with role-specific wording.
+
+    Args:
+        draft (dict): Template-based job profile
+        job_context (str, optional): Free-text context about the role
+
+    Returns:
+        str: Prompt text
+    """
+    instructions = (
+        "This is a template draft. Rewrite every section so it is specific to this role"
+        + (f" and this context: {job_context}" if job_context else "")
+        + ". Make responsibilities concrete, make qualification skills specific tools or methods,"
+        " and explain briefly how each competency is applied in this role. Keep the same competencies."
+    )
+    return build_refinement_prompt(draft, instructions)
+
+
+def parse_job_profile(content: str) -> dict:
+    """
+    Parse a model response into a job profile dict.
+
+    Small defects (code fences, surrounding text, trailing commas, truncation,
+    competencies as strings) are repaired locally; see core/job_schema.py.
+    Sections that could not be repaired are left empty; use
+    complete_job_profile() to re-request them.
+
+    Args:
+        content (str): Raw response text, optionally wrapped in a ```json fence
+
+    Returns:
+        dict: Parsed job profile
+
+    Raises:
+        json.JSONDecodeError: If the response contains no usable JSON object
+    """
+    return repair_job_profile(content).profile
+
+
+# Definisi tabel statis: tidak perlu reflect (autoload) pada setiap save
+job_vacancies_table = Table(
+    'job_vacancies', MetaData(),
+    Column('vacancy_id', Integer, primary_key=True),
+    Column('role_name', Text, nullable=False),
+    Column('job_level', Text),
+    Column('role_purpose', Text),
+    Column('key_responsibilities', ARRAY(Text)),
+    Column('qualifications', ARRAY(Text)),
+    Column('required_competencies', ARRAY(Text)),
+    Column('success_metrics', ARRAY(Text), server_default=text("'{}'")),
+    Column('created_at', TIMESTAMP(timezone=True), server_default=text("now()")),
+    schema='public',
+)
+
+JOB_VACANCIES_DDL = """
+    CREATE TABLE IF NOT EXISTS public.job_vacancies (
+        vacancy_id SERIAL PRIMARY KEY,
+        role_name TEXT NOT NULL,
+        job_level TEXT,
+        role_purpose TEXT,
+        key_responsibilities TEXT[],
+        qualifications TEXT[],
+        required_competencies TEXT[],
+        success_metrics TEXT[] DEFAULT '{}',
+        created_at TIMESTAMPTZ DEFAULT now()
+    )
+"""
+
+# Melengkapi tabel lama: (kolom/index yang dibuat, DDL). Langkah dilewati bila objeknya sudah ada,
+# karena ALTER TABLE ... IF NOT EXISTS tetap mengambil ACCESS EXCLUSIVE lock.
+JOB_VACANCIES_MIGRATION = [
+    ('success_metrics',
+     "ALTER TABLE public.job_vacancies ADD COLUMN IF NOT EXISTS success_metrics TEXT[] DEFAULT '{}'"),
+    # Full-text search Vacancy Library (core/vacancy_library.py): role name (A), kompetensi (B),
+    # purpose/tanggung jawab/kualifikasi (C). Fungsi IMMUTABLE agar bisa dipakai di generated column.
+    ('search_vector', """
+    CREATE OR REPLACE FUNCTION public.job_vacancy_search_vector(
+        role_name TEXT, role_purpose TEXT, key_responsibilities TEXT[],
+        qualifications TEXT[], required_competencies TEXT[]
+    ) RETURNS tsvector LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT setweight(to_tsvector('english', coalesce(role_name, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(array_to_string(required_competencies, ' '), '')), 'B')
+            || setweight(to_tsvector('english', concat_ws(' ', role_purpose,
+                   array_to_string(key_responsibilities, ' '), array_to_string(qualifications, ' '))), 'C')
+    $$
+    """),
+    # STORED generated column: rewrite seluruh tabel lama
+    ('search_vector', """
+    ALTER TABLE public.job_vacancies ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (public.job_vacancy_search_vector(
+            role_name, role_purpose, key_responsibilities, qualifications, required_competencies
+        )) STORED
+    """),
+    ('job_vacancies_search_idx',
+     "CREATE INDEX IF NOT EXISTS job_vacancies_search_idx ON public.job_vacancies USING GIN (search_vector)"),
+    # Keyset pagination (created_at, vacancy_id) butuh created_at terisi
+    ('job_vacancies_created_idx', "UPDATE public.job_vacancies SET created_at = now() WHERE created_at IS NULL"),
+    ('job_vacancies_created_idx',
+     "CREATE INDEX IF NOT EXISTS job_vacancies_created_idx ON public.job_vacancies (created_at DESC, vacancy_id DESC)"),
+    ('job_vacancies_level_created_idx',
+     "CREATE INDEX IF NOT EXISTS job_vacancies_level_created_idx"
+     " ON public.job_vacancies (job_level, created_at DESC, vacancy_id DESC)"),
+]
+# Kolom yang dibutuhkan INSERT: satu-satunya langkah migrasi yang boleh jalan dari save path
+SAVE_REQUIRED_COLUMNS = {'success_metrics'}
+MIGRATION_LOCK_TIMEOUT_MS = 5_000
+
+_bootstrapped = set()
+_bootstrap_lock = threading.Lock()
+
+
+def _job_vacancies_objects(conn) -> set:
+    """Existing columns and index names of public.job_vacancies (empty set = no table)."""
+    return set(conn.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'job_vacancies'
+        UNION ALL
+        SELECT indexname FROM pg_indexes
+        WHERE schemaname = 'public' AND tablename = 'job_vacancies'
+    """)).scalars())
+
+
+def ensure_job_vacancies_schema(engine, force=False, migrate=False) -> None:
+    """
+    Make public.job_vacancies usable, running DDL only for what is missing.
+
+    A missing table is created complete (cheap while it is empty). On an
+    existing table the save path only adds the columns INSERT needs; the
+    expensive upgrade of an old table (search_vector rewrite, backfill,
+    indexes) only runs with migrate=True, e.g. from
+    `python scripts/vacancy_search_report.py --migrate`. Every DDL transaction
+    gives up after MIGRATION_LOCK_TIMEOUT_MS instead of queueing behind (and
+    blocking) traffic on the table.
+
+    Args:
+        engine: SQLAlchemy engine
+        force (bool): Check again even if it already ran (e.g. table dropped)
+        migrate (bool): Also run the one-time migration of an old table
+    """
+    key = id(engine)
+    if key in _bootstrapped and not force and not migrate:
+        return
+    with _bootstrap_lock:
+        if key in _bootstrapped and not force and not migrate:
+            return
+        with lane_connection(engine, 'heavy' if migrate else 'interactive') as conn:
+            existing = _job_vacancies_objects(conn)
+            statements = [] if existing else [JOB_VACANCIES_DDL]
+            statements += [
+                ddl for name, ddl in JOB_VACANCIES_MIGRATION
+                if name not in existing and (migrate or not existing or name in SAVE_REQUIRED_COLUMNS)
+            ]
+            if statements:
+                conn.execute(text(f"SET LOCAL lock_timeout = {MIGRATION_LOCK_TIMEOUT_MS}"))
+                if migrate:
+                    # Rewrite tabel + index bisa lebih lama dari statement_timeout lane
+                    conn.execute(text("SET LOCAL statement_timeout = 0"))
+                for ddl in statements:
+                    conn.execute(text(ddl))
+                conn.commit()
+        _bootstrapped.add(key)
+
+
+def _insert_vacancies(engine, rows: list) -> List[int]:
+    # Satu INSERT (multi-row / insertmanyvalues) dengan RETURNING, urutan ID sesuai input
+    ensure_job_vacancies_schema(engine)
+    statement = job_vacancies_table.insert().returning(
+        job_vacancies_table.c.vacancy_id, job_vacancies_table.c.created_at, sort_by_parameter_order=True
+    )
+    try:
+        with lane_connection(engine, 'interactive') as conn:
+            inserted = conn.execute(statement, rows).all()
+            conn.commit()
+    except ProgrammingError:
+        # Tabel dihapus/diubah sejak bootstrap: periksa skema lagi lalu coba sekali lagi
+        ensure_job_vacancies_schema(engine, force=True)
+        with lane_connection(engine, 'interactive') as conn:
+            inserted = conn.execute(statement, rows).all()
+            conn.commit()
+    vacancy_ids = [row.vacancy_id for row in inserted]
+    # Index near-duplicate (core/vacancy_index.py) diperbarui langsung, tanpa rebuild
+    record_saved_vacancies(engine, vacancy_ids, rows, [row.created_at for row in inserted])
+    try:
+        # Benchmark matching per vacancy (core/vacancy_benchmark.py)
+        compile_vacancy_benchmarks(engine, vacancy_ids, rows)
+    except Exception as e:
+        # Vacancy sudah tersimpan; benchmark dikompilasi lagi saat pertama dipakai di Talent Matching.
+        # Error dicatat di get_compile_stats() (halaman Performance) dan ditampilkan ke user.
+        st.warning(f"Vacancy saved, but compiling its matching benchmark failed ({type(e).__name__}: {e}). "
+                   "It will be compiled again when the vacancy is used in Talent Matching.")
+    return vacancy_ids
+
+
+def _vacancy_row(role_name: str, job_level: str, role_purpose: str,
+                 key_responsibilities: list, qualifications, required_competencies: list,
+                 success_metrics: list = None) -> dict:
+    """Convert a job profile into a job_vacancies row (TEXT[] columns)."""
+    # Handle qualifications if it's a dict (convert to list of strings for TEXT[] column)
+    final_qualifications = qualifications
+    if isinstance(qualifications, dict):
+        final_qualifications = []
+        if 'education' in qualifications:
+            final_qualifications.append(f"Education: {qualifications['education']}")
+        if 'experience' in qualifications:
+            final_qualifications.append(f"Experience: {qualifications['experience']}")
+        if 'skills' in qualifications and isinstance(qualifications['skills'], list):
+            skills_str = ", ".join(qualifications['skills'])
+            final_qualifications.append(f"Skills: {skills_str}")
+
+    # Handle required_competencies if it's a list of dicts (convert to list of strings)
+    final_competencies = []
+    if required_competencies:
+        for comp in required_competencies:
+            if isinstance(comp, dict):
+                final_competencies.append(f"{comp.get('name', '')}: {comp.get('description', '')}")
+            else:
+                final_competencies.append(str(comp))
+    else:
+        final_competencies = required_competencies
+
+    # Prepare the data as a single dictionary
+    return {
+        'role_name': role_name,
+        'job_level': job_level,
+        'role_purpose': role_purpose,
+        'key_responsibilities': key_responsibilities,
+        'qualifications': final_qualifications,
+        'required_competencies': final_competencies,
+        'success_metrics': success_metrics or []
+    }
+
+
 def save_job_vacancy(role_name: str, job_level: str, role_purpose: str,
                      key_responsibilities: list, qualifications: list,
                      required_competencies: list, success_metrics: list = None) -> Optional[int]:
@@ -37,101 +376,92 @@ def save_job_vacancy(role_name: str, job_level: str, role_purpose: str,
         Optional[int]: The ID of the newly created vacancy, or None if failed
     """
     try:
-        engine = get_engine()
-        metadata = MetaData()
-
-        # Reflect the job_vacancies table or create if it doesn't exist
-        with engine.connect() as conn:
-            # Check if table exists
-            result = conn.execute(text("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables
-                    WHERE table_schema = 'public'
-                    AND table_name = 'job_vacancies'
-                );
-            """))
-            table_exists = result.scalar()
-
-            if not table_exists:
-                # Create the job_vacancies table if it doesn't exist
-                create_table_sql = """
-                CREATE TABLE public.job_vacancies (
-                    vacancy_id SERIAL PRIMARY KEY,
-                    role_name TEXT NOT NULL,
-                    job_level TEXT,
-                    role_purpose TEXT,
-                    key_responsibilities TEXT[],
-                    qualifications TEXT[],
-                    required_competencies TEXT[],
-                    success_metrics TEXT[] DEFAULT '{}',
-                    created_at TIMESTAMPTZ DEFAULT now()
-                );
-                """
-                conn.execute(text(create_table_sql))
-                conn.commit()
-                st.info("✅ Job vacancies table created successfully!")
-            else:
-                # Check if success_metrics column exists, if not add it
-                check_col_sql = """
-                SELECT EXISTS (
-                    SELECT FROM information_schema.columns
-                    WHERE table_schema = 'public'
-                    AND table_name = 'job_vacancies'
-                    AND column_name = 'success_metrics'
-                );
-                """
-                col_exists = conn.execute(text(check_col_sql)).scalar()
-                if not col_exists:
-                    conn.execute(text("ALTER TABLE public.job_vacancies ADD COLUMN success_metrics TEXT[] DEFAULT '{}';"))
-                    conn.commit()
-                    # st.info("🔄 Database schema updated: Added success_metrics column.")
-
-            # Now reflect the table
-            job_vacancies_table = Table('job_vacancies', metadata, autoload_with=conn, schema='public')
-
-            # Handle qualifications if it's a dict (convert to list of strings for TEXT[] column)
-            final_qualifications = qualifications
-            if isinstance(qualifications, dict):
-                final_qualifications = []
-                if 'education' in qualifications:
-                    final_qualifications.append(f"Education: {qualifications['education']}")
-                if 'experience' in qualifications:
-                    final_qualifications.append(f"Experience: {qualifications['experience']}")
-                if 'skills' in qualifications and isinstance(qualifications['skills'], list):
-                    skills_str = ", ".join(qualifications['skills'])
-                    final_qualifications.append(f"Skills: {skills_str}")
-            
-            # Handle required_competencies if it's a list of dicts (convert to list of strings)
-            final_competencies = []
-            if required_competencies:
-                for comp in required_competencies:
-                    if isinstance(comp, dict):
-                        final_competencies.append(f"{comp.get('name', '')}: {comp.get('description', '')}")
-                    else:
-                        final_competencies.append(str(comp))
-            else:
-                final_competencies = required_competencies
-
-            # Prepare the data as a single dictionary
-            vacancy_data = {
-                'role_name': role_name,
-                'job_level': job_level,
-                'role_purpose': role_purpose,
-                'key_responsibilities': key_responsibilities,
-                'qualifications': final_qualifications,
-                'required_competencies': final_competencies,
-                'success_metrics': success_metrics or []
-            }
-
-            # Execute the insert with RETURNING clause to get the inserted ID
-            result = conn.execute(
-                job_vacancies_table.insert().values(vacancy_data).returning(job_vacancies_table.c.vacancy_id)
-            )
-            inserted_id = result.scalar()
-            conn.commit()
+        vacancy_data = _vacancy_row(role_name, job_level, role_purpose, key_responsibilities,
+                                    qualifications, required_competencies, success_metrics)
+        return _insert_vacancies(get_engine(), [vacancy_data])[0]
 
-            return inserted_id
+    except Exception as e:
+        st.error(f"Error saving to database: {str(e)}")
+        return None
+
+
+def save_job_vacancies_bulk(profiles: list, engine=None) -> Optional[List[int]]:
+    """
+    Save many generated job profiles in one transaction.
+
+    Args:
+        profiles (list): Dicts with role_name, job_level and the generated profile
+            fields (role_purpose, key_responsibilities, qualifications,
+            required_competencies, optional success_metrics)
+        engine: SQLAlchemy engine (defaults to the app engine; scripts pass their own)
+
+    Returns:
+        Optional[List[int]]: The new vacancy IDs in input order, or None if failed
+    """
+    if not profiles:
+        return []
+    try:
+        rows = [
+            _vacancy_row(
+                p['role_name'], p.get('job_level'), p.get('role_purpose', ''),
+                p.get('key_responsibilities', []), p.get('qualifications', {}),
+                p.get('required_competencies', []), p.get('success_metrics'),
+            )
+            for p in profiles
+        ]
+        return _insert_vacancies(engine or get_engine(), rows)
 
     except Exception as e:
         st.error(f"Error saving to database: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+
+def _profile_from_row(row) -> dict:
+    """Convert a job_vacancies row back into the generated profile structure."""
+    qualifications = {'education': '', 'experience': '', 'skills': []}
+    for item in row['qualifications'] or []:
+        label, _, value = item.partition(': ')
+        if label == 'Education':
+            qualifications['education'] = value
+        elif label == 'Experience':
+            qualifications['experience'] = value
+        elif label == 'Skills':
+            qualifications['skills'] = [s.strip() for s in value.split(',') if s.strip()]
+
+    competencies = []
+    for item in row['required_competencies'] or []:
+        name, _, description = item.partition(': ')
+        competencies.append({'name': name, 'description': description})
+
+    return {
+        'position_name': row['role_name'],
+        'level': row['job_level'],
+        'role_purpose': row['role_purpose'] or '',
+        'key_responsibilities': list(row['key_responsibilities'] or []),
+        'qualifications': qualifications,
+        'required_competencies': competencies,
+    }
+
+
+def load_job_vacancy(vacancy_id: int, engine=None) -> Optional[dict]:
+    """
+    Load a saved vacancy as a job profile (same structure as a generated one).
+
+    Args:
+        vacancy_id (int): ID of the vacancy
+        engine: SQLAlchemy engine (defaults to the app engine)
+
+    Returns:
+        Optional[dict]: The job profile, or None if not found or failed
+    """
+    try:
+        table = job_vacancies_table
+        with lane_connection(engine or get_engine(), 'interactive') as conn:
+            row = conn.execute(
+                table.select().where(table.c.vacancy_id == vacancy_id)
+            ).mappings().first()
+        return _profile_from_row(row) if row else None
+
+    except Exception as e:
+        st.error(f"Error loading vacancy: {str(e)}")
+        return None
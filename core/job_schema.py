@@ -0,0 +1,365 @@
+# core/job_schema.py
+"""
+Validation and local repair of model-generated job profiles.
+
+The Job Generator asks the model for one JSON document (see
+build_generation_prompt() in core/job_generator.py). Responses are sometimes
+slightly off: text or a code fence around the JSON, a trailing comma, a
+response cut off in the middle of a list, or competencies as "Name: text"
+strings instead of {name, description} objects. Regenerating the whole
+profile for that doubles latency and cost, so:
+
+1. repair_job_profile() fixes these defects locally (no model call) and
+   checks every section against JOB_PROFILE_SCHEMA. Sections that are missing,
+   truncated or unusable are reported in ProfileCheck.missing.
+2. complete_job_profile() re-requests only those sections, each with a small
+   build_section_prompt() prompt. It can fill the rest from a previous
+   profile (e.g. the template draft being enriched).
+"""
+
+import json
+import re
+from dataclasses import dataclass, field
+
+from .partial_json import PartialJSONError, parse_partial
+
+# Section -> (tipe, contoh bentuk untuk prompt section)
+JOB_PROFILE_SCHEMA = {
+    'role_purpose': (str, '"Strategic summary of the role\'s purpose (2-3 sentences)."'),
+    'key_responsibilities': (list, '["Action-oriented responsibility 1", "... (6-8 items)"]'),
+    'qualifications': (dict, '{"education": "Specific degree requirement", '
+                             '"experience": "Specific experience requirement", "skills": ["Hard Skill 1", "..."]}'),
+    'required_competencies': (list, '[{"name": "Competency Name", '
+                                    '"description": "How this skill is applied in this role (1 sentence)."}]'),
+}
+SECTIONS = tuple(JOB_PROFILE_SCHEMA)
+MIN_RESPONSIBILITIES = 3
+# Field yang harus ada pada section objek yang terpotong sebelum selesai ditulis
+SECTION_FIELDS = {'qualifications': ('education', 'experience', 'skills')}
+
+_FENCE = re.compile(r"```(?:json|JSON)?")
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+_NAME_SEPARATOR = re.compile(r"\s*(?::|\s-\s|\s–\s)\s*")
+_QUALIFICATION_LABELS = {'education': 'education', 'experience': 'experience', 'skills': 'skills', 'key skills': 'skills'}
+
+
+@dataclass
+class ProfileCheck:
+    profile: dict
+    repairs: list = field(default_factory=list)   # perbaikan lokal yang dilakukan (untuk ditampilkan/log)
+    missing: list = field(default_factory=list)   # section yang masih tidak valid
+
+    @property
+    def ok(self):
+        return not self.missing
+
+
+# ---- parsing -------------------------------------------------------------------------
+
+def _load_document(content, repairs):
+    """JSON object in a model response, repairing fences, surrounding text, trailing commas and truncation."""
+    text = (content or '').strip()
+    if _FENCE.search(text):
+        text = _FENCE.sub('', text).strip()
+        repairs.append("removed code fence")
+    start = text.find('{')
+    if start < 0:
+        raise json.JSONDecodeError("No JSON object in the response", text, 0)
+    if start > 0:
+        repairs.append("removed text before the JSON")
+    text = text[start:]
+    end = text.rfind('}')
+
+    try:
+        document = json.loads(text[:end + 1]) if end >= 0 else None
+        if isinstance(document, dict):
+            if text[end + 1:].strip():
+                repairs.append("removed text after the JSON")
+            return document, set(document), ()
+    except json.JSONDecodeError:
+        pass
+
+    if _TRAILING_COMMA.search(text):
+        text = _TRAILING_COMMA.sub(r"\1", text)
+        repairs.append("removed trailing commas")
+        try:
+            document = json.loads(text[:text.rfind('}') + 1])
+            if isinstance(document, dict):
+                return document, set(document), ()
+        except json.JSONDecodeError:
+            pass
+
+    # Respons terpotong: tutup string/array/objek yang masih terbuka
+    try:
+        result = parse_partial(text)
+    except PartialJSONError as e:
+        raise json.JSONDecodeError(f"Unrepairable JSON ({e})", text, 0) from e
+    if not isinstance(result.value, dict):
+        raise json.JSONDecodeError("Response is not a JSON object", text, 0)
+    if not result.complete:
+        repairs.append("closed truncated JSON")
+    if result.complete:
+        return result.value, set(result.value), ()
+    return result.value, result.complete_keys, result.open_path
+
+
+# ---- normalisasi per section ------------------------------------------------------------
+
+def _text(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        # {"responsibility": "..."} / {"text": "..."}: ambil nilai string pertama
+        return next((v.strip() for v in value.values() if isinstance(v, str) and v.strip()), '')
+    if isinstance(value, (int, float)):
+        return str(value)
+    return ''
+
+
+def _string_list(value):
+    if isinstance(value, str):
+        # Satu string berisi bullet / baris / daftar dengan ';'
+        value = re.split(r"\n|;", value) if ('\n' in value or ';' in value) else [value]
+    if not isinstance(value, list):
+        return []
+    items = (_BULLET.sub('', _text(v)) for v in value)
+    return [item for item in items if item and item != '...' and not item.startswith('... (')]
+
+
+def _competency(item):
+    if isinstance(item, str):
+        name, _, description = _NAME_SEPARATOR.sub('\0', _BULLET.sub('', item.strip()), count=1).partition('\0')
+        return {'name': name.strip(), 'description': description.strip()}
+    if isinstance(item, dict):
+        lowered = {str(k).lower(): v for k, v in item.items()}
+        name = next((_text(lowered[k]) for k in ('name', 'competency', 'title', 'skill') if k in lowered), '')
+        description = next((_text(lowered[k]) for k in ('description', 'application', 'detail', 'details', 'context')
+                            if k in lowered), '')
+        if not description and 'level' in lowered:
+            description = f"Level: {_text(lowered['level'])}"
+        return {'name': name, 'description': description}
+    return {'name': '', 'description': ''}
+
+
+def _competencies(value):
+    if isinstance(value, dict):
+        if any(str(k).lower() in ('name', 'competency') for k in value):
+            value = [value]
+        else:
+            # {"Problem Solving": "..."}: nama kompetensi sebagai key
+            value = [{'name': k, 'description': _text(v)} for k, v in value.items()]
+    elif isinstance(value, str):
+        value = _string_list(value)
+    if not isinstance(value, list):
+        return []
+    competencies = [_competency(item) for item in value]
+    return [c for c in competencies if c['name'] and c['name'] != '...' and not c['name'].startswith('... (')]
+
+
+def _qualifications(value):
+    if isinstance(value, str):
+        value = _string_list(value)
+    if isinstance(value, list):
+        # ["Education: ...", "Experience: ...", "Skills: a, b"]
+        labelled, unlabelled = {}, []
+        for item in _string_list(value):
+            label, _, rest = item.partition(':')
+            key = _QUALIFICATION_LABELS.get(label.strip().lower())
+            if key and rest.strip():
+                labelled[key] = rest.strip()
+            else:
+                unlabelled.append(item)
+        value = {'skills': unlabelled, **labelled}
+    if not isinstance(value, dict):
+        return {}
+    lowered = {str(k).lower(): v for k, v in value.items()}
+    skills = lowered.get('skills', lowered.get('key_skills', []))
+    if isinstance(skills, str) and '\n' not in skills and ';' not in skills:
+        skills = skills.split(',')
+    return {
+        'education': _text(lowered.get('education', '')),
+        'experience': _text(lowered.get('experience', '')),
+        'skills': _string_list(skills),
+    }
+
+
+_NORMALIZERS = {
+    'role_purpose': _text,
+    'key_responsibilities': _string_list,
+    'qualifications': _qualifications,
+    'required_competencies': _competencies,
+}
+
+
+def _section_issue(section, value):
+    """Why a normalized section value is unusable, or None when it is valid."""
+    if section == 'role_purpose':
+        return None if value else "empty"
+    if section == 'key_responsibilities':
+        return None if len(value) >= MIN_RESPONSIBILITIES else f"fewer than {MIN_RESPONSIBILITIES} items"
+    if section == 'qualifications':
+        return None if (value.get('education') or value.get('experience') or value.get('skills')) else "empty"
+    if section == 'required_competencies':
+        return None if value else "no named competencies"
+    return None
+
+
+def normalize_section(section, value):
+    """Section value coerced to the schema shape, or None when it is unusable."""
+    normalized = _NORMALIZERS[section](value)
+    return None if _section_issue(section, normalized) else normalized
+
+
+def _resolve(document, path):
+    for step in path:
+        document = document[step]
+    return document
+
+
+def _drop_incomplete(document, open_path, repairs):
+    """
+    Remove the value a truncated response was cut off in (open_path of the partial parse).
+
+    A cut-off string is dropped, and so is a list item object (competency) left
+    without its name or description. Everything that arrived whole, including
+    the last complete list item, is kept.
+    """
+    path = tuple(open_path)
+    if path and isinstance(_resolve(document, path), str):
+        del _resolve(document, path[:-1])[path[-1]]
+        repairs.append(f"dropped cut-off {'.'.join(map(str, path))}")
+        path = path[:-1]
+    target = _resolve(document, path)
+    if len(path) >= 2 and isinstance(path[-1], int) and isinstance(target, dict):
+        item = _competency(target)
+        if not (item['name'] and item['description']):
+            del _resolve(document, path[:-1])[path[-1]]
+            repairs.append(f"dropped cut-off {'.'.join(map(str, path))}")
+
+
+# ---- API -----------------------------------------------------------------------------
+
+def repair_job_profile(content, role_name='', job_level=''):
+    """
+    Parse, repair and validate a job profile response without calling the model.
+
+    Args:
+        content (str): Raw model response
+        role_name (str, optional): Expected position name (fills a missing position_name)
+        job_level (str, optional): Expected level (fills a missing level)
+
+    Returns:
+        ProfileCheck: repaired profile, applied repairs and the sections still invalid
+
+    Raises:
+        json.JSONDecodeError: If the response contains no usable JSON object
+    """
+    repairs = []
+    document, complete_keys, open_path = _load_document(content, repairs)
+    _drop_incomplete(document, open_path, repairs)
+
+    profile = {
+        'position_name': _text(document.get('position_name')) or role_name,
+        'level': _text(document.get('level')) or job_level,
+    }
+    if not document.get('position_name') and role_name:
+        repairs.append("filled position_name")
+    missing = []
+    for section in SECTIONS:
+        raw = document.get(section)
+        normalized = _NORMALIZERS[section](raw) if raw is not None else None
+        if raw is not None and normalized != raw:
+            repairs.append(f"reshaped {section}")
+        # Section objek yang terpotong sebelum semua field-nya tertulis tetap diminta ulang
+        cut_short = (section not in complete_keys and isinstance(raw, dict)
+                     and any(f not in raw for f in SECTION_FIELDS.get(section, ())))
+        if normalized is None or _section_issue(section, normalized) or cut_short:
+            missing.append(section)
+        profile[section] = normalized if normalized is not None else JOB_PROFILE_SCHEMA[section][0]()
+
+    # Field lain dari model (mis. success_metrics) dibiarkan apa adanya
+    for key, value in document.items():
+        profile.setdefault(key, value)
+    return ProfileCheck(profile, repairs, missing)
+
+
+def build_section_prompt(profile, section, job_context=''):
+    """
+    Small prompt that asks the model for one missing section only.
+
+    Args:
+        profile (dict): Profile so far (the other sections give the context)
+        section (str): Section to write (key of JOB_PROFILE_SCHEMA)
+        job_context (str, optional): Free-text context about the role
+
+    Returns:
+        str: Prompt text
+    """
+    known = {k: v for k, v in profile.items() if k != section and v}
+    return f"""
+You are an expert HR consultant.
+TASK: Write ONLY the "{section}" section of this job profile.
+
+CURRENT PROFILE (JSON):
+{json.dumps(known)}
+{f"CONTEXT: {job_context}" if job_context else ""}
+
+REQUIRED OUTPUT (JSON format):
+{{"{section}": {JOB_PROFILE_SCHEMA[section][1]}}}
+
+IMPORTANT:
+- Return ONLY valid JSON with this single key.
+- Keep the same tone and role as the current profile.
+"""
+
+
+def parse_section_response(content, section):
+    """Normalized section value from a section response, or None when unusable."""
+    document, _, open_path = _load_document(content, [])
+    _drop_incomplete(document, open_path, [])
+    # Model kadang mengembalikan seluruh profil: ambil section yang diminta saja
+    value = document.get(section, document if section == 'qualifications' else None)
+    return normalize_section(section, value) if value is not None else None
+
+
+def complete_job_profile(content, request=None, role_name='', job_level='', job_context='', fallback=None):
+    """
+    Repair a profile response and fill the sections it is missing.
+
+    Each missing section is re-requested on its own (never the whole profile)
+    through `request`. A section that still fails is taken from `fallback`
+    (e.g. the profile being enriched) when available.
+
+    Args:
+        content (str): Raw model response
+        request (callable, optional): prompt -> response text (one model call)
+        role_name, job_level (str, optional): Expected position name / level
+        job_context (str, optional): Context passed on to the section prompts
+        fallback (dict, optional): Profile to take still-missing sections from
+
+    Returns:
+        ProfileCheck
+
+    Raises:
+        json.JSONDecodeError: If the response contains no usable JSON object
+    """
+    check = repair_job_profile(content, role_name, job_level)
+    for section in list(check.missing):
+        value = None
+        if request is not None:
+            try:
+                value = parse_section_response(request(build_section_prompt(check.profile, section, job_context)), section)
+            except Exception:
+                # Gagal / timeout: coba fallback di bawah
+                value = None
+            if value is not None:
+                check.repairs.append(f"re-requested {section}")
+        if value is None and fallback:
+            value = normalize_section(section, fallback.get(section))
+            if value is not None:
+                check.repairs.append(f"kept previous {section}")
+        if value is not None:
+            check.profile[section] = value
+            check.missing.remove(section)
+    return check
@@ -0,0 +1,294 @@
+# core/job_templates.py
+"""
+Template-based job profile drafts.
+
+build_template_profile() assembles a complete job profile (role purpose,
+responsibilities, qualifications, competency applications) from a phrase
+library indexed by competency pillar code (dim_competency_pillars) and job
+level, without calling a model. The output has the same shape as the Gemini
+response, so the Job Generator can show the draft instantly and use the model
+only to enrich it.
+
+Pillar codes without an entry in the library still get generic phrases built
+from their label, so new pillars never break the draft.
+"""
+
+from functools import lru_cache
+from string import Formatter
+
+# -----------------------------------------------------------------------------
+# Phrase library per competency pillar ({role} = role name, {label} = pillar label)
+# -----------------------------------------------------------------------------
+PILLAR_PHRASES = {
+    'GDR': {
+        'responsibilities': [
+            "Set stretch goals for the {role} scope and drive them to completion despite setbacks",
+            "Build personal and team capability through continuous learning plans",
+        ],
+        'application': "Keeps {role} priorities moving under pressure and turns setbacks into learning.",
+        'skills': ["Goal setting & OKRs", "Self-directed learning"],
+    },
+    'CEX': {
+        'responsibilities': [
+            "Run structured experiments to test new approaches before scaling them",
+            "Challenge existing {role} processes and propose evidence-based improvements",
+        ],
+        'application': "Explores new methods in {role} work through small, measurable experiments.",
+        'skills': ["Hypothesis-driven experimentation", "A/B testing basics"],
+    },
+    'IDS': {
+        'responsibilities': [
+            "Analyze data to frame problems and recommend clear decisions",
+            "Translate findings into concise recommendations for stakeholders",
+        ],
+        'application': "Turns data and context into sharp, timely decisions within the {role} scope.",
+        'skills': ["Data analysis (Excel/SQL)", "Structured problem solving"],
+    },
+    'QDD': {
+        'responsibilities': [
+            "Deliver {role} outputs on time against agreed quality standards",
+            "Define checklists and review steps that prevent recurring defects",
+        ],
+        'application': "Delivers {role} work right the first time with disciplined follow-through.",
+        'skills': ["Quality assurance & review", "Project planning"],
+    },
+    'STO': {
+        'responsibilities': [
+            "Coordinate with cross-functional teams to align priorities and hand-offs",
+            "Share knowledge and support colleagues to reach team goals",
+        ],
+        'application': "Puts team outcomes first and aligns the {role} work with partner functions.",
+        'skills': ["Cross-functional collaboration", "Agile ways of working"],
+    },
+    'SEA': {
+        'responsibilities': [
+            "Build trusted relationships with stakeholders by understanding their needs",
+            "Handle sensitive conversations with empathy and professionalism",
+        ],
+        'application': "Reads stakeholder needs and adapts communication in every {role} interaction.",
+        'skills': ["Stakeholder management", "Active listening"],
+    },
+    'VCU': {
+        'responsibilities': [
+            "Gather user feedback and translate it into improvements that matter",
+            "Measure the user impact of {role} deliverables and act on the results",
+        ],
+        'application': "Anchors {role} decisions on the value they create for users and customers.",
+        'skills': ["User research basics", "Customer journey mapping"],
+    },
+    'LIE': {
+        'responsibilities': [
+            "Coach and empower team members to own their outcomes",
+            "Communicate direction and recognize contributions to keep the team engaged",
+        ],
+        'application': "Inspires and empowers others to deliver the {role} agenda.",
+        'skills': ["Coaching & feedback", "Delegation"],
+    },
+    'FTC': {
+        'responsibilities': [
+            "Translate long-term direction into a clear {role} roadmap and priorities",
+            "Anticipate trends and risks and adjust plans early",
+        ],
+        'application': "Brings clarity on where the {role} area is heading and what matters most.",
+        'skills': ["Strategic planning", "Roadmapping"],
+    },
+    'CSI': {
+        'responsibilities': [
+            "Link {role} initiatives to revenue, cost and margin impact",
+            "Build business cases and track the financial return of key initiatives",
+        ],
+        'application': "Weighs the commercial impact of {role} choices and focuses effort on value.",
+        'skills': ["Business case development", "Financial acumen"],
+    },
+}
+
+# Dipakai untuk pilar yang belum ada di library
+GENERIC_PILLAR_PHRASES = {
+    'responsibilities': [
+        "Apply {label} in day-to-day {role} deliverables",
+    ],
+    'application': "Demonstrates {label} consistently in {role} work.",
+    'skills': [],
+}
+
+# -----------------------------------------------------------------------------
+# Phrase library per job level (sama dengan pilihan Job Level di halaman)
+# -----------------------------------------------------------------------------
+LEVEL_PHRASES = {
+    'Entry Level': {
+        'purpose': "Supports the team by executing well-defined {role} tasks accurately and on time, "
+                   "while building the foundations to grow in the role.",
+        'responsibilities': [
+            "Execute assigned {role} tasks following established procedures",
+            "Prepare accurate reports and documentation for the team",
+            "Escalate issues early and learn from feedback",
+        ],
+        'education': "Bachelor's degree in a related field (fresh graduates welcome)",
+        'experience': "0-1 years of relevant experience or internship",
+    },
+    'Mid Level': {
+        'purpose': "Owns a defined {role} scope end to end, delivering reliable results independently "
+                   "and improving how the work gets done.",
+        'responsibilities': [
+            "Own end-to-end delivery of the {role} workstream",
+            "Improve processes and tools within the area of responsibility",
+            "Guide junior colleagues on standards and best practices",
+        ],
+        'education': "Bachelor's degree in a related field",
+        'experience': "2-4 years of relevant experience",
+    },
+    'Senior Level': {
+        'purpose': "Leads complex {role} work with a high degree of autonomy, setting quality standards "
+                   "and acting as the go-to expert for the team.",
+        'responsibilities': [
+            "Lead complex {role} initiatives from scoping to delivery",
+            "Set quality standards and review the work of others",
+            "Mentor team members and share expertise across teams",
+        ],
+        'education': "Bachelor's degree in a related field; Master's is a plus",
+        'experience': "5+ years of relevant experience",
+    },
+    'Lead Level': {
+        'purpose': "Leads a {role} team or practice, setting direction and standards so the team "
+                   "delivers consistently and grows its capabilities.",
+        'responsibilities': [
+            "Plan and prioritize the team's {role} work",
+            "Define standards, rituals and tooling for the practice",
+            "Develop team members through coaching and regular feedback",
+        ],
+        'education': "Bachelor's degree in a related field; Master's is a plus",
+        'experience': "6+ years of relevant experience, including 1-2 years leading others",
+    },
+    'Manager': {
+        'purpose': "Manages the {role} function's people, budget and results, aligning the team's work "
+                   "with business priorities.",
+        'responsibilities': [
+            "Manage team performance, hiring and development",
+            "Own the function's targets, budget and reporting",
+            "Align {role} priorities with business stakeholders",
+        ],
+        'education': "Bachelor's degree in a related field; Master's preferred",
+        'experience': "7+ years of relevant experience, including 3+ years managing teams",
+    },
+    'Director': {
+        'purpose': "Sets the strategy for the {role} area and leads managers to deliver it, "
+                   "accountable for results across multiple teams.",
+        'responsibilities': [
+            "Define the {role} strategy and multi-year roadmap",
+            "Lead managers and build a strong leadership bench",
+            "Represent the area in executive forums and own cross-unit outcomes",
+        ],
+        'education': "Master's degree or equivalent executive education preferred",
+        'experience': "10+ years of experience, including 5+ years in leadership roles",
+    },
+    'VP': {
+        'purpose': "Shapes the organization's direction for the {role} domain and is accountable "
+                   "for its business impact at the executive level.",
+        'responsibilities': [
+            "Set the vision and strategic agenda for the {role} domain",
+            "Own domain-level P&L, investment and risk decisions",
+            "Build the organization, culture and leadership pipeline",
+        ],
+        'education': "Master's degree or equivalent executive education",
+        'experience': "15+ years of experience, including senior leadership of multiple functions",
+    },
+}
+DEFAULT_LEVEL = 'Mid Level'
+
+MAX_RESPONSIBILITIES = 8
+MAX_SKILLS = 8
+
+
+def _compile(value):
+    # Validasi placeholder sekali saat import: hanya {role} dan {label} yang diizinkan
+    if isinstance(value, str):
+        fields = {name for _, name, _, _ in Formatter().parse(value) if name}
+        unknown = fields - {'role', 'label'}
+        if unknown:
+            raise ValueError(f"Unknown placeholder(s) {sorted(unknown)} in phrase: {value!r}")
+        return value
+    if isinstance(value, dict):
+        return {k: _compile(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return tuple(_compile(v) for v in value)
+    return value
+
+
+_PILLARS = _compile(PILLAR_PHRASES)
+_GENERIC = _compile(GENERIC_PILLAR_PHRASES)
+_LEVELS = _compile(LEVEL_PHRASES)
+
+
+def _dedupe(items, limit):
+    seen, result = set(), []
+    for item in items:
+        key = item.lower()
+        if key not in seen:
+            seen.add(key)
+            result.append(item)
+    return result[:limit]
+
+
+@lru_cache(maxsize=512)
+def _build(role_name, job_level, pillars, context):
+    level = _LEVELS.get(job_level) or _LEVELS[DEFAULT_LEVEL]
+    phrases = [(label, _PILLARS.get(code, _GENERIC)) for code, label in pillars]
+
+    purpose = level['purpose'].format(role=role_name)
+    if pillars:
+        focus = ", ".join(label for _, label in pillars[:3])
+        purpose += f" The role calls especially for {focus}."
+    if context:
+        purpose += f" Context: {context.strip().rstrip('.')}."
+
+    # Selang-seling: tanggung jawab level, lalu tanggung jawab per pilar (template, label)
+    responsibilities = [(r, '') for r in level['responsibilities'][:2]]
+    for index in range(2):
+        for label, phrase in phrases:
+            if index < len(phrase['responsibilities']):
+                responsibilities.append((phrase['responsibilities'][index], label))
+    responsibilities += [(r, '') for r in level['responsibilities'][2:]]
+
+    skills = [skill for _, phrase in phrases for skill in phrase['skills']]
+    return {
+        'position_name': role_name,
+        'level': job_level,
+        'role_purpose': purpose,
+        'key_responsibilities': _dedupe(
+            [r.format(role=role_name, label=label) for r, label in responsibilities],
+            MAX_RESPONSIBILITIES,
+        ),
+        'qualifications': {
+            'education': level['education'],
+            'experience': level['experience'],
+            'skills': _dedupe(skills, MAX_SKILLS) or ["Relevant technical skills for the role"],
+        },
+        'required_competencies': [
+            {'name': label, 'description': phrase['application'].format(role=role_name, label=label)}
+            for label, phrase in phrases
+        ],
+    }
+
+
+def build_template_profile(role_name, job_level, pillars, context=''):
+    """
+    Assemble a job profile draft from the phrase library.
+
+    Args:
+        role_name (str): Name of the role
+        job_level (str): Job level (one of LEVEL_PHRASES; others use Mid Level phrasing)
+        pillars (list): (pillar_code, pillar_label) pairs of the selected competencies
+        context (str, optional): Free-text context, appended to the role purpose
+
+    Returns:
+        dict: Same structure as the AI-generated profile
+    """
+    profile = _build(role_name.strip(), job_level, tuple((code, label) for code, label in pillars),
+                     (context or '').strip())
+    # Salinan: hasil lru_cache tidak boleh diubah oleh editor di halaman
+    return {
+        **profile,
+        'key_responsibilities': list(profile['key_responsibilities']),
+        'qualifications': {**profile['qualifications'], 'skills': list(profile['qualifications']['skills'])},
+        'required_competencies': [dict(c) for c in profile['required_competencies']],
+    }
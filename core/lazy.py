@@ -0,0 +1,59 @@
+# core/lazy.py
+"""
+Lazy imports for heavy optional modules.
+
+`genai = lazy_import('google.generativeai')` binds a placeholder that performs
+the real import on first attribute access, so a page only pays for a heavy
+module (gRPC/protobuf stacks, plotting libraries) on the rerun that actually
+uses it. Import durations are recorded for the import-time report.
+"""
+
+import importlib
+import threading
+import time
+
+# module name -> seconds spent importing it lazily
+import_timings = {}
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """Module placeholder that imports the real module on first use."""
+
+    def __init__(self, name):
+        object.__setattr__(self, '_lazy_name', name)
+        object.__setattr__(self, '_lazy_module', None)
+
+    def _load(self):
+        module = self._lazy_module
+        if module is None:
+            with _lock:
+                module = self._lazy_module
+                if module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._lazy_name)
+                    import_timings[self._lazy_name] = time.perf_counter() - started
+                    object.__setattr__(self, '_lazy_module', module)
+        return module
+
+    @property
+    def is_loaded(self):
+        return self._lazy_module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.is_loaded else 'not loaded'
+        return f"<lazy module {self._lazy_name!r} ({state})>"
+
+
+def lazy_import(name):
+    """Return a LazyModule for `name` (the import happens on first attribute access)."""
+    return LazyModule(name)
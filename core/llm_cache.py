@@ -0,0 +1,208 @@
+# core/llm_cache.py
+"""
+On-disk, content-addressed cache for LLM responses.
+
+The key is a SHA-256 of the model name and the normalized prompt, so an
+identical Generate/Refine request (same role, level, competencies, context)
+is answered from disk instead of paying for another model call. Entries
+expire after a TTL and the directory is kept under a size budget by evicting
+the least recently used files.
+
+Configuration (environment):
+    LLM_CACHE_DIR         directory (default ~/.cache/talent-dashboard/llm)
+    LLM_CACHE_TTL_HOURS   entry lifetime in hours (default 168 = 7 days)
+    LLM_CACHE_MAX_MB      size budget of the directory (default 50)
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'talent-dashboard', 'llm')
+DEFAULT_TTL_HOURS = 168
+DEFAULT_MAX_MB = 50
+
+_WHITESPACE = re.compile(r'[ \t]+')
+
+
+def normalize_prompt(prompt):
+    """Prompt text as hashed: unified newlines, runs of spaces collapsed, lines stripped."""
+    lines = prompt.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(_WHITESPACE.sub(' ', line).strip() for line in lines).strip()
+
+
+def cache_key(model_name, prompt):
+    digest = hashlib.sha256()
+    digest.update(model_name.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(normalize_prompt(prompt).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """Content-addressed response files under `directory/<2 hex>/<sha256>.json`."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttl_seconds=DEFAULT_TTL_HOURS * 3600,
+                 max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._writes = 0
+        self._evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, model_name, prompt):
+        """Cached response text, or None when missing or expired."""
+        path = self._path(cache_key(model_name, prompt))
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            # Tidak ada / rusak (misalnya tulisan terpotong): anggap miss
+            with self._lock:
+                self._misses += 1
+            return None
+
+        if time.time() - entry.get('created_at', 0) > self.ttl_seconds:
+            self._remove(path)
+            with self._lock:
+                self._expired += 1
+                self._misses += 1
+            return None
+
+        try:
+            # mtime = waktu akses terakhir, dipakai untuk eviction LRU
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self._hits += 1
+        return entry.get('text')
+
+    def put(self, model_name, prompt, text):
+        """Store a response; evicts least recently used entries above the size budget."""
+        key = cache_key(model_name, prompt)
+        path = self._path(key)
+        entry = {
+            'key': key,
+            'model': model_name,
+            'created_at': time.time(),
+            'prompt_chars': len(prompt),
+            'text': text,
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Tulis ke file sementara lalu os.replace agar pembaca tidak melihat file setengah jadi
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            raise
+        with self._lock:
+            self._writes += 1
+        self.evict()
+
+    def _entries(self):
+        # (mtime, size, path) untuk setiap file cache
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def evict(self):
+        """Drop expired files, then the least recently used ones until under max_bytes."""
+        now = time.time()
+        entries = []
+        removed = 0
+        for mtime, size, path in self._entries():
+            # Tanpa membaca isi: file yang tidak diakses sejak TTL pasti sudah kedaluwarsa
+            if now - mtime > self.ttl_seconds:
+                removed += self._remove(path)
+            else:
+                entries.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                removed += 1
+                total -= size
+
+        with self._lock:
+            self._evictions += removed
+        return removed
+
+    def clear(self):
+        removed = sum(self._remove(path) for _, _, path in self._entries())
+        with self._lock:
+            self._evictions += removed
+        return removed
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'directory': self.directory,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+                'ttl_hours': round(self.ttl_seconds / 3600, 1),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'expired': self._expired,
+                'writes': self._writes,
+                'evictions': self._evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Process-wide cache configured from LLM_CACHE_DIR / LLM_CACHE_TTL_HOURS / LLM_CACHE_MAX_MB."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache(
+                directory=os.environ.get('LLM_CACHE_DIR', DEFAULT_CACHE_DIR),
+                ttl_seconds=float(os.environ.get('LLM_CACHE_TTL_HOURS', DEFAULT_TTL_HOURS)) * 3600,
+                max_bytes=int(float(os.environ.get('LLM_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024),
+            )
+        return _cache
@@ -0,0 +1,305 @@
+# core/llm_client.py
+"""
+LLM access for the Job Generator.
+
+generate_text() checks the content-addressed response cache (core/llm_cache.py)
+before calling the model, and stores fresh responses. stream_text() does the
+same but yields the response in chunks as the model produces them, so pages
+can render sections before the whole document has arrived. The backend comes
+from the LLM_BACKEND secret or environment variable:
+
+    gemini  Google Gemini via google.generativeai (default, needs GEMINI_API_KEY)
+    http    JSON-over-HTTP model server at LLM_HTTP_URL (e.g. scripts/fake_llm_server.py)
+    stub    Local deterministic model for offline runs and tests, no API key
+
+Deadline-bound calls with a hedged duplicate request and fallbacks are in
+core/llm_hedge.py.
+"""
+
+import json
+import os
+import re
+import time
+import urllib.request
+from dataclasses import dataclass
+
+import streamlit as st
+
+from .lazy import lazy_import
+from .llm_cache import get_llm_cache
+
+# google.generativeai (gRPC/protobuf) baru di-import saat model Gemini benar-benar dipakai
+genai = lazy_import('google.generativeai')
+
+DEFAULT_MODEL = 'gemini-2.5-flash-lite'
+BACKENDS = ('gemini', 'http', 'stub')
+DEFAULT_HTTP_URL = 'http://127.0.0.1:8765'
+HTTP_TIMEOUT_S = 120           # socket timeout per read dari server HTTP
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    model: str
+    cached: bool
+    duration_s: float
+
+
+def _setting(name, default=""):
+    try:
+        value = st.secrets.get(name, "")
+    except Exception:
+        # Tidak ada secrets.toml (misalnya saat dijalankan lokal)
+        value = ""
+    return str(value or os.environ.get(name, default)).strip()
+
+
+def get_llm_backend():
+    """Configured backend name ('gemini', 'http' or 'stub')."""
+    backend = _setting("LLM_BACKEND", "gemini").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND '{backend}' (expected one of {', '.join(BACKENDS)})")
+    return backend
+
+
+class _StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """
+    Offline stand-in for genai.GenerativeModel.
+
+    Answers generation prompts with a deterministic job profile built from the
+    Position/Level/Competencies lines of the prompt, and refinement prompts by
+    echoing the current profile with the feedback applied to the role purpose.
+    Single-section prompts (core/job_schema.py) get only that section.
+    With stream=True the response is returned as LLM_STUB_CHUNK_CHARS-sized
+    chunks. LLM_STUB_DELAY (seconds) simulates the total model latency.
+    """
+
+    def __init__(self, model_name='stub'):
+        self.model_name = model_name
+        self.calls = 0
+
+    @staticmethod
+    def _field(prompt, label):
+        match = re.search(rf"\*\*{label}:\*\*\s*(.+)", prompt)
+        return match.group(1).strip() if match else ""
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        delay = float(os.environ.get('LLM_STUB_DELAY', '0') or 0)
+        text = self._respond(prompt)
+        if stream:
+            return self._stream(text, delay)
+        if delay:
+            time.sleep(delay)
+        return _StubResponse(text)
+
+    @staticmethod
+    def _stream(text, delay):
+        size = max(1, int(os.environ.get('LLM_STUB_CHUNK_CHARS', '16') or 16))
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        for chunk in chunks:
+            if delay:
+                time.sleep(delay / len(chunks))
+            yield _StubResponse(chunk)
+
+    def _respond(self, prompt):
+        section = re.search(r"Write ONLY the \"(\w+)\" section.*?CURRENT PROFILE \(JSON\):\s*(\{.*?\})\s*\n", prompt, re.S)
+        if section:
+            # Prompt satu section (core/job_schema.py): jawab hanya section itu
+            known = json.loads(section.group(2))
+            full = json.loads(self._respond(f"**Position:** {known.get('position_name', 'Role')}\n"
+                                            f"**Level:** {known.get('level', '')}").strip('`json\n'))
+            return json.dumps({section.group(1): full[section.group(1)]})
+
+        current = re.search(r"CURRENT PROFILE \(JSON\):\s*(\{.*\})\s*USER FEEDBACK:\s*\"(.*?)\"\s*INSTRUCTIONS:", prompt, re.S)
+        if current:
+            profile = json.loads(current.group(1))
+            profile['role_purpose'] = f"{profile.get('role_purpose', '')} (Revised: {current.group(2).strip()})".strip()
+            return json.dumps(profile)
+
+        role = self._field(prompt, 'Position') or 'Role'
+        level = self._field(prompt, 'Level')
+        competencies = [c.strip() for c in self._field(prompt, 'Key Competencies').split(',')
+                        if c.strip() and not c.strip().startswith('No specific')]
+        profile = {
+            'position_name': role,
+            'level': level,
+            'role_purpose': f"The {role} delivers measurable results for the organization at {level or 'this'} level.",
+            'key_responsibilities': [f"Own the core {role} deliverables ({i})" for i in range(1, 7)],
+            'qualifications': {
+                'education': "Bachelor's degree in a relevant field",
+                'experience': f"Relevant experience for a {level or 'professional'} {role}",
+                'skills': ['Stakeholder management', 'Data analysis', 'Communication'],
+            },
+            'required_competencies': [
+                {'name': name, 'description': f"Applies {name} in day-to-day {role} work."}
+                for name in (competencies or ['Problem Solving', 'Collaboration'])
+            ],
+        }
+        return "```json\n" + json.dumps(profile, indent=2) + "\n```"
+
+
+class HTTPModel:
+    """
+    genai-style client for a JSON model server.
+
+    POST {url}/generate with {"model", "prompt", "stream"}. The reply is
+    {"text": ...}, or with stream=true one {"text": chunk} JSON object per line.
+    """
+
+    def __init__(self, model_name, url=DEFAULT_HTTP_URL, timeout_s=HTTP_TIMEOUT_S):
+        self.model_name = model_name
+        self.url = url.rstrip('/')
+        self.timeout_s = timeout_s
+
+    def _post(self, prompt, stream):
+        body = json.dumps({'model': self.model_name, 'prompt': prompt, 'stream': stream}).encode('utf-8')
+        request = urllib.request.Request(f"{self.url}/generate", data=body,
+                                         headers={'Content-Type': 'application/json'})
+        return urllib.request.urlopen(request, timeout=self.timeout_s)
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._stream(prompt)
+        with self._post(prompt, stream=False) as response:
+            return _StubResponse(json.loads(response.read())['text'])
+
+    def _stream(self, prompt):
+        with self._post(prompt, stream=True) as response:
+            for line in response:
+                if line.strip():
+                    yield _StubResponse(json.loads(line)['text'])
+
+
+def get_model(model_name=DEFAULT_MODEL, backend=None):
+    """Model object with a genai-style generate_content(prompt) -> response.text."""
+    backend = backend or get_llm_backend()
+    if backend == 'stub':
+        return StubModel(model_name)
+    if backend == 'http':
+        return HTTPModel(model_name, _setting("LLM_HTTP_URL", DEFAULT_HTTP_URL))
+    # Secret, atau env var GEMINI_API_KEY untuk script CLI di scripts/
+    api_key = _setting("GEMINI_API_KEY")
+    if not api_key:
+        raise KeyError("GEMINI_API_KEY is not set (secrets.toml or environment)")
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+def cached_text(prompt, model_name=DEFAULT_MODEL, backend=None):
+    """Cached response for this prompt and model, or None (no model call)."""
+    backend = backend or get_llm_backend()
+    return get_llm_cache().get(f"{backend}:{model_name}", prompt)
+
+
+def generate_text(prompt, model_name=DEFAULT_MODEL, use_cache=True, backend=None):
+    """
+    Model response for a prompt, served from the response cache when possible.
+
+    Args:
+        prompt (str): Full prompt text
+        model_name (str): Model to call
+        use_cache (bool): False forces a fresh call (the new response still replaces the cached one)
+        backend (str, optional): Override of the configured backend
+
+    Returns:
+        LLMResponse
+    """
+    backend = backend or get_llm_backend()
+    cache_model = f"{backend}:{model_name}"
+    cache = get_llm_cache()
+    started = time.perf_counter()
+
+    if use_cache:
+        text = cache.get(cache_model, prompt)
+        if text is not None:
+            return LLMResponse(text, model_name, True, time.perf_counter() - started)
+
+    text = get_model(model_name, backend).generate_content(prompt).text
+    try:
+        cache.put(cache_model, prompt, text)
+    except OSError:
+        # Cache tidak bisa ditulis (disk penuh / read-only): tetap kembalikan hasilnya
+        pass
+    return LLMResponse(text, model_name, False, time.perf_counter() - started)
+
+
+class LLMStream:
+    """
+    Iterable of response text chunks.
+
+    After iteration, `text` holds the full response and `first_chunk_s` the
+    time to the first chunk. The response is only cached when the stream was
+    consumed to the end (a rerun that abandons it stores nothing).
+    """
+
+    def __init__(self, chunks, model_name, cached, on_complete=None):
+        self._chunks = chunks
+        self._on_complete = on_complete
+        self._parts = []
+        self.model = model_name
+        self.cached = cached
+        self.started = time.perf_counter()
+        self.first_chunk_s = None
+        self.duration_s = None
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            if self.first_chunk_s is None:
+                self.first_chunk_s = time.perf_counter() - self.started
+            self._parts.append(chunk)
+            yield chunk
+        self.duration_s = time.perf_counter() - self.started
+        if self._on_complete:
+            self._on_complete(self.text)
+
+    @property
+    def text(self):
+        return ''.join(self._parts)
+
+
+def _chunk_texts(response):
+    for chunk in response:
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunk tanpa teks (misalnya chunk penutup dengan finish_reason saja)
+            continue
+        yield text
+
+
+def stream_text(prompt, model_name=DEFAULT_MODEL, use_cache=True, backend=None):
+    """
+    Streaming variant of generate_text().
+
+    A cache hit is returned as a single chunk; otherwise the model is called
+    with stream=True and the complete response is cached once fully received.
+
+    Returns:
+        LLMStream
+    """
+    backend = backend or get_llm_backend()
+    cache_model = f"{backend}:{model_name}"
+    cache = get_llm_cache()
+
+    if use_cache:
+        text = cache.get(cache_model, prompt)
+        if text is not None:
+            return LLMStream([text], model_name, True)
+
+    def store(text):
+        try:
+            cache.put(cache_model, prompt, text)
+        except OSError:
+            # Cache tidak bisa ditulis (disk penuh / read-only): tetap kembalikan hasilnya
+            pass
+
+    response = get_model(model_name, backend).generate_content(prompt, stream=True)
+    return LLMStream(_chunk_texts(response), model_name, False, on_complete=store)
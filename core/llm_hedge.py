@@ -0,0 +1,437 @@
+# core/llm_hedge.py
+"""
+Deadline-bound, hedged LLM calls for the Job Generator.
+
+Model latency has a long tail: most responses start within a few seconds,
+but a few take much longer, and a blocked call blocks the Streamlit script.
+hedged_stream_text() streams a response like stream_text() (core/llm_client.py)
+with these guarantees:
+
+- Hedging: if the first chunk has not arrived after the p90 of the recent
+  primary requests' time-to-first-chunk for this model, one duplicate
+  request is sent.
+  The first attempt to produce a chunk is streamed and the other is abandoned.
+- Deadline: the primary model gets the deadline minus FALLBACK_RESERVE_S. After
+  that (or when it fails), the cheaper fallback model gets the rest. When that
+  also misses the deadline, the caller's local fallback (e.g. the template
+  draft) is returned. The script is never blocked past the deadline.
+- Metrics: every attempt and every call is recorded in a ring buffer
+  (get_llm_metrics()) with time-to-first-chunk, total duration and outcome.
+
+Abandoned requests cannot be interrupted inside the client library. Their
+worker threads stop at the next chunk and nothing they return is used.
+
+Settings (secret or environment variable):
+    LLM_DEADLINE_S       hard deadline per call in seconds (default: 30)
+    LLM_FALLBACK_MODEL   cheaper model after the primary misses its share
+                         (default: gemini-2.0-flash-lite, empty = none)
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .llm_cache import get_llm_cache
+from .llm_client import DEFAULT_MODEL, _chunk_texts, _setting, get_llm_backend, get_model
+
+DEFAULT_DEADLINE_S = 30.0
+DEFAULT_FALLBACK_MODEL = 'gemini-2.0-flash-lite'
+FALLBACK_RESERVE_S = 10.0       # bagian deadline untuk fallback model
+DEFAULT_HEDGE_DELAY_S = 4.0     # sebelum ada cukup sampel latency
+MIN_HEDGE_DELAY_S = 0.5
+HEDGE_QUANTILE = 0.9
+HEDGE_MIN_SAMPLES = 10
+HEDGE_WINDOW = 200              # sampel terakhir per model untuk p90
+DEFAULT_BUFFER_SIZE = 2000
+
+_DONE = object()
+
+
+@dataclass
+class LLMCallSample:
+    ts: float
+    backend: str
+    model: str
+    kind: str                   # 'call' atau attempt: 'primary' / 'hedge' / 'fallback_model'
+    outcome: str                # call: sumber hasil; attempt: won / lost / timeout / error / abandoned
+    first_chunk_s: Optional[float]
+    duration_s: float
+    hedged: bool = False
+    error: Optional[str] = None
+
+
+class LLMMetrics:
+    """Ring buffer of LLM call/attempt samples with latency aggregates."""
+
+    def __init__(self, maxlen=DEFAULT_BUFFER_SIZE):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def record(self, sample):
+        with self._lock:
+            self._samples.append(sample)
+
+    def samples(self, kind=None):
+        with self._lock:
+            samples = list(self._samples)
+        if kind is not None:
+            samples = [s for s in samples if s.kind == kind]
+        return samples
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def hedge_delay(self, backend, model_name):
+        """
+        Seconds to wait for a first chunk before sending the hedged request.
+
+        p90 of the primary attempts' time-to-first-chunk for this model, or
+        DEFAULT_HEDGE_DELAY_S until HEDGE_MIN_SAMPLES primaries are recorded.
+        A primary cancelled before its first chunk (the hedge won, deadline,
+        rerun) only says its latency was at least the time it ran. Those are
+        right-censored samples, and the quantile is a Kaplan-Meier estimate so
+        they are not dropped (which would bias the delay low). Hedges are
+        not counted: they start late and only finish when they are fast.
+        """
+        observations = []
+        for s in self.samples():
+            if s.kind != 'primary' or s.backend != backend or s.model != model_name or s.outcome == 'error':
+                continue
+            if s.first_chunk_s is not None:
+                observations.append((s.first_chunk_s, True))
+            elif s.duration_s is not None:
+                observations.append((s.duration_s, False))
+        observations = observations[-HEDGE_WINDOW:]
+        if len(observations) < HEDGE_MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY_S
+        return max(MIN_HEDGE_DELAY_S, _censored_quantile(observations, HEDGE_QUANTILE))
+
+    def summary(self):
+        """
+        Aggregates per backend/model/kind.
+
+        Returns:
+            list of dict: count, outcome counts, hedged calls, p50/p90/p99 of
+            the time to first chunk and p90/max of the total duration, in ms
+        """
+        groups = {}
+        for s in self.samples():
+            groups.setdefault((s.backend, s.model, s.kind), []).append(s)
+
+        rows = []
+        for (backend, model_name, kind), samples in groups.items():
+            firsts = [s.first_chunk_s for s in samples if s.first_chunk_s is not None]
+            durations = np.fromiter((s.duration_s for s in samples), dtype=float, count=len(samples))
+            p50, p90, p99 = (np.quantile(firsts, [0.5, 0.9, 0.99]) * 1000 if firsts else (None,) * 3)
+            outcomes = {}
+            for s in samples:
+                outcomes[s.outcome] = outcomes.get(s.outcome, 0) + 1
+            rows.append({
+                'backend': backend,
+                'model': model_name,
+                'kind': kind,
+                'count': len(samples),
+                'outcomes': ', '.join(f"{name} {n}" for name, n in sorted(outcomes.items())),
+                'hedged': sum(1 for s in samples if s.hedged),
+                'first_chunk_p50_ms': round(float(p50), 1) if firsts else None,
+                'first_chunk_p90_ms': round(float(p90), 1) if firsts else None,
+                'first_chunk_p99_ms': round(float(p99), 1) if firsts else None,
+                'duration_p90_ms': round(float(np.quantile(durations, 0.9)) * 1000, 1),
+                'duration_max_ms': round(float(durations.max()) * 1000, 1),
+            })
+        rows.sort(key=lambda r: (r['kind'] != 'call', r['model'], r['kind']))
+        return rows
+
+
+def _censored_quantile(observations, q):
+    """
+    Kaplan-Meier quantile of (time, observed) pairs; observed=False = at least `time`.
+
+    When censoring leaves the estimate short of q, the largest time is
+    returned (a lower bound).
+    """
+    observations = sorted(observations, key=lambda o: (o[0], not o[1]))
+    at_risk, survival = len(observations), 1.0
+    for t, observed in observations:
+        if observed:
+            survival *= 1 - 1 / at_risk
+            if 1 - survival >= q:
+                return t
+        at_risk -= 1
+    return observations[-1][0]
+
+
+_metrics = LLMMetrics()
+
+
+def get_llm_metrics():
+    """Process-wide LLM latency metrics."""
+    return _metrics
+
+
+class _Attempt:
+    """One model request streaming its chunks into the shared event queue from a worker thread."""
+
+    def __init__(self, kind, model_name, prompt, backend, events):
+        self.kind = kind
+        self.model_name = model_name
+        self.outcome = None
+        self.error = None
+        self.first_chunk_s = None
+        self.duration_s = None
+        self.cancelled = threading.Event()
+        self.started = time.perf_counter()
+        # Model dibuat di thread script (secrets/API key), request-nya di worker thread
+        model = get_model(model_name, backend)
+        threading.Thread(target=self._run, args=(model, prompt, events),
+                         name=f"llm-{kind}", daemon=True).start()
+
+    def _run(self, model, prompt, events):
+        try:
+            for text in _chunk_texts(model.generate_content(prompt, stream=True)):
+                if self.cancelled.is_set():
+                    return
+                if not text:
+                    continue
+                if self.first_chunk_s is None:
+                    self.first_chunk_s = time.perf_counter() - self.started
+                events.put((self, text))
+            events.put((self, _DONE))
+        except Exception as e:
+            events.put((self, e))
+
+    def finish(self, outcome, error=None):
+        if self.outcome is None:
+            self.outcome = outcome
+            self.error = error
+            self.duration_s = time.perf_counter() - self.started
+
+    def cancel(self, outcome):
+        self.finish(outcome)
+        self.cancelled.set()
+
+
+class HedgedStream:
+    """
+    Iterable of response text chunks with the LLMStream attributes (text,
+    model, cached, first_chunk_s, duration_s).
+
+    `source` tells where the text came from: 'cache', 'primary', 'hedge',
+    'fallback_model' or 'fallback'. When the output has to switch to another
+    source after chunks were already yielded, `restarts` is incremented and
+    `text` starts over. Consumers that render partial output should then
+    reset their state.
+    """
+
+    def __init__(self, prompt, model_name, fallback_model, fallback, deadline_s, use_cache, backend):
+        self.prompt = prompt
+        self.model = model_name
+        self.fallback_model = fallback_model if fallback_model != model_name else None
+        self.fallback = fallback
+        self.deadline_s = deadline_s
+        self.use_cache = use_cache
+        self.backend = backend
+        self.source = None
+        self.cached = False
+        self.hedged = False
+        self.restarts = 0
+        self.abandoned = False
+        self.started = time.perf_counter()
+        self.first_chunk_s = None
+        self.duration_s = None
+        self._parts = []
+        self._events = queue.Queue()
+        self._attempts = []
+
+    @property
+    def text(self):
+        return ''.join(self._parts)
+
+    def remaining_s(self):
+        """Seconds left of this call's deadline (for follow-up requests that share it)."""
+        return max(0.0, self.started + self.deadline_s - time.perf_counter())
+
+    def _emit(self, text):
+        if self.first_chunk_s is None:
+            self.first_chunk_s = time.perf_counter() - self.started
+        self._parts.append(text)
+        return text
+
+    def _switch_source(self, source):
+        if self._parts:
+            self._parts = []
+            self.restarts += 1
+        self.source = source
+
+    def _start(self, kind, model_name):
+        attempt = _Attempt(kind, model_name, self.prompt, self.backend, self._events)
+        self._attempts.append(attempt)
+        return attempt
+
+    def _cached(self, model_name):
+        if not self.use_cache:
+            return None
+        return get_llm_cache().get(f"{self.backend}:{model_name}", self.prompt)
+
+    def _store(self, model_name, text):
+        try:
+            get_llm_cache().put(f"{self.backend}:{model_name}", self.prompt, text)
+        except OSError:
+            # Cache tidak bisa ditulis (disk penuh / read-only): tetap kembalikan hasilnya
+            pass
+
+    def _race(self, kinds, model_name, until, hedge_at=None):
+        """
+        Stream one model until `until`, sending the hedge at `hedge_at`.
+
+        Yields chunks of the winning attempt; returns True when a response was
+        completed, False when every attempt failed or the time ran out.
+        """
+        racing = [self._start(kinds[0], model_name)]
+        winner = None
+        while True:
+            now = time.perf_counter()
+            if now >= until:
+                for attempt in racing:
+                    attempt.cancel('timeout')
+                return False
+            if hedge_at is not None and winner is None and now >= hedge_at:
+                # Satu duplikat request; yang lebih dulu menghasilkan chunk yang dipakai
+                racing.append(self._start(kinds[1], model_name))
+                self.hedged = True
+                hedge_at = None
+            wait = min(until, hedge_at) if hedge_at is not None else until
+            try:
+                attempt, item = self._events.get(timeout=max(0.0, wait - now))
+            except queue.Empty:
+                continue
+            if attempt not in racing or attempt.cancelled.is_set():
+                continue
+
+            if isinstance(item, Exception) or (item is _DONE and attempt is not winner):
+                # Error, atau respons kosong dari attempt yang belum menang
+                attempt.finish('error', str(item) if isinstance(item, Exception) else 'empty response')
+                racing.remove(attempt)
+                if attempt is winner or not racing:
+                    if attempt is not winner and hedge_at is not None:
+                        # Primary gagal sebelum hedge: kirim hedge sekarang sebagai retry
+                        hedge_at = time.perf_counter()
+                        continue
+                    return False
+                continue
+
+            if item is _DONE:
+                attempt.finish('won')
+                self._store(model_name, self.text)
+                return True
+
+            if winner is None:
+                winner = attempt
+                for other in racing:
+                    if other is not winner:
+                        other.cancel('lost')
+                racing = [winner]
+                hedge_at = None
+                self._switch_source(winner.kind)
+            yield self._emit(item)
+
+    def __iter__(self):
+        deadline = self.started + self.deadline_s
+        try:
+            cached = self._cached(self.model)
+            if cached is not None:
+                self.cached = True
+                self.source = 'cache'
+                yield self._emit(cached)
+                return
+
+            # Primary model mendapat deadline dikurangi jatah fallback model
+            reserve = min(FALLBACK_RESERVE_S, self.deadline_s / 2) if self.fallback_model else 0.0
+            hedge_at = self.started + _metrics.hedge_delay(self.backend, self.model)
+            if (yield from self._race(('primary', 'hedge'), self.model, deadline - reserve, hedge_at)):
+                return
+
+            if self.fallback_model and time.perf_counter() < deadline:
+                cached = self._cached(self.fallback_model)
+                if cached is not None:
+                    self._switch_source('fallback_model')
+                    self.model = self.fallback_model
+                    self.cached = True
+                    yield self._emit(cached)
+                    return
+                if (yield from self._race(('fallback_model',), self.fallback_model, deadline)):
+                    self.model = self.fallback_model
+                    return
+
+            errors = [a.error for a in self._attempts if a.error]
+            if self.fallback is None:
+                if errors and time.perf_counter() < deadline:
+                    raise RuntimeError(f"LLM call failed: {errors[-1]}")
+                raise TimeoutError(f"LLM call exceeded the {self.deadline_s:g} s deadline")
+            self._switch_source('fallback')
+            yield self._emit(self.fallback())
+        except GeneratorExit:
+            # Iterasi ditinggalkan (rerun Streamlit)
+            self.abandoned = True
+            raise
+        finally:
+            # Hentikan attempt yang masih berjalan
+            for attempt in self._attempts:
+                attempt.cancel('abandoned' if self.abandoned else 'lost')
+            self.duration_s = time.perf_counter() - self.started
+            self._record()
+
+    def _record(self):
+        now = time.time()
+        for attempt in self._attempts:
+            _metrics.record(LLMCallSample(
+                now, self.backend, attempt.model_name, attempt.kind, attempt.outcome or 'abandoned',
+                attempt.first_chunk_s, attempt.duration_s, error=attempt.error))
+        _metrics.record(LLMCallSample(
+            now, self.backend, self.model, 'call', 'abandoned' if self.abandoned else self.source or 'error',
+            self.first_chunk_s, self.duration_s, hedged=self.hedged))
+
+
+def get_deadline_s():
+    """Configured hard deadline per LLM call (LLM_DEADLINE_S, seconds)."""
+    return float(_setting("LLM_DEADLINE_S", str(DEFAULT_DEADLINE_S)) or DEFAULT_DEADLINE_S)
+
+
+def get_fallback_model():
+    """Configured fallback model (LLM_FALLBACK_MODEL), or None when disabled."""
+    return _setting("LLM_FALLBACK_MODEL", DEFAULT_FALLBACK_MODEL) or None
+
+
+def hedged_stream_text(prompt, model_name=DEFAULT_MODEL, use_cache=True, backend=None,
+                       fallback=None, deadline_s=None, fallback_model=None):
+    """
+    Deadline-bound, hedged variant of stream_text().
+
+    Args:
+        prompt (str): Full prompt text
+        model_name (str): Primary model
+        use_cache (bool): Serve from / check the response cache first
+        backend (str, optional): Override of the configured backend
+        fallback (callable, optional): Returns the response text to use when no
+            model answered in time (e.g. the template draft as JSON). Without it
+            a TimeoutError (or RuntimeError for failed calls) is raised.
+        deadline_s (float, optional): Override of LLM_DEADLINE_S
+        fallback_model (str, optional): Override of LLM_FALLBACK_MODEL
+
+    Returns:
+        HedgedStream
+    """
+    return HedgedStream(
+        prompt, model_name,
+        fallback_model=fallback_model or get_fallback_model(),
+        fallback=fallback,
+        deadline_s=deadline_s or get_deadline_s(),
+        use_cache=use_cache,
+        backend=backend or get_llm_backend(),
+    )
@@ -1,8 +1,21 @@
 # core/matching.py
 
+import threading
+import time
+from collections import deque
+
 import pandas as pd
 from sqlalchemy import text
 
+from .db import get_data_version, lane_connection
+from .dimensions import DIMENSION_TABLES, get_dimension_registry
+from .fit_matrix import get_fit_matrix
+from .precomputed import MATCHING_TABLES, load_precomputed_ranking, ranking_key_for
+from .query_cancel import session_cancellable
+from .query_metrics import query_tags
+from .singleflight import SingleFlight
+from .swr_cache import get_swr_cache
+
 # Template SQL Engine Toggle-Ready
 SQL_TEMPLATE = """
 -- ===================================================================================
@@ -319,22 +332,18 @@ final_results AS (
     SELECT
         e.employee_id,
         e.fullname,
-        pos.name AS position_name,
-        dep.name AS department_name,
-        div.name AS division_name,
-        g.name   AS grade_name,
-        dir.name AS directorate_name,
+        -- Nama dimensi ditempel di Python dari DimensionRegistry (core/dimensions.py)
+        e.position_id,
+        e.department_id,
+        e.division_id,
+        e.grade_id,
+        e.directorate_id,
         ROUND(e.years_of_service_months / 12.0, 1) AS experience_years,
         fm.final_match_rate,
         ROUND(dc.completeness_pct, 1) AS data_completeness_pct
     FROM final_match fm
     JOIN public.employees e USING(employee_id)
     LEFT JOIN data_completeness dc ON e.employee_id = dc.employee_id
-    LEFT JOIN public.dim_positions   pos ON e.position_id   = pos.position_id
-    LEFT JOIN public.dim_departments dep ON e.department_id = dep.department_id
-    LEFT JOIN public.dim_divisions   div ON e.division_id   = div.division_id
-    LEFT JOIN public.dim_grades      g   ON e.grade_id      = g.grade_id
-    LEFT JOIN public.dim_directorates dir ON e.directorate_id = dir.directorate_id
 )
 
 -- ===================================================================================
@@ -359,33 +368,24 @@ LIMIT 200;
 def get_match_for_single_person(engine, employee_id, limit=200):
     """
     Skenario 1: Menghitung kecocokan satu karyawan terhadap benchmark dari SEMUA posisi.
-    """
-    # Ambil semua posisi yang ada untuk dijadikan benchmark
-    with engine.connect() as conn:
-        positions_df = pd.read_sql("SELECT position_id, name FROM dim_positions", conn)
 
-    all_results = []
-
-    # Lakukan iterasi untuk setiap posisi sebagai benchmark
-    for _, pos_row in positions_df.iterrows():
-        # Untuk setiap posisi, jalankan query matching standar.
-        # Kita hanya tertarik pada skor dari karyawan yang kita cari (manual_ids_to_filter).
-        df = run_standard_match_query(
-            engine,
-            target_position_id_for_benchmark=pos_row['position_id'],
-            manual_ids_to_filter=[employee_id] # Filter hasil untuk menampilkan karyawan ini saja
-        )
-        if not df.empty:
-            # Tambahkan kolom untuk menandai benchmark posisi mana yang digunakan
-            df['benchmark_position'] = pos_row['name']
-            all_results.append(df)
-
-    if not all_results:
+    Skor diambil dari fit matrix (core/fit_matrix.py) yang sudah menghitung setiap
+    karyawan terhadap benchmark HP setiap posisi; di sini hanya lookup forward index.
+    """
+    fit = get_fit_matrix(engine)
+    top = fit.top_positions(employee_id, k=limit)
+    if top.empty:
         return pd.DataFrame()
 
-    # Gabungkan semua hasil dan urutkan berdasarkan skor tertinggi
-    final_df = pd.concat(all_results, ignore_index=True)
-    return final_df.sort_values('final_match_rate', ascending=False).head(limit)
+    # Satu baris per posisi benchmark, atribut karyawan sama seperti final_results di SQL
+    employee = fit.employees[fit.employees['employee_id'] == employee_id]
+    df = employee.loc[employee.index.repeat(len(top))].reset_index(drop=True)
+    df.insert(df.columns.get_loc('data_completeness_pct'), 'final_match_rate', top['final_match_rate'].values)
+
+    registry = get_dimension_registry(engine)
+    position_names = registry.frame('positions').set_index('position_id')['name']
+    df['benchmark_position'] = top['position_id'].map(position_names).values
+    return registry.attach_names(df)
 
 
 # ===================================================================================
@@ -398,10 +398,11 @@ def get_match_for_single_person(engine, employee_id, limit=200):
 def run_standard_match_query(engine, manual_ids_for_benchmark=None, target_position_id_for_benchmark=None,
                              filters=None, search_name=None,
                              rating_range=(1, 5), limit=200, manual_ids_to_filter=None,
-                             use_manual_as_benchmark=False, min_rating=5):
+                             use_manual_as_benchmark=False, min_rating=5, with_names=True):
     """
     Skenario 2 & 3: Menjalankan pipeline SQL Talent Matching standar untuk mencari banyak orang.
     Sekarang dengan dukungan toggle untuk menentukan apakah manual_ids digunakan sebagai benchmark.
+    with_names=False mengembalikan kolom ID dimensi apa adanya (untuk disimpan, lihat core/precomputed.py).
     """
     # --- Bagian 1: Menyiapkan Parameter dari Python untuk dikirim ke SQL ---
 
@@ -435,9 +436,14 @@ def run_standard_match_query(engine, manual_ids_for_benchmark=None, target_posit
     )
 
     # --- Bagian 3: Eksekusi Query dan Mengembalikan Hasil ---
-    with engine.connect() as conn:
+    # Lane 'heavy': dibatasi konkurensinya agar lookup interaktif tetap dapat koneksi
+    with lane_connection(engine, 'heavy') as conn:
         df = pd.read_sql(text(sql), conn)
 
+    # Query hanya mengembalikan ID dimensi; nama ditempel dari registry
+    if with_names:
+        df = get_dimension_registry(engine).attach_names(df)
+
     # Jika manual_ids_to_filter digunakan (untuk Mode A - rekomendasi posisi), filter hasilnya
     if manual_ids_to_filter:
         df = df[df['employee_id'].isin(manual_ids_to_filter)]
@@ -445,6 +451,34 @@ def run_standard_match_query(engine, manual_ids_for_benchmark=None, target_posit
     return df
 
 
+# ===================================================================================
+# DEFAULT RANKING: satu hasil untuk semua user
+# ===================================================================================
+# Default Mode tidak punya input dari user, jadi hasilnya sama untuk semua sesi
+# sampai data berubah. Disimpan per proses (stale-while-revalidate) dan diperbarui
+# di background saat versi tabel matching berubah; warm-up mengisinya saat start.
+# Sumber pertama adalah tabel precomputed_rankings (core/precomputed.py).
+# ===================================================================================
+def _stored_or_live_ranking(engine, ranking_key, filters=None):
+    """Ranking dari precomputed_rankings bila versinya cocok, selain itu scoring live."""
+    df = load_precomputed_ranking(engine, ranking_key)
+    if df is not None:
+        return df
+    return run_standard_match_query(engine, filters=filters, use_manual_as_benchmark=False)
+
+
+def get_default_ranking(engine):
+    """Default Mode ranking (HP rating = 5 benchmark), shared by every session."""
+    tables = MATCHING_TABLES + [t[0] for t in DIMENSION_TABLES.values()]
+    cache = get_swr_cache(
+        f"default_ranking@{id(engine):x}",
+        lambda: _stored_or_live_ranking(engine, 'default'),
+        version_probe=lambda: get_data_version(engine, tables),
+        probe_interval=60,
+    )
+    return cache.get()
+
+
 import math
 
 def is_missing(value):
@@ -456,7 +490,7 @@ def validate_employee_data(employee_id, engine):
     Return dict:
     { "ok": True/False, "missing": [...], "detail": "..." }
     """
-    with engine.connect() as conn:
+    with lane_connection(engine, 'interactive') as conn:
         # Cek data karyawan
         emp_query = """
         SELECT
@@ -558,16 +592,97 @@ def validate_employee_data(employee_id, engine):
 # ===================================================================================
 # FUNGSI WRAPPER: execute_matching
 # ===================================================================================
-# Tujuan: Menangani logika mode operasi berdasarkan parameter toggle-ready
+# Tujuan: Menangani logika mode operasi berdasarkan parameter toggle-ready.
+#         Panggilan bersamaan dengan parameter (ternormalisasi) yang sama berbagi
+#         satu komputasi yang sedang berjalan (single-flight).
 # ===================================================================================
-def execute_matching(engine, manual_ids, filters, use_manual_as_benchmark):
+_matching_flight = SingleFlight("execute_matching")
+
+# Riwayat run terakhir (durasi + parameter) untuk halaman Performance
+_recent_runs = deque(maxlen=200)
+_recent_runs_lock = threading.Lock()
+
+
+def normalize_matching_params(manual_ids, filters, use_manual_as_benchmark):
+    """
+    Bentuk key yang stabil untuk satu permintaan matching.
+
+    Dua permintaan dengan key sama pasti menghasilkan ranking yang sama,
+    sehingga aman untuk dibagi (urutan manual_ids / tipe angka filter diabaikan).
+    """
+    if manual_ids and not isinstance(manual_ids, (list, tuple)):
+        manual_ids = [manual_ids]
+    if manual_ids:
+        if use_manual_as_benchmark:
+            return ('A-benchmark', tuple(sorted({str(eid).strip() for eid in manual_ids})))
+        # Mode A Recommendation hanya memakai employee pertama
+        return ('A-recommendation', str(manual_ids[0]).strip())
+    if filters and any(filters.values()):
+        return ('B', tuple(sorted((k, int(v)) for k, v in filters.items() if v)))
+    return ('default',)
+
+
+def get_matching_flight_stats():
+    """Metrik single-flight per key: calls, executions, saved."""
+    return _matching_flight.stats()
+
+
+def get_matching_in_flight():
+    """Key matching yang sedang berjalan -> jumlah pemanggil tambahan yang menunggu."""
+    return _matching_flight.in_flight()
+
+
+def get_recent_matching_runs(n=None, slowest=False):
+    """
+    Run execute_matching terakhir: started_at, params, duration_s, rows, shared, error.
+
+    Args:
+        n (int, optional): Batasi jumlah run yang dikembalikan
+        slowest (bool): Urutkan dari yang paling lambat (default: terbaru dulu)
+    """
+    with _recent_runs_lock:
+        runs = list(_recent_runs)
+    runs.reverse()
+    if slowest:
+        runs.sort(key=lambda r: r['duration_s'], reverse=True)
+    return runs[:n] if n else runs
+
+
+def execute_matching(engine, manual_ids, filters, use_manual_as_benchmark, cancel_key=None):
     """
     Wrapper untuk menentukan mode operasi:
     - Mode A Benchmark (manual_ids + toggle ON): run_standard_match_query(...manual benchmark...)
     - Mode A Recommendation (manual_ids + toggle OFF): get_match_for_single_person()
     - Mode B Benchmark (manual kosong + filter aktif): run_standard_match_query(filters=filters)
     - Default Mode (tidak ada input): run_standard_match_query()
+
+    Permintaan identik yang berjalan bersamaan hanya dieksekusi sekali.
+    Query milik sesi Streamlit (atau cancel_key) dibatalkan di server begitu
+    run-nya digantikan oleh rerun, kecuali masih ada pemanggil lain yang menunggu.
     """
+    key = normalize_matching_params(manual_ids, filters, use_manual_as_benchmark)
+    run = {'started_at': time.time(), 'mode': key[0], 'params': repr(key[1:]),
+           'duration_s': None, 'rows': None, 'shared': False, 'error': None}
+    started = time.perf_counter()
+    try:
+        with session_cancellable(engine, ('execute_matching',) + key, cancel_key), query_tags(mode=key[0]):
+            df, run['shared'] = _matching_flight.do(
+                key,
+                lambda: _execute_matching_uncoalesced(engine, manual_ids, filters, use_manual_as_benchmark)
+            )
+        run['rows'] = len(df)
+    except Exception as e:
+        run['error'] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        run['duration_s'] = round(time.perf_counter() - started, 3)
+        with _recent_runs_lock:
+            _recent_runs.append(run)
+    # Setiap pemanggil mendapat salinan sendiri (hasil bisa dimodifikasi di UI)
+    return df.copy()
+
+
+def _execute_matching_uncoalesced(engine, manual_ids, filters, use_manual_as_benchmark):
     if manual_ids:
         if use_manual_as_benchmark:
             # Mode A Benchmark: Gunakan manual_ids sebagai benchmark
@@ -585,6 +700,10 @@ def execute_matching(engine, manual_ids, filters, use_manual_as_benchmark):
                 employee_id = manual_ids
             return get_match_for_single_person(engine, employee_id)
     elif filters and any(filters.values()):
+        # Mode B dengan satu filter: ranking sudah diprecompute setelah data load
+        ranking_key = ranking_key_for(normalize_matching_params(manual_ids, filters, use_manual_as_benchmark))
+        if ranking_key is not None:
+            return _stored_or_live_ranking(engine, ranking_key, filters)
         # Mode B Benchmark: Gunakan filter untuk membentuk benchmark
         return run_standard_match_query(
             engine,
@@ -592,8 +711,5 @@ def execute_matching(engine, manual_ids, filters, use_manual_as_benchmark):
             use_manual_as_benchmark=False
         )
     else:
-        # Default Mode: Gunakan benchmark default (HP rating fixed = 5)
-        return run_standard_match_query(
-            engine,
-            use_manual_as_benchmark=False
-        )
+        # Default Mode: Gunakan benchmark default (HP rating fixed = 5), dari cache bersama
+        return get_default_ranking(engine)
@@ -5,7 +5,7 @@
 # Tujuan: Mendapatkan breakdown detail TV-level dan TGV-level untuk satu employee
 #         Digunakan untuk visualisasi gap analysis di dashboard
 # ===================================================================================
-def get_detailed_match_breakdown(engine, employee_id, benchmark_ids=None):
+def get_detailed_match_breakdown(engine, employee_id, benchmark_ids=None, cancel_key=None):
     """
     Dapatkan detailed breakdown match rate untuk satu employee terhadap benchmark.
     
@@ -21,10 +21,21 @@ def get_detailed_match_breakdown(engine, employee_id, benchmark_ids=None):
             - 'tgv_summary': DataFrame [tgv_name, tgv_match_rate, tgv_weight]
             - 'final_score': float - final match rate (0-100)
             - 'employee_info': dict - basic employee information
+
+    Query dibatalkan di server bila run Streamlit pemanggil digantikan (rerun).
     """
-    
+    from core.query_cancel import session_cancellable
+
+    job_key = ('breakdown', str(employee_id), tuple(sorted(str(b) for b in benchmark_ids or [])))
+    with session_cancellable(engine, job_key, cancel_key):
+        return _get_detailed_match_breakdown(engine, employee_id, benchmark_ids)
+
+
+def _get_detailed_match_breakdown(engine, employee_id, benchmark_ids):
     import pandas as pd
     from sqlalchemy import text
+    from core.db import lane_connection
+    from core.dimensions import get_dimension_registry
     
     # Input validation
     if not employee_id or not isinstance(employee_id, str) or employee_id.strip() == '':
@@ -315,7 +326,8 @@ def get_detailed_match_breakdown(engine, employee_id, benchmark_ids=None):
     """
     
     # Execute query
-    with engine.connect() as conn:
+    # Lane 'heavy': CTE scoring penuh terhadap benchmark, sama seperti jalur matching lainnya
+    with lane_connection(engine, 'heavy') as conn:
         df_result = pd.read_sql(text(breakdown_sql), conn)
     
     # Separate results
@@ -330,28 +342,27 @@ def get_detailed_match_breakdown(engine, employee_id, benchmark_ids=None):
     final_row = df_result[df_result['result_type'] == 'FINAL_SCORE']
     final_score = final_row['final_match_rate'].iloc[0] if not final_row.empty else 0.0
     
-    # Get employee info
-    with engine.connect() as conn:
+    # Get employee info (dimension names come from the shared registry); lookup PK, tetap lane 'interactive'
+    with lane_connection(engine, 'interactive') as conn:
         emp_query = """
         SELECT 
             e.employee_id,
             e.fullname,
-            pos.name AS position_name,
-            dept.name AS department_name,
-            g.name AS grade_name
+            e.position_id,
+            e.department_id,
+            e.grade_id
         FROM employees e
-        LEFT JOIN dim_positions pos ON e.position_id = pos.position_id
-        LEFT JOIN dim_departments dept ON e.department_id = dept.department_id  
-        LEFT JOIN dim_grades g ON e.grade_id = g.grade_id
         WHERE e.employee_id = %s
         """
         emp_info = pd.read_sql(emp_query, conn, params=(employee_id,))
-        employee_info = emp_info.to_dict('records')[0] if not emp_info.empty else {}
+    emp_info = get_dimension_registry(engine).attach_names(emp_info)
+    employee_info = emp_info.to_dict('records')[0] if not emp_info.empty else {}
     
     # Get benchmark count
     benchmark_n = len(benchmark_ids) if benchmark_ids else 0
     if benchmark_n == 0:
-        with engine.connect() as conn:
+        # Agregasi atas performance_yearly: lane 'heavy'
+        with lane_connection(engine, 'heavy') as conn:
             benchmark_n = pd.read_sql("SELECT COUNT(DISTINCT employee_id) FROM performance_yearly WHERE rating = 5 AND year = (SELECT MAX(year) FROM performance_yearly)", conn).iloc[0, 0]
     
     return {
@@ -0,0 +1,274 @@
+# core/partial_json.py
+"""
+Incremental parser for partial JSON documents.
+
+A streamed model response is a JSON document that arrives a few characters at
+a time. parse_partial() turns any prefix of such a document into the value it
+describes so far: open strings, arrays and objects are closed, while object
+keys without a value and unfinished numbers/literals are dropped. A leading
+```json fence is skipped, and anything after the complete document (such as a
+closing fence) is ignored.
+
+PartialResult.open_path is the path (keys / list indices) of the innermost
+value that was still being written when the text ended, so callers can tell
+a cut-off value from values that arrived whole.
+
+IncrementalJSONParser.feed() does the same for a growing buffer. Top-level
+object members are only parsed once: after a member is complete, later feeds
+resume right after it, so each chunk only costs the section being written.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_LITERALS = {'true': True, 'false': False, 'null': None}
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_WHITESPACE = ' \t\r\n'
+_NUMBER_CHARS = set('0123456789+-.eE')
+_MISSING = object()
+
+
+class PartialJSONError(ValueError):
+    """The text cannot be the prefix of a JSON document."""
+
+
+@dataclass
+class PartialResult:
+    value: object = None
+    complete: bool = False
+    # Top-level keys whose value is fully received (hanya untuk dokumen objek)
+    complete_keys: set = field(default_factory=set)
+    # Path ke nilai terdalam yang masih terpotong (() = dokumen itu sendiri / dokumen lengkap)
+    open_path: tuple = ()
+
+
+def _skip_ws(text, i):
+    while i < len(text) and text[i] in _WHITESPACE:
+        i += 1
+    return i
+
+
+def _document_start(text):
+    # Lewati ```json / ``` di awal respons model
+    i = _skip_ws(text, 0)
+    if '```'.startswith(text[i:i + 3]) and i + 3 > len(text):
+        return len(text)
+    if text.startswith('```', i):
+        newline = text.find('\n', i)
+        if newline < 0:
+            return len(text)
+        i = newline + 1
+    return _skip_ws(text, i)
+
+
+def _parse_string(text, i):
+    # text[i] == '"'; returns (value, next index, complete)
+    chunks = []
+    i += 1
+    start = i
+    while i < len(text):
+        ch = text[i]
+        if ch == '"':
+            chunks.append(text[start:i])
+            return ''.join(chunks), i + 1, True
+        if ch == '\\':
+            chunks.append(text[start:i])
+            if i + 1 >= len(text):
+                return ''.join(chunks), len(text), False
+            esc = text[i + 1]
+            if esc == 'u':
+                digits = text[i + 2:i + 6]
+                if len(digits) < 4:
+                    return ''.join(chunks), len(text), False
+                try:
+                    chunks.append(chr(int(digits, 16)))
+                except ValueError:
+                    raise PartialJSONError(f"Invalid \\u escape at {i}")
+                i += 6
+            elif esc in _ESCAPES:
+                chunks.append(_ESCAPES[esc])
+                i += 2
+            else:
+                raise PartialJSONError(f"Invalid escape at {i}")
+            start = i
+            continue
+        i += 1
+    chunks.append(text[start:])
+    return ''.join(chunks), len(text), False
+
+
+def _parse_value(text, i, trail=None):
+    """
+    Returns (value, next index, complete); value is _MISSING when nothing usable was read.
+
+    When the value is incomplete, the path to its innermost incomplete part is
+    appended to `trail` innermost first (keys / indices).
+    """
+    i = _skip_ws(text, i)
+    if i >= len(text):
+        return _MISSING, i, False
+    ch = text[i]
+    if ch == '{':
+        return _parse_object(text, i, trail)
+    if ch == '[':
+        return _parse_array(text, i, trail)
+    if ch == '"':
+        return _parse_string(text, i)
+    for literal, value in _LITERALS.items():
+        if text.startswith(literal, i):
+            return value, i + len(literal), True
+        if literal.startswith(text[i:i + len(literal)]) and i + len(literal) > len(text):
+            return _MISSING, len(text), False
+    end = i
+    while end < len(text) and text[end] in _NUMBER_CHARS:
+        end += 1
+    if end > i:
+        if end >= len(text):
+            # Angka di ujung buffer mungkin masih berlanjut (12 -> 12.5)
+            return _MISSING, len(text), False
+        number = text[i:end]
+        if not _NUMBER.fullmatch(number):
+            raise PartialJSONError(f"Invalid number {number!r} at {i}")
+        return (float(number) if any(c in number for c in '.eE') else int(number)), end, True
+    raise PartialJSONError(f"Unexpected character {ch!r} at {i}")
+
+
+def _parse_members(text, i, obj, complete_keys=None, trail=None):
+    """
+    Parse `"key": value` members into obj from index i (inside an object).
+
+    Returns (next index, complete, resume) where resume is the index right after
+    the last complete member, from which parsing can restart later.
+    """
+    resume = i
+    while True:
+        i = _skip_ws(text, i)
+        if i >= len(text):
+            return i, False, resume
+        if text[i] == '}':
+            return i + 1, True, resume
+        if text[i] == ',':
+            i = _skip_ws(text, i + 1)
+            if i >= len(text):
+                return i, False, resume
+        if text[i] != '"':
+            raise PartialJSONError(f"Expected object key at {i}")
+        key, i, key_complete = _parse_string(text, i)
+        if not key_complete:
+            return i, False, resume
+        i = _skip_ws(text, i)
+        if i >= len(text):
+            return i, False, resume
+        if text[i] != ':':
+            raise PartialJSONError(f"Expected ':' at {i}")
+        value, i, value_complete = _parse_value(text, i + 1, trail)
+        if value is not _MISSING:
+            obj[key] = value
+        if not value_complete:
+            if trail is not None and value is not _MISSING:
+                trail.append(key)
+            return i, False, resume
+        if complete_keys is not None:
+            complete_keys.add(key)
+        resume = i
+        i = _skip_ws(text, i)
+        if i < len(text) and text[i] not in ',}':
+            raise PartialJSONError(f"Expected ',' or '}}' at {i}")
+
+
+def _parse_object(text, i, trail=None):
+    obj = {}
+    i, complete, _ = _parse_members(text, i + 1, obj, trail=trail)
+    return obj, i, complete
+
+
+def _parse_array(text, i, trail=None):
+    items = []
+    i += 1
+    while True:
+        i = _skip_ws(text, i)
+        if i >= len(text):
+            return items, i, False
+        if text[i] == ']':
+            return items, i + 1, True
+        if text[i] == ',':
+            i += 1
+            continue
+        value, i, complete = _parse_value(text, i, trail)
+        if value is not _MISSING:
+            items.append(value)
+        if not complete:
+            if trail is not None and value is not _MISSING:
+                trail.append(len(items) - 1)
+            return items, i, False
+
+
+def parse_partial(text):
+    """
+    Value described so far by a (possibly truncated) JSON document.
+
+    Returns:
+        PartialResult: value (None when nothing parseable yet), complete flag,
+        and the complete top-level keys when the document is an object
+
+    Raises:
+        PartialJSONError: If the text is not a prefix of valid JSON
+    """
+    parser = IncrementalJSONParser()
+    return parser.feed(text)
+
+
+class IncrementalJSONParser:
+    """Parses a growing JSON buffer; feed() returns the current PartialResult."""
+
+    def __init__(self):
+        self.buffer = ''
+        self._start = None        # indeks awal dokumen (setelah fence)
+        self._resume = None       # indeks setelah member top-level terakhir yang lengkap
+        self._members = {}        # member top-level yang sudah lengkap
+        self._complete_keys = set()
+        self._result = PartialResult()
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        if self._result.complete:
+            return self._result
+
+        text = self.buffer
+        if self._start is None:
+            start = _document_start(text)
+            if start >= len(text):
+                return self._result
+            self._start = start
+
+        if text[self._start] != '{':
+            # Bukan objek: parse ulang seluruh dokumen (array / skalar)
+            trail = []
+            value, _, complete = _parse_value(text, self._start, trail)
+            self._result = PartialResult(None if value is _MISSING else value, complete,
+                                         open_path=tuple(reversed(trail)))
+            return self._result
+
+        if self._resume is None:
+            self._resume = self._start + 1
+        members = dict(self._members)
+        complete_keys = set(self._complete_keys)
+        trail = []
+        _, complete, resume = _parse_members(text, self._resume, members, complete_keys, trail)
+
+        # Simpan hanya member yang lengkap; member yang sedang ditulis diparse ulang di feed berikutnya
+        if resume != self._resume:
+            self._members = {k: members[k] for k in complete_keys}
+            self._complete_keys = complete_keys
+            self._resume = resume
+        self._result = PartialResult(members, complete, complete_keys, tuple(reversed(trail)))
+        return self._result
+
+    @property
+    def value(self):
+        return self._result.value
+
+    @property
+    def complete(self):
+        return self._result.complete
@@ -0,0 +1,176 @@
+# core/precomputed.py
+"""
+Precomputed matching rankings.
+
+The Default Mode ranking and the Mode B ranking for every single-dimension
+filter value (each position, department, division and grade) only change
+when the underlying data changes. refresh_precomputed_rankings() computes
+them once after a data load and stores them in `precomputed_rankings`
+together with the data version they were computed from. execute_matching
+then serves them with one primary-key read, and falls back to live scoring
+whenever the stored version does not match the current data.
+
+Rankings are stored with dimension IDs; names are attached on read so a
+renamed position or department never needs a refresh.
+"""
+
+import json
+import time
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from .db import get_data_version, lane_connection
+from .dimensions import get_dimension_registry
+
+# Tabel yang menentukan hasil matching (versi data dihitung dari tabel-tabel ini)
+MATCHING_TABLES = [
+    'employees', 'performance_yearly', 'competencies_yearly', 'profiles_psych',
+    'papi_scores', 'talent_variables_mapping', 'talent_group_weights',
+]
+
+# Filter Mode B yang diprecompute (satu dimensi per ranking)
+PRECOMPUTED_FILTER_COLUMNS = ['position_id', 'department_id', 'division_id', 'grade_id']
+
+PRECOMPUTED_RANKINGS_DDL = """
+CREATE TABLE IF NOT EXISTS public.precomputed_rankings (
+    ranking_key   TEXT PRIMARY KEY,
+    data_version  TEXT NOT NULL,
+    row_count     INTEGER NOT NULL,
+    payload       JSONB NOT NULL,
+    computed_at   TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+
+def get_matching_data_version(engine):
+    """Change token of every table the matching result depends on."""
+    return get_data_version(engine, MATCHING_TABLES)
+
+
+def ranking_key_for(params_key):
+    """
+    Storage key for a normalized matching request (see normalize_matching_params).
+
+    Returns 'default', '<column>=<id>' for a single Mode B filter, or None when
+    the request is ad hoc and must be scored live.
+    """
+    if params_key == ('default',):
+        return 'default'
+    if params_key[0] == 'B' and len(params_key[1]) == 1:
+        column, value = params_key[1][0]
+        if column in PRECOMPUTED_FILTER_COLUMNS:
+            return f"{column}={int(value)}"
+    return None
+
+
+def load_precomputed_ranking(engine, ranking_key, data_version=None):
+    """
+    Read one stored ranking, with dimension names attached.
+
+    Args:
+        engine: SQLAlchemy engine
+        ranking_key (str): Key from ranking_key_for()
+        data_version (str, optional): Current data version; probed when omitted
+
+    Returns:
+        DataFrame, or None when the ranking is missing or was computed from
+        different data (the caller then scores live)
+    """
+    if data_version is None:
+        data_version = get_matching_data_version(engine)
+    try:
+        with lane_connection(engine, 'interactive') as conn:
+            payload = conn.execute(text("""
+                SELECT payload
+                FROM public.precomputed_rankings
+                WHERE ranking_key = :ranking_key
+                  AND data_version = :data_version
+            """), {"ranking_key": ranking_key, "data_version": data_version}).scalar()
+    except ProgrammingError:
+        # Tabel belum dibuat (refresh job belum pernah dijalankan)
+        return None
+    if payload is None:
+        return None
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    df = pd.DataFrame(payload['data'], columns=payload['columns'])
+    return get_dimension_registry(engine).attach_names(df)
+
+
+def _store(conn, ranking_key, data_version, df):
+    payload = df.to_json(orient='split', index=False)
+    conn.execute(text("""
+        INSERT INTO public.precomputed_rankings (ranking_key, data_version, row_count, payload, computed_at)
+        VALUES (:ranking_key, :data_version, :row_count, CAST(:payload AS JSONB), now())
+        ON CONFLICT (ranking_key) DO UPDATE
+        SET data_version = EXCLUDED.data_version,
+            row_count    = EXCLUDED.row_count,
+            payload      = EXCLUDED.payload,
+            computed_at  = EXCLUDED.computed_at
+    """), {"ranking_key": ranking_key, "data_version": data_version,
+           "row_count": len(df), "payload": payload})
+
+
+def refresh_precomputed_rankings(engine, filter_columns=PRECOMPUTED_FILTER_COLUMNS, progress=None):
+    """
+    Recompute and store the default ranking and every single-filter Mode B ranking.
+
+    Run after each data load (scripts/refresh_precomputed_rankings.py). Rankings
+    are tagged with the data version probed *before* scoring, so data that
+    changes during the refresh simply makes the stored rows stale.
+
+    Args:
+        engine: SQLAlchemy engine
+        filter_columns (list): Employee ID columns to precompute Mode B rankings for
+        progress (callable, optional): progress(done, total, ranking_key, seconds)
+
+    Returns:
+        dict: data_version, rankings (count), removed (stale keys), duration_s
+    """
+    # Import di sini: core.matching mengimpor modul ini
+    from .matching import run_standard_match_query
+
+    started = time.perf_counter()
+    with lane_connection(engine, 'interactive') as conn:
+        conn.execute(text(PRECOMPUTED_RANKINGS_DDL))
+        filter_values = {
+            column: conn.execute(text(
+                f"SELECT DISTINCT {column} FROM public.employees WHERE {column} IS NOT NULL ORDER BY 1"
+            )).scalars().all()
+            for column in filter_columns
+        }
+        conn.commit()
+
+    data_version = get_matching_data_version(engine)
+    jobs = [('default', {})] + [
+        (f"{column}={int(value)}", {column: int(value)})
+        for column, values in filter_values.items()
+        for value in values
+    ]
+
+    for done, (ranking_key, filters) in enumerate(jobs, start=1):
+        job_started = time.perf_counter()
+        df = run_standard_match_query(engine, filters=filters or None,
+                                      use_manual_as_benchmark=False, with_names=False)
+        with lane_connection(engine, 'interactive') as conn:
+            _store(conn, ranking_key, data_version, df)
+            conn.commit()
+        if progress:
+            progress(done, len(jobs), ranking_key, time.perf_counter() - job_started)
+
+    # Ranking untuk nilai filter yang sudah tidak ada lagi dibuang
+    with lane_connection(engine, 'interactive') as conn:
+        removed = conn.execute(text("""
+            DELETE FROM public.precomputed_rankings
+            WHERE NOT (ranking_key = ANY(:keys))
+        """), {"keys": [key for key, _ in jobs]}).rowcount
+        conn.commit()
+
+    return {
+        'data_version': data_version,
+        'rankings': len(jobs),
+        'removed': removed,
+        'duration_s': round(time.perf_counter() - started, 1),
+    }
@@ -0,0 +1,248 @@
+# core/profile_prefetch.py
+"""
+Warm profile cache for Employee Profile browsing.
+
+HR users tend to open profiles one after another, so when a profile is shown
+we predict the next ones (adjacent entries in the picker, same-department
+peers, recent search hits) and load them in the background into a bounded
+LRU cache. Hit-rate statistics are kept so the cache size can be tuned.
+
+Prefetching is speculative, so it never competes with foreground lookups: a
+background load only runs when the interactive lane has a slot to spare
+(otherwise it is skipped), and queued loads for profiles that are no longer
+predicted are dropped. A lookup that waits for an in-flight prefetch counts
+as a (prefetch) hit, not a miss.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .db import WorkloadRejected
+from .profile_repository import fetch_employee_profile
+
+DEFAULT_MAX_PROFILES = 256
+DEFAULT_MAX_AGE = 300          # Same freshness as the previous st.cache_data(ttl=300)
+DEFAULT_PREFETCH_WORKERS = 2   # Keep background work small next to the 5-connection pool
+
+
+class LRUProfileCache:
+    """Bounded, thread-safe LRU cache of EmployeeProfile objects."""
+
+    def __init__(self, maxsize=DEFAULT_MAX_PROFILES, max_age=DEFAULT_MAX_AGE):
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._entries = OrderedDict()   # employee_id -> (loaded_at, profile, prefetched)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.prefetch_loads = 0
+        self.prefetch_hits = 0
+        self.prefetch_skipped = 0
+        self.prefetch_dropped = 0
+
+    def get(self, employee_id, count_miss=True):
+        """Cached profile or None; count_miss=False lets the caller decide whether it was a miss."""
+        with self._lock:
+            entry = self._entries.get(employee_id)
+            if entry is None:
+                self.misses += count_miss
+                return None
+            loaded_at, profile, prefetched = entry
+            if time.monotonic() - loaded_at > self.max_age:
+                del self._entries[employee_id]
+                self.expirations += 1
+                self.misses += count_miss
+                return None
+            self._entries.move_to_end(employee_id)
+            self.hits += 1
+            if prefetched:
+                # Hitung sekali saja per prefetch yang benar-benar terpakai
+                self.prefetch_hits += 1
+                self._entries[employee_id] = (loaded_at, profile, False)
+            return profile
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def record_prefetch_skipped(self, dropped=False):
+        with self._lock:
+            if dropped:
+                self.prefetch_dropped += 1
+            else:
+                self.prefetch_skipped += 1
+
+    def contains(self, employee_id):
+        with self._lock:
+            entry = self._entries.get(employee_id)
+            return entry is not None and time.monotonic() - entry[0] <= self.max_age
+
+    def put(self, employee_id, profile, prefetched=False):
+        with self._lock:
+            self._entries[employee_id] = (time.monotonic(), profile, prefetched)
+            self._entries.move_to_end(employee_id)
+            if prefetched:
+                self.prefetch_loads += 1
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'prefetch_loads': self.prefetch_loads,
+                'prefetch_hits': self.prefetch_hits,
+                'prefetch_precision': self.prefetch_hits / self.prefetch_loads if self.prefetch_loads else 0.0,
+                'prefetch_skipped': self.prefetch_skipped,
+                'prefetch_dropped': self.prefetch_dropped,
+            }
+
+
+class ProfilePrefetcher:
+    """Serves profiles from the LRU cache and warms it in background threads."""
+
+    def __init__(self, engine, cache=None, workers=DEFAULT_PREFETCH_WORKERS, loader=fetch_employee_profile):
+        self._engine = engine
+        self._loader = loader
+        self.cache = cache or LRUProfileCache()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="profile-prefetch")
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get(self, employee_id):
+        """Return the profile, loading it synchronously on a cache miss."""
+        profile = self.cache.get(employee_id, count_miss=False)
+        if profile is not None:
+            return profile
+        # Jika sedang di-prefetch, tunggu hasilnya daripada query dua kali; prefetch yang
+        # selesai ada di cache dan dihitung sebagai hit (dan prefetch hit), bukan miss
+        with self._lock:
+            future = self._in_flight.get(employee_id)
+        if future is not None:
+            try:
+                future.result()
+            except Exception:
+                pass
+            profile = self.cache.get(employee_id, count_miss=False)
+            if profile is not None:
+                return profile
+        self.cache.record_miss()
+        profile = self._loader(self._engine, employee_id)
+        self.cache.put(employee_id, profile)
+        return profile
+
+    def prefetch(self, employee_ids, limit=8):
+        """Schedule background loads for profiles that are not cached yet; drop stale queued ones."""
+        employee_ids = list(employee_ids)
+        predicted = set(employee_ids)
+        with self._lock:
+            stale = [(employee_id, future) for employee_id, future in self._in_flight.items()
+                     if employee_id not in predicted]
+        for employee_id, future in stale:
+            # Hanya yang belum mulai; yang sedang berjalan dibiarkan selesai
+            if future.cancel():
+                with self._lock:
+                    self._in_flight.pop(employee_id, None)
+                self.cache.record_prefetch_skipped(dropped=True)
+
+        scheduled = 0
+        for employee_id in employee_ids:
+            if scheduled >= limit:
+                break
+            if not employee_id or self.cache.contains(employee_id):
+                continue
+            with self._lock:
+                if employee_id in self._in_flight:
+                    continue
+                self._in_flight[employee_id] = self._executor.submit(self._prefetch_one, employee_id)
+            scheduled += 1
+        return scheduled
+
+    def _prefetch_one(self, employee_id):
+        try:
+            profile = self._loader(self._engine, employee_id, background=True)
+        except WorkloadRejected:
+            # Lane interaktif sibuk: prefetch dilewati, lookup foreground didahulukan
+            self.cache.record_prefetch_skipped()
+            return None
+        else:
+            self.cache.put(employee_id, profile, prefetched=True)
+            return profile
+        finally:
+            with self._lock:
+                self._in_flight.pop(employee_id, None)
+
+    def stats(self):
+        stats = self.cache.stats()
+        with self._lock:
+            stats['in_flight'] = len(self._in_flight)
+        return stats
+
+
+def predict_next_profiles(selected_id, listed_ids, peers_df=None, recent_hits=(), window=2, max_peers=3):
+    """
+    Guess which profiles the user will open next, most likely first.
+
+    Args:
+        selected_id (str): Profile currently shown
+        listed_ids (list): Employee IDs in picker order
+        peers_df (DataFrame, optional): Same-department employees (employee_id column)
+        recent_hits (iterable): Employee IDs from recent searches
+        window (int): How many neighbours on each side of the selection
+        max_peers (int): Maximum number of department peers
+
+    Returns:
+        list: De-duplicated employee IDs, excluding selected_id
+    """
+    predicted = []
+    if selected_id in listed_ids:
+        pos = listed_ids.index(selected_id)
+        for offset in range(1, window + 1):
+            for neighbour in (pos + offset, pos - offset):
+                if 0 <= neighbour < len(listed_ids):
+                    predicted.append(listed_ids[neighbour])
+    if peers_df is not None and not peers_df.empty:
+        peers = peers_df.loc[peers_df['employee_id'] != selected_id, 'employee_id']
+        predicted.extend(peers.head(max_peers).tolist())
+    predicted.extend(recent_hits)
+
+    seen = {selected_id}
+    ordered = []
+    for employee_id in predicted:
+        if employee_id not in seen:
+            seen.add(employee_id)
+            ordered.append(employee_id)
+    return ordered
+
+
+_prefetchers = {}
+_prefetchers_lock = threading.Lock()
+
+
+def get_profile_prefetcher(engine):
+    """Return the process-wide prefetcher (and its LRU cache) for this engine."""
+    key = id(engine)
+    prefetcher = _prefetchers.get(key)
+    if prefetcher is None:
+        with _prefetchers_lock:
+            prefetcher = _prefetchers.get(key)
+            if prefetcher is None:
+                prefetcher = ProfilePrefetcher(engine)
+                _prefetchers[key] = prefetcher
+    return prefetcher
@@ -0,0 +1,144 @@
+# core/profile_repository.py
+"""
+Profile repository for the Employee Profile page.
+
+The whole profile (basic info, latest rating, rating history, competencies,
+psychometrics, strengths and PAPI scales) is fetched in ONE round trip with
+Postgres JSON aggregation, and returned as a typed EmployeeProfile so it can
+be cached as a single object.
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+from .db import lane_connection
+from .dimensions import get_dimension_registry
+
+PROFILE_SQL = """
+SELECT json_build_object(
+    'basic', (
+        SELECT row_to_json(b)
+        FROM (
+            SELECT e.employee_id, e.fullname, e.position_id, e.department_id,
+                   e.division_id, e.grade_id, e.education_id, e.years_of_service_months
+            FROM employees e
+            WHERE e.employee_id = :employee_id
+        ) b
+    ),
+    'performance_history', (
+        SELECT COALESCE(json_agg(json_build_object('year', py.year, 'rating', py.rating)
+                                 ORDER BY py.year), '[]'::json)
+        FROM performance_yearly py
+        WHERE py.employee_id = :employee_id
+    ),
+    'competencies', (
+        SELECT COALESCE(json_agg(json_build_object('pillar_code', cy.pillar_code, 'score', cy.score)
+                                 ORDER BY cy.score DESC), '[]'::json)
+        FROM competencies_yearly cy
+        WHERE cy.employee_id = :employee_id
+          AND cy.year = (SELECT MAX(year) FROM competencies_yearly)
+    ),
+    'cognitive', (
+        SELECT row_to_json(c)
+        FROM (
+            SELECT iq, gtq, tiki, pauli, faxtor, mbti, disc
+            FROM profiles_psych
+            WHERE employee_id = :employee_id
+        ) c
+    ),
+    'strengths', (
+        SELECT COALESCE(json_agg(s ORDER BY s.rank), '[]'::json)
+        FROM (
+            SELECT theme, rank
+            FROM strengths
+            WHERE employee_id = :employee_id
+            ORDER BY rank
+            LIMIT 5
+        ) s
+    ),
+    'papi', (
+        SELECT COALESCE(json_agg(json_build_object('scale_code', ps.scale_code, 'score', ps.score)
+                                 ORDER BY ps.scale_code), '[]'::json)
+        FROM papi_scores ps
+        WHERE ps.employee_id = :employee_id
+    )
+) AS profile
+"""
+
+
+def _frame(records, columns):
+    return pd.DataFrame(records or [], columns=columns)
+
+
+def _row(record):
+    # Satu baris DataFrame agar tipe data (NaN untuk NULL numerik) sama seperti pd.read_sql
+    if not record:
+        return None
+    return pd.DataFrame([record]).iloc[0]
+
+
+@dataclass
+class EmployeeProfile:
+    """Everything the Employee Profile page renders for one employee."""
+    employee_id: str
+    basic: Optional[pd.Series] = None
+    performance: int = 0
+    performance_history: pd.DataFrame = field(default_factory=lambda: _frame([], ['year', 'rating']))
+    competencies: pd.DataFrame = field(default_factory=lambda: _frame([], ['pillar_label', 'score']))
+    cognitive: Optional[pd.Series] = None
+    strengths: pd.DataFrame = field(default_factory=lambda: _frame([], ['theme', 'rank']))
+    papi: pd.DataFrame = field(default_factory=lambda: _frame([], ['scale_code', 'score']))
+
+    @property
+    def found(self):
+        return self.basic is not None
+
+
+def fetch_employee_profile(engine, employee_id, background=False):
+    """
+    Load the complete profile of one employee in a single query.
+
+    Args:
+        engine: SQLAlchemy engine
+        employee_id (str): Employee to load
+        background (bool): Prefetch: raise WorkloadRejected instead of waiting
+            when the interactive lane has no slot to spare
+
+    Returns:
+        EmployeeProfile: basic is None when the employee does not exist
+    """
+    # Prefetch tidak boleh antri di lane interaktif: selalu sisakan satu slot untuk foreground
+    lane_options = {'blocking': False, 'reserve': 1} if background else {}
+    with lane_connection(engine, 'interactive', **lane_options) as conn:
+        data = conn.execute(text(PROFILE_SQL), {"employee_id": employee_id}).scalar() or {}
+
+    registry = get_dimension_registry(engine)
+
+    basic = None
+    if data.get('basic'):
+        basic = registry.attach_names(pd.DataFrame([data['basic']])).iloc[0]
+
+    history = _frame(data.get('performance_history'), ['year', 'rating'])
+    latest_rating = history['rating'].iloc[-1] if not history.empty else 0
+
+    competencies = _frame(data.get('competencies'), ['pillar_code', 'score'])
+    pillar_labels = registry.lookup('competency_pillars')
+    competencies = competencies[competencies['pillar_code'].isin(pillar_labels.keys())]
+    competencies = pd.DataFrame({
+        'pillar_label': competencies['pillar_code'].map(pillar_labels),
+        'score': competencies['score'],
+    }).reset_index(drop=True)
+
+    return EmployeeProfile(
+        employee_id=employee_id,
+        basic=basic,
+        performance=latest_rating,
+        performance_history=history,
+        competencies=competencies,
+        cognitive=_row(data.get('cognitive')),
+        strengths=_frame(data.get('strengths'), ['theme', 'rank']),
+        papi=_frame(data.get('papi'), ['scale_code', 'score']),
+    )
@@ -0,0 +1,219 @@
+# core/profiler.py
+"""
+On-demand sampling profiler for Streamlit pages.
+
+An admin opens any page with `?profile=1`. start_page_profiler() then starts a
+background thread that samples the script thread's Python stack every few
+milliseconds, and render_page_profile() at the bottom of the page shows a
+flame graph plus a sorted hotspot table of where the rerun spent its time.
+Sampling keeps the overhead low enough to use on the real deployment.
+"""
+
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+import streamlit as st
+
+from .admin import is_admin_enabled
+from .lazy import lazy_import
+
+# Plotly hanya dibutuhkan saat ?profile=1
+go = lazy_import('plotly.graph_objects')
+
+DEFAULT_INTERVAL = 0.005     # 5 ms antar sampel
+DEFAULT_MAX_DURATION = 120   # Berhenti sendiri bila halaman tidak pernah memanggil render
+FLAME_MIN_SHARE = 0.005      # Node < 0.5% sampel tidak digambar di flame graph
+
+_LIBRARY_PATHS = tuple(
+    os.path.normcase(os.path.abspath(p))
+    for p in {sysconfig.get_paths().get(k) for k in ('stdlib', 'platstdlib', 'purelib', 'platlib')}
+    if p
+)
+_library_files = {}
+
+
+def _is_library(filename):
+    result = _library_files.get(filename)
+    if result is None:
+        result = filename.startswith('<frozen') or \
+            os.path.normcase(os.path.abspath(filename)).startswith(_LIBRARY_PATHS)
+        _library_files[filename] = result
+    return result
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread at a fixed interval."""
+
+    def __init__(self, thread_id=None, interval=DEFAULT_INTERVAL, max_duration=DEFAULT_MAX_DURATION):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.max_duration = max_duration
+        self.stacks = Counter()   # tuple of (file, line, function), outermost first -> samples
+        self.samples = 0
+        self.started_at = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="page-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None and not self._stop.is_set():
+            self._stop.set()
+            self._thread.join()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if time.perf_counter() - self.started_at > self.max_duration:
+                break
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            stack.reverse()
+            # Buang frame runtime (threading, streamlit) sebelum frame kode aplikasi pertama
+            first_app = next((i for i, f in enumerate(stack) if not _is_library(f[0])), 0)
+            self.stacks[tuple(stack[first_app:])] += 1
+            self.samples += 1
+        self.elapsed = time.perf_counter() - self.started_at
+
+    @staticmethod
+    def _label(frame):
+        filename, line, name = frame
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    def hotspots(self, app_only=False, limit=40):
+        """
+        Functions sorted by self time.
+
+        Args:
+            app_only (bool): Attribute library time to the innermost app frame
+            limit (int): Number of rows to return
+
+        Returns:
+            DataFrame [function, file, self_ms, total_ms, self_pct, total_pct, samples]
+        """
+        self_counts = Counter()
+        total_counts = Counter()
+        for stack, count in self.stacks.items():
+            if not stack:
+                continue
+            leaf = stack[-1]
+            if app_only:
+                leaf = next((f for f in reversed(stack) if not _is_library(f[0])), leaf)
+            self_counts[leaf] += count
+            for frame in set(stack):
+                total_counts[frame] += count
+
+        ms_per_sample = self.elapsed * 1000.0 / self.samples if self.samples else 0.0
+        rows = [
+            {
+                'function': self._label(frame),
+                'file': frame[0],
+                'self_ms': round(self_counts[frame] * ms_per_sample, 1),
+                'total_ms': round(total_counts[frame] * ms_per_sample, 1),
+                'self_pct': round(100.0 * self_counts[frame] / self.samples, 1),
+                'total_pct': round(100.0 * total_counts[frame] / self.samples, 1),
+                'samples': self_counts[frame],
+            }
+            for frame in self_counts
+        ]
+        columns = ['function', 'file', 'self_ms', 'total_ms', 'self_pct', 'total_pct', 'samples']
+        df = pd.DataFrame(rows, columns=columns)
+        return df.sort_values(['self_ms', 'total_ms'], ascending=False, ignore_index=True).head(limit)
+
+    def collapsed(self):
+        """Stacks in the 'folded' format read by flamegraph.pl and speedscope."""
+        return "\n".join(
+            ";".join(self._label(f) for f in stack) + f" {count}"
+            for stack, count in self.stacks.most_common()
+            if stack
+        ) + "\n"
+
+    def flame_figure(self, min_share=FLAME_MIN_SHARE):
+        """Plotly icicle chart laid out as a flame graph (root at the bottom)."""
+        totals = Counter()
+        for stack, count in self.stacks.items():
+            for depth in range(1, len(stack) + 1):
+                totals[stack[:depth]] += count
+
+        threshold = max(1, int(self.samples * min_share))
+        paths = [p for p, c in totals.items() if c >= threshold]
+        ids = ["/".join(self._label(f) for f in p) for p in paths]
+        fig = go.Figure(go.Icicle(
+            ids=ids,
+            labels=[self._label(p[-1]) for p in paths],
+            parents=["/".join(self._label(f) for f in p[:-1]) for p in paths],
+            values=[totals[p] for p in paths],
+            branchvalues='total',
+            tiling=dict(orientation='v', flip='y'),
+            hovertemplate='%{label}<br>%{value} samples (%{percentRoot:.1%})<extra></extra>',
+            maxdepth=25,
+        ))
+        fig.update_layout(margin=dict(t=10, l=0, r=0, b=0), height=520)
+        return fig
+
+
+def start_page_profiler():
+    """
+    Start profiling this rerun when the page was opened with ?profile=1 by an admin.
+
+    Returns:
+        SamplingProfiler or None
+    """
+    if st.query_params.get("profile") != "1" or not is_admin_enabled():
+        return None
+    # Profiler dari rerun sebelumnya (mis. berhenti karena st.stop) ikut dihentikan
+    previous = st.session_state.get('_page_profiler')
+    if previous is not None:
+        previous.stop()
+    profiler = SamplingProfiler().start()
+    st.session_state['_page_profiler'] = profiler
+    return profiler
+
+
+def render_page_profile(profiler):
+    """Stop the profiler and render the flame graph and hotspot table at the bottom of the page."""
+    if profiler is None:
+        return
+    profiler.stop()
+    st.session_state.pop('_page_profiler', None)
+
+    st.markdown("---")
+    st.subheader("🔬 Python Profile (this rerun)")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Wall Time", f"{profiler.elapsed:.2f} s")
+    col2.metric("Samples", profiler.samples)
+    col3.metric("Interval", f"{profiler.interval * 1000:.0f} ms")
+
+    if not profiler.samples:
+        st.info("The rerun finished before the first sample was taken.")
+        return
+
+    st.plotly_chart(profiler.flame_figure(), width="stretch")
+    app_only = st.checkbox(
+        "Attribute library time to app code", value=True, key="profile_app_only",
+        help="Charge time spent in pandas/plotly/SQLAlchemy to the app function that called it"
+    )
+    st.dataframe(profiler.hotspots(app_only=app_only), hide_index=True, width="stretch")
+    st.download_button(
+        "⬇ Download folded stacks",
+        data=profiler.collapsed(),
+        file_name="page_profile.folded",
+        mime="text/plain",
+        help="Open in speedscope.app or flamegraph.pl"
+    )
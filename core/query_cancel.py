@@ -0,0 +1,289 @@
+# core/query_cancel.py
+"""
+Cancellation of superseded queries.
+
+Long-running calls (matching, breakdown) run inside a `cancellable` job. Every
+connection opened through core.db.lane_connection while a job is active
+registers its backend PID and cancel handle with that job. A job can have
+several owners (Streamlit sessions), because single-flight joiners share the
+leader's query; it is only cancelled once no owner is interested anymore.
+
+An owner leaves its job when it starts a new cancellable call, or when the
+watchdog sees that its Streamlit session has a rerun/stop pending. The
+Streamlit script thread is blocked inside the driver at that point, so the
+watchdog thread is the only place that can stop the abandoned query.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+# Interval (detik) watchdog memeriksa apakah sesi meminta rerun
+WATCH_INTERVAL = 0.25
+
+_active_job = contextvars.ContextVar('active_cancellable_job', default=None)
+
+
+class QueryCancelled(RuntimeError):
+    """Raised when a query was cancelled because its run was superseded."""
+
+
+class _Backend:
+    """One registered connection; `lock` is held while it is cancelled or unregistered."""
+    __slots__ = ('pid', 'cancel', 'active', 'lock')
+
+    def __init__(self, pid, cancel):
+        self.pid = pid
+        self.cancel = cancel
+        self.active = True
+        self.lock = threading.Lock()
+
+
+class _Job:
+    __slots__ = ('key', 'engine', 'owners', 'backends', 'cancelled', 'started_at')
+
+    def __init__(self, key, engine):
+        self.key = key
+        self.engine = engine
+        self.owners = set()
+        self.backends = {}   # backend pid -> _Backend
+        self.cancelled = False
+        self.started_at = time.monotonic()
+
+
+class QueryCanceller:
+    """Tracks running backends per job and cancels jobs nobody waits for."""
+
+    def __init__(self, watch_interval=WATCH_INTERVAL):
+        self._watch_interval = watch_interval
+        self._jobs = {}
+        self._owner_jobs = {}   # owner -> job key
+        self._watches = {}      # owner -> callable returning True when superseded
+        self._lock = threading.Lock()
+        self._watchdog = None
+        self.cancel_requests = 0
+        self.cancel_errors = 0
+        self.last_error = None
+
+    # ---- ownership -------------------------------------------------------------------
+
+    def _leave_locked(self, owner):
+        """Remove owner from its job; return the job if it is now orphaned."""
+        key = self._owner_jobs.pop(owner, None)
+        job = self._jobs.get(key) if key is not None else None
+        if job is None:
+            return None
+        job.owners.discard(owner)
+        if job.owners:
+            return None
+        del self._jobs[key]
+        if job.cancelled:
+            return None
+        # Tandai dulu: koneksi yang baru akan dibuka job ini langsung ditolak
+        job.cancelled = True
+        return job
+
+    def supersede(self, owner):
+        """Owner no longer needs its current job; cancel it if it was the last owner."""
+        with self._lock:
+            self._watches.pop(owner, None)
+            orphan = self._leave_locked(owner)
+        if orphan is not None:
+            self._cancel(orphan)
+
+    @contextmanager
+    def cancellable(self, engine, job_key, owner, superseded=None):
+        """
+        Run a block as (a co-owner of) job `job_key`.
+
+        Args:
+            engine: SQLAlchemy engine the job's queries run on
+            job_key: Hashable key; callers sharing one computation use the same key
+            owner: Session key of the caller (None disables cancellation)
+            superseded (callable, optional): Returns True once the owner's run is abandoned
+        """
+        if owner is None:
+            yield None
+            return
+
+        # Run sebelumnya dari owner yang sama sudah tidak relevan
+        self.supersede(owner)
+        with self._lock:
+            job = self._jobs.get(job_key)
+            if job is None:
+                job = _Job(job_key, engine)
+                self._jobs[job_key] = job
+            job.owners.add(owner)
+            self._owner_jobs[owner] = job_key
+            if superseded is not None:
+                self._watches[owner] = superseded
+                self._ensure_watchdog_locked()
+
+        token = _active_job.set(job)
+        try:
+            yield job
+        except QueryCancelled:
+            raise
+        except Exception as e:
+            if job.cancelled:
+                raise QueryCancelled(f"Query for {job_key!r} was cancelled because its run was superseded.") from e
+            raise
+        finally:
+            _active_job.reset(token)
+            with self._lock:
+                self._watches.pop(owner, None)
+                if self._owner_jobs.get(owner) == job_key:
+                    self._owner_jobs.pop(owner, None)
+                    job.owners.discard(owner)
+                    if not job.owners and self._jobs.get(job_key) is job:
+                        del self._jobs[job_key]
+
+    # ---- backend registration -----------------------------------------------------
+
+    @contextmanager
+    def track_backend(self, conn):
+        """Register the connection's backend with the active job (if any)."""
+        job = _active_job.get()
+        if job is None:
+            yield
+            return
+
+        if job.cancelled:
+            # Job sudah dibatalkan sebelum query-nya sempat dikirim
+            raise QueryCancelled(f"Query for {job.key!r} was cancelled because its run was superseded.")
+
+        dbapi_conn = conn.connection.dbapi_connection
+        pid = getattr(getattr(dbapi_conn, 'info', None), 'backend_pid', None)
+        if pid is None:
+            pid = conn.exec_driver_sql("SELECT pg_backend_pid()").scalar()
+        backend = _Backend(pid, getattr(dbapi_conn, 'cancel', None))
+        with self._lock:
+            job.backends[pid] = backend
+            cancel_now = job.cancelled
+        if cancel_now:
+            self._cancel_backend(job.engine, backend)
+        try:
+            yield
+        finally:
+            # Lock backend: koneksi baru kembali ke pool setelah cancel yang sedang berjalan selesai,
+            # dan tidak ada cancel yang dikirim setelahnya (bisa mengenai query sesi lain)
+            with backend.lock:
+                backend.active = False
+            with self._lock:
+                job.backends.pop(pid, None)
+
+    # ---- cancellation -------------------------------------------------------------
+
+    def _cancel(self, job):
+        with self._lock:
+            backends = list(job.backends.values())
+        for backend in backends:
+            self._cancel_backend(job.engine, backend)
+
+    def _cancel_backend(self, engine, backend):
+        with backend.lock:
+            if not backend.active:
+                # Query sudah selesai dan koneksinya mungkin sudah dipakai sesi lain
+                return
+            with self._lock:
+                self.cancel_requests += 1
+            try:
+                if backend.cancel is not None:
+                    # Cancel request lewat socket terpisah, tidak memakai slot pool
+                    backend.cancel()
+                else:
+                    with engine.connect() as conn:
+                        conn.execute(text("SELECT pg_cancel_backend(:pid)"), {"pid": backend.pid})
+            except Exception as e:
+                with self._lock:
+                    self.cancel_errors += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+
+    def _ensure_watchdog_locked(self):
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = threading.Thread(target=self._watch, name="query-cancel-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self._watch_interval)
+            with self._lock:
+                watches = list(self._watches.items())
+            for owner, superseded in watches:
+                try:
+                    abandoned = superseded()
+                except Exception:
+                    abandoned = False
+                if abandoned:
+                    self.supersede(owner)
+
+    def in_flight(self):
+        """Running jobs with their owners and backend PIDs."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    'job': repr(job.key),
+                    'owners': len(job.owners),
+                    'backend_pids': sorted(job.backends),
+                    'running_s': round(now - job.started_at, 1),
+                }
+                for job in self._jobs.values()
+            ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'jobs': len(self._jobs),
+                'watched_sessions': len(self._watches),
+                'cancel_requests': self.cancel_requests,
+                'cancel_errors': self.cancel_errors,
+                'last_error': self.last_error,
+            }
+
+
+query_canceller = QueryCanceller()
+
+
+def current_session():
+    """
+    (session key, superseded check) for the running Streamlit script.
+
+    Returns (None, None) outside a Streamlit script run. The check reports True
+    as soon as the session has a rerun or stop request pending.
+    """
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        from streamlit.runtime.scriptrunner_utils.script_requests import ScriptRequestType
+    except ImportError:
+        return None, None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return None, None
+
+    requests = getattr(ctx, 'script_requests', None)
+
+    def superseded():
+        state = getattr(requests, '_state', ScriptRequestType.CONTINUE)
+        return state != ScriptRequestType.CONTINUE
+
+    return ctx.session_id, (superseded if requests is not None else None)
+
+
+@contextmanager
+def session_cancellable(engine, job_key, cancel_key=None):
+    """
+    cancellable() owned by the current Streamlit session.
+
+    Pass cancel_key to use an explicit owner instead of the session (e.g. from
+    scripts); outside Streamlit without a cancel_key nothing is tracked.
+    """
+    session_key, superseded = current_session()
+    owner = cancel_key if cancel_key is not None else session_key
+    if cancel_key is not None and cancel_key != session_key:
+        superseded = None
+    with query_canceller.cancellable(engine, job_key, owner, superseded) as job:
+        yield job
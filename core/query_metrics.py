@@ -0,0 +1,322 @@
+# core/query_metrics.py
+"""
+Query latency instrumentation.
+
+instrument_engine() attaches SQLAlchemy cursor events to an engine. Every
+statement is recorded as a QuerySample (latency, rows returned, pool/lane
+wait of the connection, calling function, page and mode tags) in a bounded
+ring buffer. Rolling p50/p95/p99 aggregates are available through
+get_query_metrics().summary(), and the samples can optionally be exported to
+a local file in Prometheus text format or as JSONL.
+
+Export is configured with environment variables:
+    QUERY_METRICS_EXPORT   'prometheus' or 'jsonl' (unset = no export)
+    QUERY_METRICS_PATH     output file (default: query_metrics.prom / .jsonl)
+    QUERY_METRICS_INTERVAL seconds between two exports (default: 30)
+"""
+
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import event
+
+DEFAULT_BUFFER_SIZE = 5000
+DEFAULT_EXPORT_INTERVAL = 30
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Modul yang dilewati saat mencari fungsi pemanggil query
+_SKIP_MODULE_PREFIXES = (
+    'sqlalchemy', 'pandas', 'contextlib', 'threading', 'concurrent',
+    'core.db', 'core.query_metrics', 'core.query_cancel', 'core.singleflight',
+)
+
+_query_tags = contextvars.ContextVar('query_tags', default={})
+
+
+def set_query_tags(**tags):
+    """Set tags (e.g. page=...) for every query issued later in this thread/context."""
+    _query_tags.set({**_query_tags.get(), **tags})
+
+
+@contextmanager
+def query_tags(**tags):
+    """Scoped variant of set_query_tags (e.g. mode=... for one matching run)."""
+    token = _query_tags.set({**_query_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _query_tags.reset(token)
+
+
+@dataclass
+class QuerySample:
+    ts: float
+    duration_ms: float
+    rows: Optional[int]
+    pool_wait_ms: Optional[float]
+    caller: str
+    page: Optional[str]
+    mode: Optional[str]
+    statement: str
+    error: Optional[str] = None
+
+
+def _caller_name():
+    frame = sys._getframe(2)
+    depth = 0
+    while frame is not None and depth < 40:
+        module = frame.f_globals.get('__name__', '')
+        if not module.startswith(_SKIP_MODULE_PREFIXES):
+            return f"{module}.{getattr(frame.f_code, 'co_qualname', frame.f_code.co_name)}"
+        frame = frame.f_back
+        depth += 1
+    return 'unknown'
+
+
+def _short_statement(statement, limit=160):
+    return re.sub(r'\s+', ' ', statement).strip()[:limit]
+
+
+class QueryMetrics:
+    """Ring buffer of query samples with rolling percentile aggregates."""
+
+    def __init__(self, maxlen=DEFAULT_BUFFER_SIZE):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.total = 0
+        self.errors = 0
+
+    def record(self, sample):
+        with self._lock:
+            self._samples.append(sample)
+            self.total += 1
+            if sample.error:
+                self.errors += 1
+
+    def samples(self, since=None):
+        with self._lock:
+            samples = list(self._samples)
+        if since is not None:
+            samples = [s for s in samples if s.ts > since]
+        return samples
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self, group_by=('page', 'mode', 'caller'), window=None):
+        """
+        Rolling aggregates over the buffer.
+
+        Args:
+            group_by (tuple): Sample fields to group on (empty = one overall row)
+            window (float, optional): Only use samples from the last `window` seconds
+
+        Returns:
+            list of dict: count, errors, p50_ms, p95_ms, p99_ms, max_ms,
+            avg_rows and avg_pool_wait_ms per group, slowest p95 first
+        """
+        since = time.time() - window if window else None
+        groups = {}
+        for s in self.samples(since):
+            groups.setdefault(tuple(getattr(s, f) for f in group_by), []).append(s)
+
+        rows = []
+        for key, samples in groups.items():
+            durations = np.fromiter((s.duration_ms for s in samples), dtype=float, count=len(samples))
+            p50, p95, p99 = np.percentile(durations, [q * 100 for q in QUANTILES])
+            row_counts = [s.rows for s in samples if s.rows is not None]
+            waits = [s.pool_wait_ms for s in samples if s.pool_wait_ms is not None]
+            rows.append({
+                **dict(zip(group_by, key)),
+                'count': len(samples),
+                'errors': sum(1 for s in samples if s.error),
+                'p50_ms': round(float(p50), 2),
+                'p95_ms': round(float(p95), 2),
+                'p99_ms': round(float(p99), 2),
+                'max_ms': round(float(durations.max()), 2),
+                'sum_ms': round(float(durations.sum()), 2),
+                'avg_rows': round(float(np.mean(row_counts)), 1) if row_counts else None,
+                'avg_pool_wait_ms': round(float(np.mean(waits)), 2) if waits else None,
+            })
+        rows.sort(key=lambda r: r['p95_ms'], reverse=True)
+        return rows
+
+    def slowest(self, n=10, caller_prefix=None):
+        """The n slowest samples in the buffer (optionally only for one caller prefix)."""
+        samples = self.samples()
+        if caller_prefix:
+            samples = [s for s in samples if s.caller.startswith(caller_prefix)]
+        return sorted(samples, key=lambda s: s.duration_ms, reverse=True)[:n]
+
+    # ---- exporters ----------------------------------------------------------------
+
+    def to_prometheus(self):
+        """Prometheus text exposition of the rolling aggregates."""
+        lines = [
+            "# HELP talent_db_query_duration_seconds Database statement latency (rolling ring buffer)",
+            "# TYPE talent_db_query_duration_seconds summary",
+        ]
+        for row in self.summary():
+            labels = ",".join(
+                f'{k}="{_escape_label(row[k])}"' for k in ('page', 'mode', 'caller')
+            )
+            for q in QUANTILES:
+                value = row[f"p{int(q * 100)}_ms"] / 1000.0
+                lines.append(f'talent_db_query_duration_seconds{{{labels},quantile="{q}"}} {value:.6f}')
+            lines.append(f"talent_db_query_duration_seconds_sum{{{labels}}} {row['sum_ms'] / 1000.0:.6f}")
+            lines.append(f"talent_db_query_duration_seconds_count{{{labels}}} {row['count']}")
+        lines += [
+            "# HELP talent_db_queries_total Statements recorded since start",
+            "# TYPE talent_db_queries_total counter",
+            f"talent_db_queries_total {self.total}",
+            "# HELP talent_db_query_errors_total Statements that raised since start",
+            "# TYPE talent_db_query_errors_total counter",
+            f"talent_db_query_errors_total {self.errors}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path):
+        # Tulis ke file sementara lalu rename agar scraper tidak membaca file setengah jadi
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def export_jsonl(self, path, since=None):
+        """Append samples newer than `since` to path; returns the newest timestamp written."""
+        samples = self.samples(since)
+        if samples:
+            with open(path, 'a', encoding='utf-8') as f:
+                for s in samples:
+                    f.write(json.dumps(asdict(s), default=str) + "\n")
+            return samples[-1].ts
+        return since
+
+
+def _escape_label(value):
+    return str(value if value is not None else '').replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+_metrics = QueryMetrics()
+_instrumented = set()
+_instrument_lock = threading.Lock()
+_exporter = None
+
+
+def get_query_metrics():
+    """The process-wide QueryMetrics instance."""
+    return _metrics
+
+
+def note_pool_wait(conn, wait_seconds):
+    """Attach the checkout/lane wait of a fresh connection to its next statement."""
+    conn.info['query_metrics_pool_wait_ms'] = wait_seconds * 1000.0
+
+
+def clear_pool_wait(conn):
+    """Drop a wait no statement picked up (conn.info outlives the checkout)."""
+    conn.info.pop('query_metrics_pool_wait_ms', None)
+
+
+@contextmanager
+def unrecorded(conn):
+    """Statements run inside this block (e.g. session setup) are not sampled."""
+    conn.info['query_metrics_skip'] = True
+    try:
+        yield conn
+    finally:
+        conn.info.pop('query_metrics_skip', None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if conn.info.get('query_metrics_skip'):
+        return
+    conn.info.setdefault('query_metrics_start', []).append(time.perf_counter())
+
+
+def _finish(conn, statement, rows, error=None):
+    if conn.info.get('query_metrics_skip'):
+        return
+    starts = conn.info.get('query_metrics_start')
+    if not starts:
+        return
+    duration_ms = (time.perf_counter() - starts.pop()) * 1000.0
+    tags = _query_tags.get()
+    _metrics.record(QuerySample(
+        ts=time.time(),
+        duration_ms=duration_ms,
+        rows=rows,
+        pool_wait_ms=conn.info.pop('query_metrics_pool_wait_ms', None),
+        caller=_caller_name(),
+        page=tags.get('page'),
+        mode=tags.get('mode'),
+        statement=_short_statement(statement),
+        error=error,
+    ))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    rowcount = getattr(cursor, 'rowcount', -1)
+    _finish(conn, statement, rowcount if rowcount is not None and rowcount >= 0 else None)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None:
+        error = exception_context.original_exception
+        _finish(conn, exception_context.statement or '', None, f"{type(error).__name__}: {error}")
+
+
+def instrument_engine(engine):
+    """Attach the latency listeners to engine (idempotent) and start the optional exporter."""
+    with _instrument_lock:
+        if id(engine) in _instrumented:
+            return engine
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'handle_error', _handle_error)
+        _instrumented.add(id(engine))
+    _start_exporter_from_env()
+    return engine
+
+
+def _start_exporter_from_env():
+    global _exporter
+    fmt = os.environ.get('QUERY_METRICS_EXPORT', '').strip().lower()
+    if fmt not in ('prometheus', 'jsonl'):
+        return
+    with _instrument_lock:
+        if _exporter is not None:
+            return
+        default_path = 'query_metrics.prom' if fmt == 'prometheus' else 'query_metrics.jsonl'
+        path = os.environ.get('QUERY_METRICS_PATH', default_path)
+        interval = float(os.environ.get('QUERY_METRICS_INTERVAL', DEFAULT_EXPORT_INTERVAL))
+        _exporter = threading.Thread(
+            target=_export_loop, args=(fmt, path, interval), name="query-metrics-exporter", daemon=True
+        )
+        _exporter.start()
+
+
+def _export_loop(fmt, path, interval):
+    last_ts = time.time()
+    while True:
+        time.sleep(interval)
+        try:
+            if fmt == 'prometheus':
+                _metrics.export_prometheus(path)
+            else:
+                last_ts = _metrics.export_jsonl(path, since=last_ts)
+        except OSError:
+            # Export bersifat opsional; coba lagi pada interval berikutnya
+            pass
@@ -0,0 +1,109 @@
+# core/singleflight.py
+"""
+Single-flight request coalescing.
+
+Concurrent calls that share the same key wait for one in-flight computation
+and all receive its result (or its exception). Per-key counters record how
+many calls arrived and how many executions were actually needed, so the
+number of saved executions can be reported.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Jumlah key yang metriknya disimpan (yang paling lama dibuang)
+DEFAULT_MAX_TRACKED_KEYS = 500
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error', 'waiters', 'started_at')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+        self.started_at = time.monotonic()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self, name, max_tracked_keys=DEFAULT_MAX_TRACKED_KEYS):
+        self.name = name
+        self._max_tracked_keys = max_tracked_keys
+        self._calls = {}
+        self._metrics = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key_metrics(self, key):
+        metrics = self._metrics.get(key)
+        if metrics is None:
+            metrics = {'calls': 0, 'executions': 0, 'shared': 0, 'errors': 0, 'last_duration': None}
+            self._metrics[key] = metrics
+            while len(self._metrics) > self._max_tracked_keys:
+                self._metrics.popitem(last=False)
+        else:
+            self._metrics.move_to_end(key)
+        return metrics
+
+    def do(self, key, fn):
+        """
+        Run fn() once for all concurrent callers with the same key.
+
+        Returns:
+            tuple: (result, shared) where shared is True when this caller
+            received the result of another caller's execution
+        """
+        with self._lock:
+            metrics = self._key_metrics(key)
+            metrics['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                metrics['executions'] += 1
+            else:
+                call.waiters += 1
+                metrics['shared'] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                    metrics = self._key_metrics(key)
+                    metrics['last_duration'] = time.monotonic() - call.started_at
+                    if call.error is not None:
+                        metrics['errors'] += 1
+                call.event.set()
+        else:
+            call.event.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result, not leader
+
+    def in_flight(self):
+        """Keys currently executing, with their number of extra waiters."""
+        with self._lock:
+            return {key: call.waiters for key, call in self._calls.items()}
+
+    def stats(self):
+        """Per-key counters plus totals (saved = calls that did not execute)."""
+        with self._lock:
+            per_key = {key: dict(m, saved=m['calls'] - m['executions']) for key, m in self._metrics.items()}
+        total_calls = sum(m['calls'] for m in per_key.values())
+        total_executions = sum(m['executions'] for m in per_key.values())
+        return {
+            'name': self.name,
+            'calls': total_calls,
+            'executions': total_executions,
+            'saved': total_calls - total_executions,
+            'per_key': per_key,
+        }
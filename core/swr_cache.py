@@ -0,0 +1,220 @@
+# core/swr_cache.py
+"""
+Stale-while-revalidate caching.
+
+Once a value has been loaded it is always served immediately. When it needs
+revalidation (the probe interval elapsed, or max_age was exceeded) a single
+background thread per key checks the cheap version probe and only reruns the
+loader if the data actually changed. Only the very first load of a key blocks,
+and concurrent first loads share one computation.
+"""
+
+import functools
+import threading
+import time
+
+# Every cache created through this module, by name (used for statistics pages)
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class _Entry:
+    __slots__ = ('value', 'version', 'loaded_at', 'checked_at')
+
+    def __init__(self, value, version):
+        now = time.monotonic()
+        self.value = value
+        self.version = version
+        self.loaded_at = now
+        self.checked_at = now
+
+
+class StaleWhileRevalidate:
+    """Per-key stale-while-revalidate cache around a loader function."""
+
+    def __init__(self, loader, version_probe=None, probe_interval=30, max_age=None, name=None):
+        self.loader = loader
+        self.version_probe = version_probe
+        self.probe_interval = probe_interval
+        self.max_age = max_age
+        self.name = name or getattr(loader, '__qualname__', 'swr_cache')
+        self._entries = {}
+        self._loading = {}       # key -> threading.Event for blocking first loads
+        self._refreshing = set()  # keys with a background refresh in flight
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_served = 0
+        self.refreshes = 0
+        self.unchanged_probes = 0
+        self.refresh_errors = 0
+        self.last_error = None
+
+    @staticmethod
+    def _make_key(args, kwargs):
+        return (args, tuple(sorted(kwargs.items())))
+
+    def _probe(self):
+        return self.version_probe() if self.version_probe else None
+
+    def get(self, *args, **kwargs):
+        key = self._make_key(args, kwargs)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return self._load_blocking(key, args, kwargs)
+
+        now = time.monotonic()
+        expired = self.max_age is not None and now - entry.loaded_at >= self.max_age
+        probe_due = self.version_probe is not None and now - entry.checked_at >= self.probe_interval
+        with self._lock:
+            self.hits += 1
+            if expired or probe_due:
+                if expired:
+                    self.stale_served += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(
+                        target=self._refresh, args=(key, args, kwargs, expired),
+                        name=f"swr-refresh-{self.name}", daemon=True
+                    ).start()
+        return entry.value
+
+    def _load_blocking(self, key, args, kwargs):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry.value
+            event = self._loading.get(key)
+            leader = event is None
+            if leader:
+                event = threading.Event()
+                self._loading[key] = event
+            self.misses += 1
+
+        if not leader:
+            event.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry.value
+            # Pemuat utama gagal; coba sendiri agar error terlihat oleh pemanggil ini
+            return self._load_blocking(key, args, kwargs)
+
+        try:
+            version = self._probe()
+            value = self.loader(*args, **kwargs)
+            with self._lock:
+                self._entries[key] = _Entry(value, version)
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            event.set()
+
+    def _refresh(self, key, args, kwargs, expired):
+        try:
+            version = self._probe()
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and not expired and version == entry.version:
+                entry.checked_at = time.monotonic()
+                with self._lock:
+                    self.unchanged_probes += 1
+                return
+            value = self.loader(*args, **kwargs)
+            with self._lock:
+                self._entries[key] = _Entry(value, version)
+                self.refreshes += 1
+        except Exception as e:
+            # Tetap sajikan nilai lama; coba lagi pada interval probe berikutnya
+            with self._lock:
+                self.refresh_errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.checked_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def peek(self, *args, **kwargs):
+        """Return the cached value without loading or revalidating (None if absent)."""
+        with self._lock:
+            entry = self._entries.get(self._make_key(args, kwargs))
+        return entry.value if entry is not None else None
+
+    def version_of(self, *args, **kwargs):
+        with self._lock:
+            entry = self._entries.get(self._make_key(args, kwargs))
+        return entry.version if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale_served': self.stale_served,
+                'refreshes': self.refreshes,
+                'unchanged_probes': self.unchanged_probes,
+                'refresh_errors': self.refresh_errors,
+                'refreshing': len(self._refreshing),
+                'last_error': self.last_error,
+            }
+
+
+def get_swr_cache(name, loader, version_probe=None, probe_interval=30, max_age=None):
+    """
+    Return the process-wide cache registered under `name`, creating it if needed.
+
+    Streamlit re-executes page scripts on every rerun, so the loader and probe
+    are re-bound on each call while the cached entries survive.
+    """
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = StaleWhileRevalidate(loader, version_probe, probe_interval, max_age, name=name)
+            _caches[name] = cache
+        else:
+            cache.loader = loader
+            cache.version_probe = version_probe
+            cache.probe_interval = probe_interval
+            cache.max_age = max_age
+    return cache
+
+
+def stale_while_revalidate(version_probe=None, probe_interval=30, max_age=None, name=None):
+    """
+    Decorator form of StaleWhileRevalidate.
+
+    Args:
+        version_probe (callable, optional): Cheap function returning a data version token
+        probe_interval (int): Minimum seconds between two background version probes
+        max_age (int, optional): Force a background reload after this many seconds
+        name (str, optional): Cache name; defaults to the function's file and qualname
+    """
+    def decorator(fn):
+        cache_name = name or f"{fn.__code__.co_filename}:{fn.__qualname__}"
+        cache = get_swr_cache(cache_name, fn, version_probe, probe_interval, max_age)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return cache.get(*args, **kwargs)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def all_swr_cache_stats():
+    """Statistics for every registered stale-while-revalidate cache."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [cache.stats() for cache in caches]
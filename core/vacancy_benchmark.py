@@ -0,0 +1,485 @@
+# core/vacancy_benchmark.py
+"""
+Saved vacancies compiled into matching benchmarks.
+
+A vacancy only describes the role in words. compile_vacancy_benchmarks() turns
+it into a benchmark the matching engine can score against, right after the
+vacancy is saved:
+
+- required competencies are mapped to pillar codes (dim_competency_pillars),
+- every talent variable gets a target: the high-performer median (as in the
+  Default Mode), except the required pillars, whose target is a higher
+  high-performer percentile depending on the job level,
+- every talent variable gets its weight: the talent_variables_mapping weight,
+  with required pillars weighted up and the other pillars weighted down.
+
+The compiled profile is stored in `vacancy_benchmarks` with the data version
+it was compiled from, and recompiled when the talent data changes. Talent
+Matching ranks the whole workforce against it in one vectorized pass over the
+fit matrix features (core/fit_matrix.py); compiled profiles are cached per
+vacancy_id.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from .db import lane_connection
+from .dimensions import get_dimension_registry
+from .fit_matrix import CATEGORICAL_TVS, HP_RATING, get_fit_matrix, score_benchmarks
+from .precomputed import get_matching_data_version
+
+# Persentil HP yang menjadi target pilar kompetensi wajib, per job level (sama dengan pilihan di Job Generator)
+LEVEL_TARGET_PERCENTILE = {
+    'Entry Level': 0.50,
+    'Mid Level': 0.60,
+    'Senior Level': 0.70,
+    'Lead Level': 0.75,
+    'Manager': 0.80,
+    'Director': 0.85,
+    'VP': 0.90,
+}
+DEFAULT_TARGET_PERCENTILE = 0.50
+REQUIRED_PILLAR_WEIGHT = 2.0   # pengali tv_weight untuk pilar yang diminta vacancy
+OTHER_PILLAR_WEIGHT = 0.5      # pengali untuk pilar lain (hanya jika ada pilar yang cocok)
+MIN_LABEL_SIMILARITY = 0.5     # Jaccard kata minimum untuk mencocokkan nama kompetensi ke label pilar
+
+CACHE_SIZE = 256
+CACHE_TTL_S = 300              # setelah ini versi data dicek ulang saat dipakai
+
+VACANCY_BENCHMARKS_DDL = """
+CREATE TABLE IF NOT EXISTS public.vacancy_benchmarks (
+    vacancy_id              INTEGER PRIMARY KEY REFERENCES public.job_vacancies (vacancy_id) ON DELETE CASCADE,
+    data_version            TEXT NOT NULL,
+    job_level               TEXT,
+    pillar_codes            TEXT[] NOT NULL DEFAULT '{}',
+    unmatched_competencies  TEXT[] NOT NULL DEFAULT '{}',
+    profile                 JSONB NOT NULL,
+    compiled_at             TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+# Statistik benchmark HP: median + persentil per TV numerik, dan modus MBTI/DISC
+HP_STATS_SQL = f"""
+WITH hp AS (
+    SELECT DISTINCT employee_id
+    FROM public.performance_yearly
+    WHERE rating = {HP_RATING}
+      AND year = (SELECT MAX(year) FROM public.performance_yearly)
+),
+numeric_tv AS (
+    SELECT c.pillar_code AS tv_name, c.score::float AS score
+    FROM public.competencies_yearly c
+    JOIN hp USING (employee_id)
+    WHERE c.year = (SELECT MAX(year) FROM public.competencies_yearly)
+    UNION ALL
+    SELECT p.scale_code, p.score::float
+    FROM public.papi_scores p
+    JOIN hp USING (employee_id)
+    UNION ALL
+    SELECT v.tv_name, v.score
+    FROM public.profiles_psych s
+    JOIN hp USING (employee_id)
+    CROSS JOIN LATERAL (VALUES
+        ('iq', s.iq::float), ('gtq', s.gtq::float), ('tiki', s.tiki::float),
+        ('faxtor', s.faxtor::float), ('pauli', s.pauli::float)
+    ) AS v (tv_name, score)
+)
+SELECT tv_name,
+       PERCENTILE_CONT(CAST(:fractions AS float8[])) WITHIN GROUP (ORDER BY score) AS quantiles
+FROM numeric_tv
+WHERE tv_name IS NOT NULL
+GROUP BY tv_name
+"""
+
+HP_MODES_SQL = f"""
+SELECT MODE() WITHIN GROUP (ORDER BY UPPER(TRIM(' ' FROM s.mbti))) AS mbti,
+       MODE() WITHIN GROUP (ORDER BY UPPER(TRIM(' ' FROM s.disc))) AS disc
+FROM public.profiles_psych s
+WHERE s.employee_id IN (
+    SELECT employee_id
+    FROM public.performance_yearly
+    WHERE rating = {HP_RATING}
+      AND year = (SELECT MAX(year) FROM public.performance_yearly)
+)
+"""
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class VacancyBenchmark:
+    vacancy_id: int
+    job_level: str
+    pillar_codes: list
+    unmatched_competencies: list
+    targets: dict                 # tv_name -> target (float / kode MBTI-DISC / None)
+    tv_weights: dict              # tgv_name -> {tv_name: weight}
+    group_weights: dict           # tgv_name -> tgv_weight
+    target_percentile: float = DEFAULT_TARGET_PERCENTILE
+    data_version: str = None
+    compiled_at: object = None
+    pillar_targets: dict = field(default_factory=dict)   # pilar wajib -> target
+
+    def profile_json(self):
+        return json.dumps({
+            'targets': self.targets,
+            'tv_weights': self.tv_weights,
+            'group_weights': self.group_weights,
+            'target_percentile': self.target_percentile,
+        })
+
+    @classmethod
+    def from_row(cls, row):
+        profile = row['profile']
+        if isinstance(profile, str):
+            profile = json.loads(profile)
+        codes = list(row['pillar_codes'] or [])
+        return cls(
+            vacancy_id=row['vacancy_id'],
+            job_level=row['job_level'],
+            pillar_codes=codes,
+            unmatched_competencies=list(row['unmatched_competencies'] or []),
+            targets=profile['targets'],
+            tv_weights=profile['tv_weights'],
+            group_weights=profile['group_weights'],
+            target_percentile=profile.get('target_percentile', DEFAULT_TARGET_PERCENTILE),
+            data_version=row['data_version'],
+            compiled_at=row.get('compiled_at'),
+            pillar_targets={code: profile['targets'].get(code) for code in codes},
+        )
+
+
+def _fractions():
+    return sorted({DEFAULT_TARGET_PERCENTILE, *LEVEL_TARGET_PERCENTILE.values()})
+
+
+def load_benchmark_stats(engine):
+    """
+    High-performer statistics every vacancy benchmark is compiled from.
+
+    Returns:
+        dict: quantiles {tv: {fraction: value}}, modes {mbti/disc: code},
+        mapping DataFrame (tgv_name, tv_name, tv_weight), group_weights {tgv: weight}
+    """
+    fractions = _fractions()
+    with lane_connection(engine, 'interactive') as conn:
+        rows = conn.execute(text(HP_STATS_SQL), {'fractions': fractions}).all()
+        modes = conn.execute(text(HP_MODES_SQL)).mappings().one()
+        mapping = pd.read_sql(text("""
+            SELECT tgv_name, tv_name, tv_weight::float AS tv_weight
+            FROM public.talent_variables_mapping
+        """), conn)
+        group_weights = conn.execute(text("""
+            SELECT tgv_name, tgv_weight::float AS tgv_weight
+            FROM public.talent_group_weights
+        """)).all()
+    return {
+        'quantiles': {
+            tv: dict(zip(fractions, quantiles or [None] * len(fractions)))
+            for tv, quantiles in rows
+        },
+        'modes': {tv: modes[tv] for tv in CATEGORICAL_TVS},
+        'mapping': mapping,
+        'group_weights': {tgv: weight for tgv, weight in group_weights},
+    }
+
+
+def _words(value):
+    return set(_WORD.findall(str(value or '').lower().replace('&', ' and ')))
+
+
+def map_competencies(competencies, pillars):
+    """
+    Map competency names to pillar codes.
+
+    Args:
+        competencies (list): Names, 'Name: description' strings or {'name': ...} dicts
+        pillars (DataFrame): pillar_code, pillar_label (dim_competency_pillars)
+
+    Returns:
+        (pillar_codes, unmatched): codes in first-seen order and names without a pillar
+    """
+    by_label = {str(label).strip().lower(): code for code, label in zip(pillars['pillar_code'], pillars['pillar_label'])}
+    by_code = {str(code).strip().lower(): code for code in pillars['pillar_code']}
+    label_words = [(code, _words(label)) for code, label in zip(pillars['pillar_code'], pillars['pillar_label'])]
+
+    codes, unmatched = [], []
+    for comp in competencies or []:
+        name = comp.get('name', '') if isinstance(comp, dict) else str(comp).split(':', 1)[0]
+        key = name.strip().lower()
+        if not key:
+            continue
+        code = by_label.get(key) or by_code.get(key)
+        if code is None:
+            # Nama dari AI bisa sedikit berbeda dari label ("Insight and Decision Sharpness")
+            words = _words(name)
+            scored = [(len(words & w) / len(words | w), c) for c, w in label_words if words | w]
+            best = max(scored, default=(0.0, None))
+            code = best[1] if best[0] >= MIN_LABEL_SIMILARITY else None
+        if code is None:
+            unmatched.append(name.strip())
+        elif code not in codes:
+            codes.append(code)
+    return codes, unmatched
+
+
+def compile_vacancy_benchmark(vacancy_id, job_level, competencies, stats, pillars, data_version=None):
+    """
+    Compile one vacancy into a benchmark profile (no database access).
+
+    Args:
+        vacancy_id (int): ID of the vacancy
+        job_level (str): Job level of the vacancy
+        competencies (list): Required competencies of the vacancy
+        stats (dict): From load_benchmark_stats()
+        pillars (DataFrame): pillar_code, pillar_label
+        data_version (str, optional): Data version the stats were loaded at
+
+    Returns:
+        VacancyBenchmark
+    """
+    codes, unmatched = map_competencies(competencies, pillars)
+    fraction = LEVEL_TARGET_PERCENTILE.get(job_level, DEFAULT_TARGET_PERCENTILE)
+    required = set(codes)
+    all_pillars = set(pillars['pillar_code'])
+
+    targets = {}
+    for tv, quantiles in stats['quantiles'].items():
+        target = quantiles.get(fraction if tv in required else DEFAULT_TARGET_PERCENTILE)
+        targets[tv] = None if target is None or pd.isna(target) else float(target)
+    for tv in CATEGORICAL_TVS:
+        targets[tv] = stats['modes'].get(tv)
+
+    tv_weights = {}
+    for tgv, tv, weight in stats['mapping'][['tgv_name', 'tv_name', 'tv_weight']].itertuples(index=False):
+        if pd.isna(tgv) or pd.isna(tv):
+            continue
+        if not pd.isna(weight) and codes and tv in all_pillars:
+            weight *= REQUIRED_PILLAR_WEIGHT if tv in required else OTHER_PILLAR_WEIGHT
+        group = tv_weights.setdefault(tgv, {})
+        if pd.isna(weight):
+            group.setdefault(tv, None)
+        else:
+            group[tv] = (group.get(tv) or 0.0) + float(weight)
+
+    return VacancyBenchmark(
+        vacancy_id=vacancy_id,
+        job_level=job_level,
+        pillar_codes=codes,
+        unmatched_competencies=unmatched,
+        targets=targets,
+        tv_weights=tv_weights,
+        group_weights=stats['group_weights'],
+        target_percentile=fraction,
+        data_version=data_version,
+        pillar_targets={code: targets.get(code) for code in codes},
+    )
+
+
+_bootstrapped = set()
+
+
+def _store(engine, benchmarks):
+    with lane_connection(engine, 'interactive') as conn:
+        # DDL sekali per engine per proses (lihat ensure_job_vacancies_schema)
+        if id(engine) not in _bootstrapped:
+            conn.execute(text(VACANCY_BENCHMARKS_DDL))
+            _bootstrapped.add(id(engine))
+        conn.execute(text("""
+            INSERT INTO public.vacancy_benchmarks
+                (vacancy_id, data_version, job_level, pillar_codes, unmatched_competencies, profile, compiled_at)
+            VALUES (:vacancy_id, :data_version, :job_level, :pillar_codes, :unmatched_competencies,
+                    CAST(:profile AS JSONB), now())
+            ON CONFLICT (vacancy_id) DO UPDATE
+            SET data_version           = EXCLUDED.data_version,
+                job_level              = EXCLUDED.job_level,
+                pillar_codes           = EXCLUDED.pillar_codes,
+                unmatched_competencies = EXCLUDED.unmatched_competencies,
+                profile                = EXCLUDED.profile,
+                compiled_at            = EXCLUDED.compiled_at
+        """), [{
+            'vacancy_id': b.vacancy_id,
+            'data_version': b.data_version,
+            'job_level': b.job_level,
+            'pillar_codes': b.pillar_codes,
+            'unmatched_competencies': b.unmatched_competencies,
+            'profile': b.profile_json(),
+        } for b in benchmarks])
+        conn.commit()
+
+
+# Hasil kompilasi per proses (halaman Performance): kegagalan yang terus berulang harus terlihat
+_compile_stats = {'compiled': 0, 'errors': 0, 'last_error': None}
+_compile_stats_lock = threading.Lock()
+
+
+def get_compile_stats():
+    """Benchmarks compiled and compile failures since the process started."""
+    with _compile_stats_lock:
+        return dict(_compile_stats)
+
+
+def compile_vacancy_benchmarks(engine, vacancy_ids, rows):
+    """
+    Compile and store benchmarks for just-saved vacancies (one stats load for all).
+
+    Args:
+        engine: SQLAlchemy engine
+        vacancy_ids (list): IDs returned by the insert
+        rows (list): The inserted job_vacancies rows (job_level, required_competencies)
+
+    Returns:
+        list of VacancyBenchmark
+    """
+    if not vacancy_ids:
+        return []
+    try:
+        data_version = get_matching_data_version(engine)
+        stats = load_benchmark_stats(engine)
+        pillars = get_dimension_registry(engine).frame('competency_pillars')
+        benchmarks = [
+            compile_vacancy_benchmark(vacancy_id, row.get('job_level'), row.get('required_competencies'),
+                                      stats, pillars, data_version)
+            for vacancy_id, row in zip(vacancy_ids, rows)
+        ]
+        _store(engine, benchmarks)
+    except Exception as e:
+        with _compile_stats_lock:
+            _compile_stats['errors'] += 1
+            _compile_stats['last_error'] = f"{type(e).__name__}: {e}"
+        raise
+    with _compile_stats_lock:
+        _compile_stats['compiled'] += len(benchmarks)
+    for benchmark in benchmarks:
+        _cache_put(engine, benchmark)
+    return benchmarks
+
+
+# -----------------------------------------------------------------------------
+# Cache compiled profile per vacancy_id (LRU, dicek ulang setelah CACHE_TTL_S)
+# -----------------------------------------------------------------------------
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_put(engine, benchmark):
+    with _cache_lock:
+        _cache[(id(engine), benchmark.vacancy_id)] = (benchmark, time.monotonic())
+        _cache.move_to_end((id(engine), benchmark.vacancy_id))
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _cache_get(engine, vacancy_id):
+    with _cache_lock:
+        entry = _cache.get((id(engine), vacancy_id))
+        if entry is None or time.monotonic() - entry[1] >= CACHE_TTL_S:
+            return None
+        _cache.move_to_end((id(engine), vacancy_id))
+        return entry[0]
+
+
+def get_vacancy_benchmark(engine, vacancy_id):
+    """
+    Compiled benchmark of a saved vacancy.
+
+    Served from the per-vacancy cache; otherwise read from vacancy_benchmarks,
+    and (re)compiled when it is missing (vacancy saved before compilation
+    existed) or was compiled from a different data version.
+
+    Returns:
+        VacancyBenchmark, or None when the vacancy does not exist
+    """
+    benchmark = _cache_get(engine, vacancy_id)
+    if benchmark is not None:
+        return benchmark
+
+    data_version = get_matching_data_version(engine)
+    try:
+        with lane_connection(engine, 'interactive') as conn:
+            row = conn.execute(text("""
+                SELECT vacancy_id, data_version, job_level, pillar_codes,
+                       unmatched_competencies, profile, compiled_at
+                FROM public.vacancy_benchmarks
+                WHERE vacancy_id = :vacancy_id
+            """), {'vacancy_id': vacancy_id}).mappings().first()
+    except ProgrammingError:
+        # Tabel belum ada: belum pernah ada vacancy yang dikompilasi
+        row = None
+
+    if row is not None and row['data_version'] == data_version:
+        benchmark = VacancyBenchmark.from_row(row)
+        _cache_put(engine, benchmark)
+        return benchmark
+
+    with lane_connection(engine, 'interactive') as conn:
+        vacancy = conn.execute(text("""
+            SELECT job_level, required_competencies
+            FROM public.job_vacancies
+            WHERE vacancy_id = :vacancy_id
+        """), {'vacancy_id': vacancy_id}).mappings().first()
+    if vacancy is None:
+        return None
+    return compile_vacancy_benchmarks(engine, [vacancy_id], [dict(vacancy)])[0]
+
+
+def score_vacancy(features, benchmark):
+    """
+    Final match rate of every employee in `features` against a compiled vacancy.
+
+    Returns:
+        ndarray of final_match_rate per employee (NaN = no score)
+    """
+    tvs = features.all_tvs
+    tv_index = {tv: t for t, tv in enumerate(tvs)}
+    tgvs = sorted(benchmark.tv_weights)
+
+    medians = np.array([[np.nan if benchmark.targets.get(tv) is None else benchmark.targets[tv]
+                         for tv in features.tvs]], dtype=float)
+    exists = np.array([[tv in benchmark.targets for tv in features.tvs]])
+    modes = [{tv: benchmark.targets.get(tv) for tv in CATEGORICAL_TVS}]
+
+    W = np.zeros((len(tvs), len(tgvs)))
+    W_valid = np.zeros((len(tvs), len(tgvs)))
+    for g, tgv in enumerate(tgvs):
+        for tv, weight in benchmark.tv_weights[tgv].items():
+            if tv in tv_index and weight is not None:
+                W[tv_index[tv], g] += weight
+                W_valid[tv_index[tv], g] = 1.0
+    group_weights = np.array([benchmark.group_weights.get(tgv, np.nan) for tgv in tgvs], dtype=float)
+
+    return score_benchmarks(features, medians, exists, modes, W, W_valid, group_weights)[:, 0]
+
+
+def rank_for_vacancy(engine, vacancy_id, limit=None):
+    """
+    Rank the workforce against a saved vacancy.
+
+    Returns:
+        (DataFrame, VacancyBenchmark): employees (dimension names attached)
+        with final_match_rate, best first; (None, None) when the vacancy does not exist
+    """
+    benchmark = get_vacancy_benchmark(engine, vacancy_id)
+    if benchmark is None:
+        return None, None
+    fit = get_fit_matrix(engine)
+    scores = score_vacancy(fit.features, benchmark)
+
+    result = fit.employees.copy()
+    result.insert(result.columns.get_loc('data_completeness_pct'), 'final_match_rate', np.round(scores, 2))
+    result = result[result['final_match_rate'].notna()].sort_values(
+        ['final_match_rate', 'employee_id'], ascending=[False, True], kind='stable'
+    )
+    if limit:
+        result = result.head(limit)
+    result = get_dimension_registry(engine).attach_names(result.reset_index(drop=True))
+    return result, benchmark
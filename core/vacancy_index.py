@@ -0,0 +1,294 @@
+# core/vacancy_index.py
+"""
+Near-duplicate detection for saved job vacancies.
+
+Every vacancy in job_vacancies gets a MinHash signature per field:
+
+    role              character trigrams of the role name ("Data Analyst" ~ "Data Analyst II")
+    responsibilities  word bigrams of the key responsibilities
+    competencies      competency names (the part before ':' in the stored TEXT[])
+
+Role and responsibility signatures are split into LSH bands, so a lookup only
+compares the vacancies that share at least one band bucket with the query
+instead of scanning the table. Candidates are ranked by the estimated Jaccard
+similarity of each field, weighted by FIELD_WEIGHTS over the fields present
+in the query (the Job Generator asks before generating, with only the role
+name and competencies).
+
+The index is built once per engine per process, updated in place by the
+save functions in core/job_generator.py, and catches up on vacancies saved by
+other processes. SERIAL ids are handed out before commit, so a vacancy can
+become visible after a higher id was already loaded; each catch-up therefore
+re-scans the last CATCH_UP_WINDOW ids below the highest loaded id and loads
+only the ids in that range the index does not have yet.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+
+from .db import lane_connection
+
+NUM_PERM = 64
+BANDS = 16                 # 16 band x 4 baris: kandidat mulai ~0.5 Jaccard
+ROWS_PER_BAND = NUM_PERM // BANDS
+LSH_FIELDS = ('role', 'responsibilities')
+FIELD_WEIGHTS = {'role': 0.5, 'responsibilities': 0.25, 'competencies': 0.25}
+
+DEFAULT_THRESHOLD = 0.6
+DEFAULT_LIMIT = 5
+DEFAULT_REFRESH_INTERVAL = 30   # detik antar catch-up dari database
+CATCH_UP_WINDOW = 1000          # id di bawah high-water mark yang dicek ulang (commit tidak berurutan)
+
+# Permutasi hash universal (a*x + b) mod P dengan seed tetap: signature stabil antar proses
+_PRIME = np.uint64((1 << 32) + 15)
+_rng = np.random.default_rng(20240607)
+_PERM_A = _rng.integers(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class SimilarVacancy:
+    vacancy_id: int
+    role_name: str
+    job_level: str
+    similarity: float
+    role_similarity: float
+    created_at: object = None
+
+
+def _words(value):
+    return _WORD.findall((value or '').lower())
+
+
+def role_shingles(role_name):
+    normalized = f" {' '.join(_words(role_name))} "
+    if len(normalized) < 3:
+        return set()
+    return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
+
+def responsibility_shingles(responsibilities):
+    shingles = set()
+    for item in responsibilities or []:
+        words = _words(item)
+        shingles.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+        if len(words) == 1:
+            shingles.add(words[0])
+    return shingles
+
+
+def competency_shingles(competencies):
+    shingles = set()
+    for comp in competencies or []:
+        name = comp.get('name', '') if isinstance(comp, dict) else str(comp).split(':', 1)[0]
+        name = ' '.join(_words(name))
+        if name:
+            shingles.add(name)
+    return shingles
+
+
+def minhash(shingles):
+    """MinHash signature (NUM_PERM uint64 values) of a shingle set, or None when empty."""
+    if not shingles:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    # (n_shingle, NUM_PERM); a, x < 2^32 sehingga a*x tidak overflow uint64
+    permuted = (np.multiply.outer(hashes, _PERM_A) % _PRIME + _PERM_B) % _PRIME
+    return permuted.min(axis=0)
+
+
+def signatures(role_name, responsibilities=(), competencies=()):
+    """Per-field MinHash signatures; fields without content are left out."""
+    sigs = {
+        'role': minhash(role_shingles(role_name)),
+        'responsibilities': minhash(responsibility_shingles(responsibilities)),
+        'competencies': minhash(competency_shingles(competencies)),
+    }
+    return {name: sig for name, sig in sigs.items() if sig is not None}
+
+
+def _band_keys(field_name, sig):
+    return [(field_name, band, sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes())
+            for band in range(BANDS)]
+
+
+class VacancyIndex:
+    """MinHash/LSH index of vacancies; add() and query() are thread-safe."""
+
+    def __init__(self):
+        self._docs = {}       # vacancy_id -> (meta, signatures)
+        self._buckets = {}    # (field, band, bytes) -> set(vacancy_id)
+        self._lock = threading.Lock()
+        self.max_vacancy_id = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, vacancy_id, role_name, job_level=None, key_responsibilities=(),
+            required_competencies=(), created_at=None):
+        if vacancy_id in self._docs:
+            return
+        sigs = signatures(role_name, key_responsibilities, required_competencies)
+        meta = {'role_name': role_name, 'job_level': job_level, 'created_at': created_at}
+        with self._lock:
+            if vacancy_id in self._docs:
+                return
+            self._docs[vacancy_id] = (meta, sigs)
+            for field_name in LSH_FIELDS:
+                if field_name in sigs:
+                    for key in _band_keys(field_name, sigs[field_name]):
+                        self._buckets.setdefault(key, set()).add(vacancy_id)
+            self.max_vacancy_id = max(self.max_vacancy_id, vacancy_id)
+
+    def ids_above(self, floor):
+        """Indexed vacancy ids greater than floor."""
+        with self._lock:
+            return [vacancy_id for vacancy_id in self._docs if vacancy_id > floor]
+
+    def query(self, role_name, competencies=(), responsibilities=(),
+              threshold=DEFAULT_THRESHOLD, limit=DEFAULT_LIMIT):
+        """
+        Saved vacancies similar to the given role.
+
+        Args:
+            role_name (str): Role name to look up
+            competencies (list, optional): Competency names or {'name': ...} dicts
+            responsibilities (list, optional): Key responsibilities, when already known
+            threshold (float): Minimum weighted similarity (0-1)
+            limit (int): Maximum number of results
+
+        Returns:
+            list of SimilarVacancy, most similar first
+        """
+        query = signatures(role_name, responsibilities, competencies)
+        if not query:
+            return []
+        weights = {name: FIELD_WEIGHTS[name] for name in query}
+        total_weight = sum(weights.values())
+
+        with self._lock:
+            candidates = set()
+            for field_name in LSH_FIELDS:
+                if field_name in query:
+                    for key in _band_keys(field_name, query[field_name]):
+                        candidates |= self._buckets.get(key, set())
+            docs = [(vacancy_id, self._docs[vacancy_id]) for vacancy_id in candidates]
+
+        results = []
+        for vacancy_id, (meta, sigs) in docs:
+            per_field = {
+                name: float(np.mean(sig == sigs[name])) if name in sigs else 0.0
+                for name, sig in query.items()
+            }
+            similarity = sum(weights[name] * per_field[name] for name in weights) / total_weight
+            if similarity >= threshold:
+                results.append(SimilarVacancy(
+                    vacancy_id=vacancy_id,
+                    role_name=meta['role_name'],
+                    job_level=meta['job_level'],
+                    similarity=similarity,
+                    role_similarity=per_field.get('role', 0.0),
+                    created_at=meta['created_at'],
+                ))
+        results.sort(key=lambda r: (-r.similarity, -r.vacancy_id))
+        return results[:limit]
+
+
+class _VacancyIndexService:
+    """One index per engine; loads new rows from job_vacancies at most every refresh_interval seconds."""
+
+    def __init__(self, engine, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self._engine = engine
+        self._refresh_interval = refresh_interval
+        self._index = VacancyIndex()
+        self._loaded_at = None
+        # vacancy_id tertinggi yang sudah dimuat dari database (vacancy dari proses ini
+        # bisa lebih tinggi, jadi catch-up tidak memakai max_vacancy_id index)
+        self._loaded_through = 0
+        self._load_lock = threading.Lock()
+
+    def get_index(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self._refresh_interval:
+            # Satu thread memuat; yang lain memakai index yang ada
+            if self._load_lock.acquire(blocking=self._loaded_at is None):
+                try:
+                    self._catch_up()
+                finally:
+                    self._load_lock.release()
+        return self._index
+
+    def _catch_up(self):
+        # Id di bawah high-water mark bisa baru ter-commit sekarang: cek ulang satu window,
+        # id yang sudah ada di index tidak dimuat lagi
+        floor = max(0, self._loaded_through - CATCH_UP_WINDOW)
+        try:
+            with lane_connection(self._engine, 'interactive') as conn:
+                rows = conn.execute(text("""
+                    SELECT vacancy_id, role_name, job_level, key_responsibilities,
+                           required_competencies, created_at
+                    FROM public.job_vacancies
+                    WHERE vacancy_id > :floor AND NOT (vacancy_id = ANY(CAST(:known AS integer[])))
+                    ORDER BY vacancy_id
+                """), {'floor': floor, 'known': self._index.ids_above(floor)}).mappings().all()
+        except ProgrammingError:
+            # Tabel belum ada (belum pernah ada vacancy yang disimpan)
+            rows = []
+        for row in rows:
+            self._index.add(**row)
+            self._loaded_through = max(self._loaded_through, row['vacancy_id'])
+        self._loaded_at = time.monotonic()
+
+    def record(self, vacancy_id, row, created_at=None):
+        self._index.add(vacancy_id, row['role_name'], row.get('job_level'),
+                        row.get('key_responsibilities'), row.get('required_competencies'),
+                        created_at)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def _service(engine):
+    key = id(engine)
+    service = _services.get(key)
+    if service is None:
+        with _services_lock:
+            service = _services.get(key)
+            if service is None:
+                service = _VacancyIndexService(engine)
+                _services[key] = service
+    return service
+
+
+def get_vacancy_index(engine):
+    """Return the process-wide vacancy index for this engine (loaded on first use)."""
+    return _service(engine).get_index()
+
+
+def find_similar_vacancies(engine, role_name, competencies=(), responsibilities=(),
+                           threshold=DEFAULT_THRESHOLD, limit=DEFAULT_LIMIT):
+    """Saved vacancies that are near-duplicates of the given role (see VacancyIndex.query)."""
+    return get_vacancy_index(engine).query(role_name, competencies, responsibilities,
+                                           threshold=threshold, limit=limit)
+
+
+def record_saved_vacancies(engine, vacancy_ids, rows, created_at=None):
+    """Add just-inserted job_vacancies rows to the index (no-op until the index is first used)."""
+    service = _services.get(id(engine))
+    if service is None:
+        return
+    created_at = created_at or [None] * len(vacancy_ids)
+    for vacancy_id, row, saved_at in zip(vacancy_ids, rows, created_at):
+        service.record(vacancy_id, row, saved_at)
@@ -0,0 +1,219 @@
+# core/vacancy_library.py
+"""
+Search and pagination over saved job vacancies (Vacancy Library page).
+
+Search uses the `search_vector` generated column of job_vacancies (role name,
+competencies, purpose, responsibilities and qualifications; see
+JOB_VACANCIES_MIGRATION in core/job_generator.py) through its GIN index. Typed
+text becomes a prefix tsquery, so results update while a word is still being
+typed. This module only reads: on a table created before the column existed,
+search falls back to ILIKE over the same text until the one-time migration
+has run (`python scripts/vacancy_search_report.py --migrate`).
+
+Pages are keyset-paginated on (created_at, vacancy_id), newest first: the next
+page starts after the last row of the current one, so page 1 and page 1,000
+cost the same index range scan instead of an OFFSET over every earlier row.
+Old tables can still have rows without created_at until the migration has
+backfilled them; those are paginated on vacancy_id alone.
+
+Facet counts per job level only change when vacancies are saved. The counts
+without a search text (shown on every page load) are cached and refreshed when
+the job_vacancies version changes; counts for typed searches are one GROUP BY
+per search and are not cached, so the cache cannot grow with every keystroke.
+"""
+
+import re
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+from sqlalchemy import text
+
+from .db import get_data_version, lane_connection
+from .swr_cache import get_swr_cache
+
+DEFAULT_PAGE_SIZE = 20
+SEARCH_BUDGET_MS = 50           # target latency per halaman hasil (100k vacancy)
+FACET_PROBE_INTERVAL = 30       # detik antar version probe untuk facet
+MAX_QUERY_TERMS = 8
+
+LIBRARY_COLUMNS = """
+    vacancy_id, role_name, job_level, role_purpose, key_responsibilities,
+    qualifications, required_competencies, created_at
+"""
+
+FALLBACK_SEARCH_TEXT = """concat_ws(' ', role_name, role_purpose, array_to_string(required_competencies, ' '),
+    array_to_string(key_responsibilities, ' '), array_to_string(qualifications, ' '))"""
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class VacancyPage:
+    rows: pd.DataFrame
+    next_cursor: tuple = None     # (created_at, vacancy_id) baris terakhir, None = halaman terakhir
+    duration_ms: float = 0.0
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+    @property
+    def over_budget(self):
+        return self.duration_ms > SEARCH_BUDGET_MS
+
+
+def to_prefix_tsquery(query):
+    """
+    to_tsquery() text for typed input: all terms required, the last one as a prefix.
+
+    Only word characters are kept, so user input can never inject tsquery
+    operators. Returns None for an empty search.
+    """
+    terms = _TERM.findall((query or '').lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return ' & '.join(terms[:-1] + [f"{terms[-1]}:*"])
+
+
+def _text_conditions(query, full_text):
+    if full_text:
+        tsquery = to_prefix_tsquery(query)
+        if not tsquery:
+            return [], {}
+        return ["search_vector @@ to_tsquery('english', :tsquery)"], {'tsquery': tsquery}
+    # Tabel lama tanpa search_vector: setiap term harus muncul di teks yang sama (tanpa index)
+    clauses, params = [], {}
+    for i, term in enumerate(_TERM.findall((query or '').lower())[:MAX_QUERY_TERMS]):
+        clauses.append(f"{FALLBACK_SEARCH_TEXT} ILIKE :term{i}")
+        params[f'term{i}'] = '%' + term.replace('_', r'\_') + '%'
+    return clauses, params
+
+
+def _conditions(query, job_level=None, full_text=True):
+    clauses, params = _text_conditions(query, full_text)
+    if job_level == '':
+        clauses.append("(job_level IS NULL OR job_level = '')")
+    elif job_level is not None:
+        clauses.append("job_level = :job_level")
+        params['job_level'] = job_level
+    return clauses, params
+
+
+_search_ready = set()
+
+
+def get_library_schema(engine):
+    """
+    State of public.job_vacancies for the library, without running any DDL.
+
+    Returns:
+        'ready' (migrated: search_vector and the created_at backfill/index),
+        'legacy' (table not migrated yet) or None (table does not exist yet)
+    """
+    key = id(engine)
+    if key in _search_ready:
+        return 'ready'
+    with lane_connection(engine, 'interactive') as conn:
+        objects = set(conn.execute(text("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'job_vacancies'
+            UNION ALL
+            SELECT indexname FROM pg_indexes
+            WHERE schemaname = 'public' AND tablename = 'job_vacancies'
+        """)).scalars())
+    if not objects:
+        return None
+    # Backfill created_at berjalan di transaksi migrasi yang sama dengan index ini
+    if not {'search_vector', 'job_vacancies_created_idx'} <= objects:
+        # Dicek ulang tiap kali: migrasi bisa dijalankan kapan saja dari script
+        return 'legacy'
+    _search_ready.add(key)
+    return 'ready'
+
+
+def search_vacancies(engine, query='', job_level=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One page of saved vacancies, newest first.
+
+    Args:
+        engine: SQLAlchemy engine
+        query (str): Free-text search (role, competencies, responsibilities, ...)
+        job_level (str, optional): Only this job level ('' = vacancies without a level)
+        cursor (tuple, optional): next_cursor of the previous page
+        page_size (int): Rows per page
+
+    Returns:
+        VacancyPage
+    """
+    schema = get_library_schema(engine)
+    if schema is None:
+        return VacancyPage(pd.DataFrame(columns=[c.strip() for c in LIBRARY_COLUMNS.split(',')]))
+    ready = schema == 'ready'
+    clauses, params = _conditions(query, job_level, full_text=ready)
+    # Tabel lama: created_at bisa NULL (perbandingan baris jadi NULL), keyset hanya pada vacancy_id
+    if cursor is not None and ready and cursor[0] is not None:
+        clauses.append("(created_at, vacancy_id) < (:after_created_at, :after_vacancy_id)")
+        params.update(after_created_at=cursor[0], after_vacancy_id=cursor[1])
+    elif cursor is not None:
+        clauses.append("vacancy_id < :after_vacancy_id")
+        params['after_vacancy_id'] = cursor[1]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    order_by = "created_at DESC, vacancy_id DESC" if ready else "vacancy_id DESC"
+
+    started = time.perf_counter()
+    with lane_connection(engine, 'interactive') as conn:
+        # Satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+        rows = pd.read_sql(text(f"""
+            SELECT {LIBRARY_COLUMNS}
+            FROM public.job_vacancies
+            {where}
+            ORDER BY {order_by}
+            LIMIT :limit
+        """), conn, params={**params, 'limit': page_size + 1})
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows.iloc[:page_size]
+        last = rows.iloc[-1]
+        created_at = last['created_at'] if ready and pd.notna(last['created_at']) else None
+        next_cursor = (created_at.to_pydatetime() if hasattr(created_at, 'to_pydatetime') else created_at,
+                       int(last['vacancy_id']))
+    return VacancyPage(rows.reset_index(drop=True), next_cursor, duration_ms)
+
+
+def _load_facets(engine, query='', full_text=True):
+    clauses, params = _conditions(query, full_text=full_text)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with lane_connection(engine, 'interactive') as conn:
+        rows = conn.execute(text(f"""
+            SELECT COALESCE(job_level, '') AS job_level, COUNT(*) AS n
+            FROM public.job_vacancies
+            {where}
+            GROUP BY 1
+            ORDER BY 2 DESC, 1
+        """), params).all()
+    return {level: int(n) for level, n in rows}
+
+
+def get_job_level_facets(engine, query=''):
+    """
+    Number of vacancies per job level matching the search ('' = no level).
+
+    Returns:
+        dict job_level -> count, largest first
+    """
+    schema = get_library_schema(engine)
+    if schema is None:
+        return {}
+    if _TERM.search(query or ''):
+        # Per teks pencarian: tidak di-cache (satu cache entry per ketikan akan tumbuh tanpa batas)
+        return _load_facets(engine, query, full_text=schema == 'ready')
+    cache = get_swr_cache(
+        f"vacancy_facets@{id(engine):x}",
+        lambda: _load_facets(engine),
+        version_probe=lambda: get_data_version(engine, ['job_vacancies']),
+        probe_interval=FACET_PROBE_INTERVAL,
+    )
+    return cache.get()
@@ -0,0 +1,78 @@
+# core/warmup.py
+"""
+Process warm-up hook.
+
+Fills the shared caches ahead of the pages: connecting to the database,
+loading every dim_* table, building the employee search index, running the
+default matching CTE and computing the employee x position fit matrix.
+Streamlit has no server-start hook, so start_warmup() is called once per
+process when the engine is first created (see core.db.get_engine), i.e. on the
+first visitor's first page load. The work runs on a background thread: the
+first visitor still waits for whatever that first page needs, but the steps it
+does not need overlap with it, and later pages and visitors find the caches
+already filled.
+
+Set TALENT_WARMUP=0 to disable it (e.g. for local debugging).
+"""
+
+import os
+import threading
+import time
+
+_status = {'state': 'idle', 'started_at': None, 'steps': []}
+_lock = threading.Lock()
+
+
+def _steps(engine):
+    # Import di sini: modul-modul ini sendiri mengimpor core.db
+    from .dimensions import get_dimension_registry
+    from .employee_search import get_employee_search_index
+    from .fit_matrix import get_fit_matrix
+    from .matching import get_default_ranking
+
+    return [
+        ('connect', lambda: engine.connect().close()),
+        ('dimensions', lambda: get_dimension_registry(engine).ensure_fresh()),
+        ('employee_search_index', lambda: get_employee_search_index(engine)),
+        ('default_ranking', lambda: get_default_ranking(engine)),
+        ('fit_matrix', lambda: get_fit_matrix(engine)),
+    ]
+
+
+def warm_up(engine):
+    """Run every warm-up step synchronously; a failing step does not stop the others."""
+    with _lock:
+        _status.update(state='running', started_at=time.time(), steps=[])
+    for name, step in _steps(engine):
+        started = time.perf_counter()
+        error = None
+        try:
+            step()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        with _lock:
+            _status['steps'].append({
+                'step': name,
+                'duration_s': round(time.perf_counter() - started, 3),
+                'error': error,
+            })
+    with _lock:
+        _status['state'] = 'done'
+
+
+def start_warmup(engine):
+    """Start warm_up(engine) on a daemon thread, once per process."""
+    if os.environ.get('TALENT_WARMUP', '1').strip().lower() in ('0', 'false', 'no', 'off'):
+        return False
+    with _lock:
+        if _status['state'] != 'idle':
+            return False
+        _status['state'] = 'starting'
+    threading.Thread(target=warm_up, args=(engine,), name="talent-warmup", daemon=True).start()
+    return True
+
+
+def get_warmup_status():
+    """State ('idle', 'starting', 'running', 'done') and per-step durations/errors."""
+    with _lock:
+        return {**_status, 'steps': list(_status['steps'])}
@@ -2,13 +2,22 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from core.db import get_engine
-from core.matching import run_standard_match_query, get_match_for_single_person, execute_matching, validate_employee_data
+from core.db import get_engine, lane_connection, WorkloadRejected
+from core.query_cancel import QueryCancelled
+from core.matching import execute_matching, validate_employee_data
 from core.matching_breakdown import get_detailed_match_breakdown
 from core.analysis_ui import render_detailed_analysis
+from core.dimensions import get_dimension_registry
+from core.employee_search import search_employees
+from core.vacancy_benchmark import REQUIRED_PILLAR_WEIGHT, rank_for_vacancy
+from core.query_metrics import set_query_tags
+from core.profiler import start_page_profiler, render_page_profile
 
 st.set_page_config(page_title="Talent Matching", page_icon="🎯", layout="wide")
+# Tag query DB dari halaman ini (core/query_metrics.py)
+set_query_tags(page="Talent Matching")
+# ?profile=1 (admin): sampling profiler untuk rerun ini (core/profiler.py)
+page_profiler = start_page_profiler()
 
 # Dark Theme CSS
 st.markdown("""
@@ -31,29 +40,74 @@ st.markdown("""
 st.title("▸ Talent Matching Engine")
 st.caption("Find the best internal talent based on benchmark profile.")
 
+engine = get_engine()
+
 # --- Workflow Bridge Logic ---
 if 'talent_match_vacancy_id' in st.session_state:
+    vacancy_id = st.session_state.talent_match_vacancy_id
     role_name = st.session_state.talent_match_role_name
     st.info(f"🔍 **Workflow Active:** Searching talent for new vacancy: **{role_name}**")
-    # Ensure Mode B is active (Mode A cleared)
-    # We don't clear manual_ids here to avoid state issues, but we guide the user.
-    # Ideally we would set filters based on the vacancy, but for now we just show the context.
 
-engine = get_engine()
+    # Vacancy dikompilasi menjadi benchmark saat disimpan (core/vacancy_benchmark.py);
+    # ranking seluruh karyawan = satu pass vektor atas fitur fit matrix
+    if st.session_state.get('vacancy_ranking_for') != vacancy_id:
+        vacancy_df = None
+        try:
+            with st.spinner(f"Ranking employees against the {role_name} vacancy..."):
+                vacancy_df, vacancy_benchmark = rank_for_vacancy(engine, vacancy_id)
+        except WorkloadRejected as busy:
+            st.warning(f"⏳ Server is busy with other matching runs: {busy}")
+        except Exception as e:
+            st.error(f"Failed to rank employees for this vacancy: {e}")
+        else:
+            if vacancy_df is None:
+                st.warning(f"Vacancy ID {vacancy_id} was not found.")
+        if vacancy_df is not None:
+            vacancy_df.insert(0, 'benchmark_position', f"Vacancy: {role_name}")
+            st.session_state.search_results = vacancy_df
+            st.session_state.current_page_b = 1
+            st.session_state.last_mode_used = 'B'
+            st.session_state.vacancy_ranking_for = vacancy_id
+            st.session_state.vacancy_benchmark = vacancy_benchmark
+
+    vacancy_benchmark = st.session_state.get('vacancy_benchmark')
+    if vacancy_benchmark is not None and vacancy_benchmark.vacancy_id == vacancy_id:
+        with st.expander("◆ Vacancy Benchmark", expanded=False):
+            pillars_df = get_dimension_registry(engine).frame('competency_pillars')
+            pillar_labels = dict(zip(pillars_df['pillar_code'], pillars_df['pillar_label']))
+            if vacancy_benchmark.pillar_codes:
+                st.markdown(
+                    f"Required competencies (target = high performer P{vacancy_benchmark.target_percentile * 100:.0f} "
+                    f"for {vacancy_benchmark.job_level or 'this level'}, weight ×{REQUIRED_PILLAR_WEIGHT:g}):"
+                )
+                st.dataframe(pd.DataFrame([
+                    {'pillar': pillar_labels.get(code, code), 'target': vacancy_benchmark.pillar_targets.get(code)}
+                    for code in vacancy_benchmark.pillar_codes
+                ]), hide_index=True, width="stretch")
+            else:
+                st.caption("No required competency matched a competency pillar; the default high performer benchmark is used.")
+            if vacancy_benchmark.unmatched_competencies:
+                st.caption("Not mapped to a pillar: " + ", ".join(vacancy_benchmark.unmatched_competencies))
+
+    if st.button("✕ Clear Vacancy Search"):
+        for key in ('talent_match_vacancy_id', 'talent_match_role_name', 'vacancy_ranking_for', 'vacancy_benchmark'):
+            st.session_state.pop(key, None)
+        st.session_state.search_results = None
+        st.rerun()
 
 # --- Memuat semua data untuk dropdown filter ---
-@st.cache_data(ttl=3600)
 def load_all_dimensions():
-    with engine.connect() as conn:
-        positions = pd.read_sql("SELECT position_id, name FROM dim_positions ORDER BY name", conn)
-        employees = pd.read_sql("SELECT employee_id, fullname FROM employees ORDER BY fullname", conn)
-        departments = pd.read_sql("SELECT department_id, name FROM dim_departments ORDER BY name", conn)
-        divisions = pd.read_sql("SELECT division_id, name FROM dim_divisions ORDER BY name", conn)
-        grades = pd.read_sql("SELECT grade_id, name FROM dim_grades ORDER BY name", conn)
-    return positions, employees, departments, divisions, grades
+    # Tabel dimensi dilayani oleh registry bersama (refresh hanya saat versi berubah)
+    registry = get_dimension_registry(engine)
+    return (
+        registry.frame('positions'),
+        registry.frame('departments'),
+        registry.frame('divisions'),
+        registry.frame('grades'),
+    )
 
 try:
-    positions_df, employees_df, departments_df, divisions_df, grades_df = load_all_dimensions()
+    positions_df, departments_df, divisions_df, grades_df = load_all_dimensions()
 except Exception as e:
     st.error(f"Failed to load filter data from database: {e}")
     st.stop()
@@ -69,14 +123,27 @@ with st.container():
         with st.container():
             st.subheader("Mode A: Select Employees")
 
-            # Siapkan daftar pilihan untuk multiselect
-            employee_options = [f"{row.employee_id} — {row.fullname}" for _, row in employees_df.iterrows()]
+            # Pencarian incremental: hanya top-N hasil yang dikirim ke browser
+            employee_query = st.text_input(
+                "Search employees",
+                placeholder="Type a name or employee ID...",
+                key="mode_a_employee_query"
+            )
+            matches_df = search_employees(engine, employee_query, limit=50)
+
+            # Pilihan yang sudah dipilih harus tetap ada di daftar options
+            already_selected = st.session_state.get('mode_a_selected_employees', [])
+            employee_options = list(already_selected) + [
+                label for label in (matches_df['employee_id'] + " — " + matches_df['fullname']).tolist()
+                if label not in already_selected
+            ]
 
             # Gunakan st.multiselect
             selected_employees_mode_a = st.multiselect(
                 "Select one or more employees",
                 options=employee_options,
-                help="Type to search, then select employees. Each selected employee will be analyzed for position match."
+                key="mode_a_selected_employees",
+                help="Type in the search box above, then select employees. Each selected employee will be analyzed for position match."
             )
 
             # Ekstrak hanya employee_id dari hasil pilihan
@@ -233,7 +300,7 @@ if run_button:
             st.success("Position recommendations successfully calculated.")
 
             # Ambil nama karyawan untuk tampilan yang lebih baik
-            with engine.connect() as conn:
+            with lane_connection(engine, 'interactive') as conn:
                 # Konversi manual_ids ke format yang sesuai untuk query ANY
                 emp_names = pd.read_sql("SELECT employee_id, fullname FROM employees WHERE employee_id = ANY(%s)",
                                         conn, params=(manual_ids,))
@@ -253,8 +320,16 @@ if run_button:
                             st.session_state.search_results = pd.DataFrame()
                         continue  # Lewati perhitungan untuk employee ini
 
-                    # Gunakan fungsi get_match_for_single_person untuk karyawan ini
-                    df_reco = get_match_for_single_person(engine, emp_id)
+                    # Rekomendasi posisi (Mode A) untuk karyawan ini
+                    # Lewat execute_matching agar run identik yang bersamaan berbagi satu komputasi
+                    try:
+                        df_reco = execute_matching(engine, [emp_id], {}, use_manual_as_benchmark=False)
+                    except QueryCancelled:
+                        # Run ini sudah digantikan oleh rerun; query lamanya dibatalkan di server
+                        st.stop()
+                    except WorkloadRejected as busy:
+                        st.warning(f"⏳ Server is busy with other matching runs: {busy}")
+                        break
                     if not df_reco.empty:
                         # Tampilkan header dengan nama karyawan
                         st.subheader(f"Position Recommendations for {emp_name}")
@@ -323,16 +398,11 @@ if run_button:
             st.success("Ranking of all employees based on manual benchmark is ready to display.")
             with st.spinner("Running Talent Matching algorithm with manual benchmark..."):
                 try:
-                    result_df = run_standard_match_query(
+                    result_df = execute_matching(
                         engine,
-                        manual_ids_for_benchmark=manual_ids,
+                        manual_ids=manual_ids,
                         filters={},
-                        search_name=None,
-                        rating_range=(5, 5),  # HP rating fixed = 5 (High Performer) based on system design
-                        limit=10000,
-                        manual_ids_to_filter=None,
-                        use_manual_as_benchmark=True,
-                        min_rating=min_rating
+                        use_manual_as_benchmark=True
                     )
 
                     # Save results to session state and reset page to 1
@@ -373,7 +443,7 @@ if run_button:
 
                                     # Menampilkan konteks benchmark
                                     # Get benchmark employee names
-                                    with engine.connect() as conn:
+                                    with lane_connection(engine, 'interactive') as conn:
                                         benchmark_names = pd.read_sql(
                                             "SELECT fullname FROM employees WHERE employee_id = ANY(%s)",
                                             conn, params=(manual_ids,)
@@ -507,6 +577,12 @@ if run_button:
                 }
             </style>
             """, unsafe_allow_html=True)
+                except QueryCancelled:
+                    # Run ini sudah digantikan oleh rerun; query lamanya dibatalkan di server
+                    st.stop()
+                except WorkloadRejected as busy:
+                    # Lane 'heavy' penuh: beri tahu user, jangan blokir aplikasi
+                    st.warning(f"⏳ Server is busy with other matching runs: {busy}")
                 except Exception as e:
                     st.error("Terjadi kesalahan saat menjalankan query.")
                     st.exception(e)
@@ -515,16 +591,11 @@ if run_button:
             st.success("Filter-based benchmark successfully used for ranking calculation.")
             with st.spinner("Running Talent Matching algorithm with filter benchmark..."):
                 try:
-                    result_df = run_standard_match_query(
+                    result_df = execute_matching(
                         engine,
-                        manual_ids_for_benchmark=None,
+                        manual_ids=None,
                         filters=filters,
-                        search_name=None,
-                        rating_range=(5, 5),  # HP rating fixed = 5 (High Performer) based on system design
-                        limit=10000,
-                        manual_ids_to_filter=None,
-                        use_manual_as_benchmark=False,
-                        min_rating=min_rating
+                        use_manual_as_benchmark=False
                     )
 
                     # Save results to session state and reset page to 1
@@ -709,6 +780,12 @@ if run_button:
                 }
             </style>
             """, unsafe_allow_html=True)
+                except QueryCancelled:
+                    # Run ini sudah digantikan oleh rerun; query lamanya dibatalkan di server
+                    st.stop()
+                except WorkloadRejected as busy:
+                    # Lane 'heavy' penuh: beri tahu user, jangan blokir aplikasi
+                    st.warning(f"⏳ Server is busy with other matching runs: {busy}")
                 except Exception as e:
                     st.error("Terjadi kesalahan saat menjalankan query.")
                     st.exception(e)
@@ -717,16 +794,11 @@ if run_button:
             st.info("Default benchmark used (High Performers rating ≥5).")
             with st.spinner("Running Talent Matching algorithm with default benchmark..."):
                 try:
-                    result_df = run_standard_match_query(
+                    result_df = execute_matching(
                         engine,
-                        manual_ids_for_benchmark=None,
+                        manual_ids=None,
                         filters={},
-                        search_name=None,
-                        rating_range=(5, 5),  # HP rating fixed = 5 (High Performer) based on system design
-                        limit=10000,
-                        manual_ids_to_filter=None,
-                        use_manual_as_benchmark=False,
-                        min_rating=min_rating
+                        use_manual_as_benchmark=False
                     )
 
                     # Save results to session state and reset page to 1
@@ -883,6 +955,12 @@ if run_button:
                 }
             </style>
             """, unsafe_allow_html=True)
+                except QueryCancelled:
+                    # Run ini sudah digantikan oleh rerun; query lamanya dibatalkan di server
+                    st.stop()
+                except WorkloadRejected as busy:
+                    # Lane 'heavy' penuh: beri tahu user, jangan blokir aplikasi
+                    st.warning(f"⏳ Server is busy with other matching runs: {busy}")
                 except Exception as e:
                     st.error("An error occurred while running query.")
                     st.exception(e)
@@ -1083,3 +1161,6 @@ st.markdown("""
     <small>Talent Intelligence Dashboard © 2025. All rights reserved.</small>
 </div>
 """, unsafe_allow_html=True)
+
+# Hotspot Python rerun ini (hanya saat ?profile=1)
+render_page_profile(page_profiler)
@@ -1,9 +1,17 @@
 import streamlit as st
-import google.generativeai as genai
-from core.job_generator import save_job_vacancy
+from core.job_generator import save_job_vacancy, save_job_vacancies_bulk, build_enrichment_prompt, build_refinement_prompt, load_job_vacancy
+from core.job_schema import complete_job_profile
+from core.vacancy_index import find_similar_vacancies
+from core.job_templates import build_template_profile
+from core.job_batch import read_batch_csv, batch_csv_template, run_batch, DEFAULT_CONCURRENCY, DEFAULT_RATE_PER_MINUTE, DEFAULT_MAX_RETRIES, DEFAULT_TIMEOUT_S
+from core.llm_hedge import hedged_stream_text
+from core.partial_json import IncrementalJSONParser, PartialJSONError
 import json
 from datetime import datetime
 from core.db import get_engine
+from core.dimensions import get_dimension_registry
+from core.query_metrics import set_query_tags
+from core.profiler import start_page_profiler, render_page_profile
 import pandas as pd
 
 # Page configuration
@@ -12,6 +20,10 @@ st.set_page_config(
     page_icon="🤖",
     layout="wide"
 )
+# Tag query DB dari halaman ini (core/query_metrics.py)
+set_query_tags(page="Job Generator")
+# ?profile=1 (admin): sampling profiler untuk rerun ini (core/profiler.py)
+page_profiler = start_page_profiler()
 
 st.title("🤖 AI Job Role Generator")
 st.markdown("""
@@ -64,16 +76,12 @@ if 'generated_profile' not in st.session_state:
 if 'edit_mode' not in st.session_state:
     st.session_state.edit_mode = False
 
-# Fetch competencies from database
-@st.cache_data
+# Fetch competencies from the shared dimension registry
 def get_competency_options():
     try:
         engine = get_engine()
-        with engine.connect() as conn:
-            # Get the competency pillars from the database
-            df = pd.read_sql("SELECT pillar_code, pillar_label FROM public.dim_competency_pillars", conn)
-            # Return both code and label options
-            return df
+        # Return both code and label options
+        return get_dimension_registry(engine).frame('competency_pillars')
     except Exception as e:
         st.error(f"Error loading competency options: {str(e)}")
         return pd.DataFrame(columns=['pillar_code', 'pillar_label'])
@@ -148,6 +156,102 @@ def format_as_markdown(data):
             
     return md
 
+# --- Live preview while the AI response streams in ---
+def _preview_sections(profile, complete_keys):
+    # Markdown per section dari dokumen JSON parsial (kursor ▌ = section masih ditulis)
+    def cursor(key):
+        return "" if key in complete_keys else " ▌"
+
+    sections = []
+    if profile.get("role_purpose"):
+        sections.append(f"**📌 Role Purpose**\n\n{profile['role_purpose']}{cursor('role_purpose')}")
+    if profile.get("key_responsibilities"):
+        items = "\n".join(f"{i}. {r}" for i, r in enumerate(profile["key_responsibilities"], 1) if isinstance(r, str))
+        sections.append(f"**🎯 Key Responsibilities**{cursor('key_responsibilities')}\n\n{items}")
+    quals = profile.get("qualifications")
+    if isinstance(quals, dict) and quals:
+        lines = []
+        if quals.get("education"):
+            lines.append(f"- **📚 Education:** {quals['education']}")
+        if quals.get("experience"):
+            lines.append(f"- **💼 Experience:** {quals['experience']}")
+        if quals.get("skills"):
+            lines.append("- **⚡ Key Skills:** " + " ".join(f"`{skill}`" for skill in quals["skills"] if isinstance(skill, str)))
+        sections.append(f"**🎓 Qualifications**{cursor('qualifications')}\n\n" + "\n".join(lines))
+    comps = [c for c in profile.get("required_competencies", []) if isinstance(c, dict) and c.get("name")]
+    if comps:
+        items = "\n".join(f"- **{c['name']}**: {c.get('description', '')}" for c in comps)
+        sections.append(f"**💪 Required Competencies**{cursor('required_competencies')}\n\n{items}")
+    return sections
+
+
+def stream_job_profile(stream):
+    """
+    Consume an LLM stream, rendering each profile section as soon as it is parseable.
+
+    Returns the complete response text; the preview is cleared afterwards so the
+    regular view (or a rerun) takes over.
+    """
+    preview = st.empty()
+    parser = IncrementalJSONParser()
+    rendered = None
+    restarts = 0
+    for chunk in stream:
+        if stream.restarts != restarts:
+            # Deadline lewat: respons diganti fallback model / draft, mulai parse dari awal
+            restarts = stream.restarts
+            parser, rendered = IncrementalJSONParser(), None
+        if parser is None:
+            continue
+        try:
+            result = parser.feed(chunk)
+        except PartialJSONError:
+            # Respons bukan JSON valid: hentikan preview, error ditampilkan setelah parse penuh
+            parser = None
+            continue
+        if not isinstance(result.value, dict):
+            continue
+        sections = _preview_sections(result.value, result.complete_keys)
+        if sections and sections != rendered:
+            with preview.container(border=True):
+                for section in sections:
+                    st.markdown(section)
+            rendered = sections
+    preview.empty()
+    return stream.text
+
+
+def finish_job_profile(stream, previous, job_context=""):
+    """
+    Validate and repair a streamed profile (core/job_schema.py).
+
+    Missing sections are re-requested one at a time with a small prompt,
+    within what is left of the stream's deadline; a section that still fails
+    keeps its previous value.
+    """
+    def request_section(prompt):
+        remaining = stream.remaining_s()
+        if remaining <= 0:
+            raise TimeoutError("No time left for section re-requests")
+        section_stream = hedged_stream_text(prompt, deadline_s=remaining)
+        # Konsumsi penuh; .text hanya berisi jawaban dari sumber terakhir (bukan chunk attempt yang ditinggalkan)
+        for _ in section_stream:
+            pass
+        return section_stream.text
+
+    check = complete_job_profile(
+        stream.text,
+        request=request_section,
+        role_name=previous.get('position_name', ''),
+        job_level=previous.get('level', ''),
+        job_context=job_context,
+        fallback=previous,
+    )
+    patched = [r for r in check.repairs if r.startswith(("re-requested", "kept previous"))]
+    if patched:
+        st.toast("Fixed an incomplete AI response: " + ", ".join(patched), icon="🔧")
+    return check.profile
+
 # --- Input Form with 3 columns ---
 with st.form("job_generator_form"):
     col1, col2, col3 = st.columns(3)
@@ -169,8 +273,93 @@ with st.form("job_generator_form"):
         placeholder="e.g., Team size, industry, specific requirements, company culture...",
         height=150)
 
-    # Generate button
-    submitted = st.form_submit_button("▸ Generate Job Profile with AI", type="primary")
+    # Generate button (draft dari template, instan; AI hanya untuk enrichment opsional)
+    submitted = st.form_submit_button("▸ Generate Job Profile", type="primary")
+
+# --- Batch Mode: many roles from one CSV (core/job_batch.py) ---
+with st.expander("📦 Batch Mode (CSV)"):
+    st.caption(
+        "Generate profiles for many roles at once. CSV columns: role_name, job_level, "
+        "competencies (separated by ';'), context."
+    )
+    st.download_button("↓ Download CSV Template", data=batch_csv_template(),
+                       file_name="job_batch_template.csv", mime="text/csv")
+    batch_file = st.file_uploader("Roles CSV", type=["csv"], key="batch_csv")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        batch_concurrency = st.number_input("Parallel requests", min_value=1, max_value=16, value=DEFAULT_CONCURRENCY)
+    with col2:
+        batch_rate = st.number_input("Requests / minute", min_value=1, max_value=600, value=DEFAULT_RATE_PER_MINUTE)
+    with col3:
+        batch_retries = st.number_input("Retries", min_value=0, max_value=10, value=DEFAULT_MAX_RETRIES)
+    with col4:
+        batch_timeout = st.number_input("Timeout (s)", min_value=5, max_value=600, value=DEFAULT_TIMEOUT_S)
+
+    if batch_file is not None:
+        batch_items, batch_errors = read_batch_csv(batch_file.getvalue())
+        for error in batch_errors:
+            st.warning(f"⚠️ {error}")
+        st.write(f"**{len(batch_items)}** roles ready")
+
+        if batch_items and st.button("▸ Generate All", type="primary", key="batch_generate"):
+            progress_bar = st.progress(0.0, text="Generating job profiles...")
+
+            def on_progress(done, total, result):
+                status = "✅" if result.ok else "❌"
+                progress_bar.progress(done / total, text=f"{status} {result.item.role_name} ({done}/{total})")
+
+            st.session_state.batch_results = run_batch(
+                batch_items,
+                concurrency=int(batch_concurrency),
+                rate_per_minute=float(batch_rate),
+                max_retries=int(batch_retries),
+                timeout_s=float(batch_timeout),
+                progress=on_progress,
+            )
+            st.session_state.batch_saved_ids = None
+            progress_bar.empty()
+
+    batch_results = st.session_state.get("batch_results")
+    if batch_results:
+        succeeded = [r for r in batch_results if r.ok]
+        st.write(f"✅ {len(succeeded)} / {len(batch_results)} profiles generated")
+        st.dataframe(
+            pd.DataFrame([{
+                "row": r.item.row,
+                "role_name": r.item.role_name,
+                "job_level": r.item.job_level,
+                "status": "ok" if r.ok else "failed",
+                "attempts": r.attempts,
+                "cached": r.cached,
+                "duration_s": round(r.duration_s, 1),
+                "error": r.error,
+            } for r in batch_results]),
+            hide_index=True,
+            width="stretch",
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "↓ Download Profiles (JSON)",
+                data=json.dumps([r.to_vacancy() for r in succeeded], indent=2),
+                file_name="job_profiles_batch.json",
+                mime="application/json",
+                width="stretch",
+            )
+        with col2:
+            if st.session_state.get("batch_saved_ids"):
+                st.success(f"✅ Saved {len(st.session_state.batch_saved_ids)} vacancies")
+            elif succeeded and st.button("▪ Save All to Database", type="primary", width="stretch", key="batch_save"):
+                # Satu bulk INSERT untuk semua profil yang berhasil
+                vacancy_ids = save_job_vacancies_bulk([r.to_vacancy() for r in succeeded])
+                if vacancy_ids:
+                    st.session_state.batch_saved_ids = vacancy_ids
+                    st.toast(f"✅ {len(vacancy_ids)} vacancies saved!", icon="🎉")
+                    st.rerun()
+                else:
+                    st.error("❌ Failed to save vacancies to database")
 
 # Handle form submission
 if submitted:
@@ -189,92 +378,19 @@ if submitted:
         for error in errors:
             st.error(error)
     else:
-        with st.spinner("Generating job profile..."):
-            try:
-                # Configure API (this will need to be set up in secrets.toml)
-                api_key = st.secrets["GEMINI_API_KEY"]
-                genai.configure(api_key=api_key)
-
-                # Initialize the model
-                model = genai.GenerativeModel('gemini-2.5-flash-lite')
-
-                # Prepare competency context
-                competency_context = ", ".join(selected_competencies) if selected_competencies else "No specific competencies mentioned"
-
-                # Create a detailed prompt for the AI
-                prompt = f"""
-You are an expert HR consultant.
-
-TASK: Create a **concise, high-impact** job description for:
-- **Position:** {role_name}
-- **Level:** {job_level}
-- **Key Competencies:** {competency_context}
-- **Context:** {job_context if job_context else 'Standard corporate environment'}
-
-INSTRUCTIONS:
-1. **Tone**: Professional, punchy, and direct. Avoid fluff.
-2. **Role Purpose**: 2-3 powerful sentences defining the role's core value.
-3. **Qualifications**: Be specific. Don't just list "Degree"; say "Bachelor's in X required". Don't just say "Coding"; say "Proficiency in Python/SQL".
-4. **Competencies**: Don't just state the level. Explain **briefly** how this skill is applied in THIS specific role.
-
-REQUIRED OUTPUT (JSON format):
-{{
-  "position_name": "{role_name}",
-  "level": "{job_level}",
-  "role_purpose": "Strategic summary of the role's purpose.",
-  "key_responsibilities": [
-    "Action-oriented responsibility 1",
-    "Action-oriented responsibility 2",
-    "... (6-8 items)"
-  ],
-  "qualifications": {{
-    "education": "Specific degree requirement (e.g., 'Bachelor's in Computer Science or equivalent')",
-    "experience": "Specific experience requirement (e.g., '5+ years in product management')",
-    "skills": [
-      "Hard Skill 1",
-      "Hard Skill 2",
-      "..."
-    ]
-  }},
-  "required_competencies": [
-    {{
-      "name": "Competency Name",
-      "description": "Brief, specific explanation of how this skill is applied in this role (1 sentence)."
-    }},
-    "... (6-8 items)"
-  ]
-}}
-
-IMPORTANT:
-- Return ONLY valid JSON.
-- NO Success Metrics.
-- Competencies must have 'description' explaining the application, NOT just 'level'.
-"""
-
-                # Generate content
-                response = model.generate_content(prompt)
-
-                # Parse the response
-                content = response.text.strip()
-
-                # Remove any markdown formatting if present
-                if content.startswith("```json"):
-                    content = content[7:]  # Remove ```json
-                if content.endswith("```"):
-                    content = content[:-3]  # Remove ```
-
-                # Parse JSON
-                job_data = json.loads(content)
-
-                # Store in session state
-                st.session_state.generated_profile = job_data
-
-                # Show success toast
-                st.toast("✅ Job description generated successfully!", icon="🎉")
-
-            except Exception as e:
-                st.error(f"Error generating job profile: {str(e)}")
-                st.session_state.generated_profile = None
+        # Draft dari phrase library per pilar & level (core/job_templates.py), tanpa panggilan model
+        pillar_codes = dict(zip(competency_df['pillar_label'], competency_df['pillar_code'])) if not competency_df.empty else {}
+        pillars = [(pillar_codes.get(label, label), label) for label in selected_competencies]
+        st.session_state.generated_profile = build_template_profile(role_name, job_level, pillars, job_context)
+        st.session_state.profile_source = 'template'
+        st.session_state.edit_mode = False
+        st.session_state.pop('reused_vacancy_id', None)
+        # Vacancy tersimpan yang hampir sama (MinHash/LSH, core/vacancy_index.py)
+        try:
+            st.session_state.similar_vacancies = find_similar_vacancies(get_engine(), role_name, selected_competencies)
+        except Exception:
+            st.session_state.similar_vacancies = []
+        st.toast("✅ Draft job profile ready", icon="⚡")
 
 # Toggle function for edit mode
 def toggle_edit_mode():
@@ -287,6 +403,76 @@ if st.session_state.generated_profile:
 
     # Action buttons at top (2 columns: Edit | Save)
     st.markdown("### ◆ Generated Job Profile")
+
+    # Near-duplicate: tawarkan reuse/adapt vacancy yang sudah ada sebelum enrichment AI
+    similar = st.session_state.get('similar_vacancies') or []
+    if similar and st.session_state.get('profile_source') == 'template':
+        with st.container(border=True):
+            st.warning(f"⚠️ {len(similar)} similar vacanc{'y' if len(similar) == 1 else 'ies'} already saved. "
+                       "Reuse or adapt one instead of generating a new profile.")
+            for match in similar:
+                col_info, col_reuse, col_adapt = st.columns([4, 1, 1])
+                with col_info:
+                    created = f" · saved {match.created_at:%Y-%m-%d}" if match.created_at else ""
+                    st.markdown(f"**{match.role_name}** ({match.job_level or '-'}) · ID {match.vacancy_id} · "
+                                f"{match.similarity:.0%} similar{created}")
+                with col_reuse:
+                    reuse_clicked = st.button("↺ Reuse", key=f"reuse_{match.vacancy_id}", width="stretch")
+                with col_adapt:
+                    adapt_clicked = st.button("✏️ Adapt", key=f"adapt_{match.vacancy_id}", width="stretch")
+                if reuse_clicked or adapt_clicked:
+                    existing = load_job_vacancy(match.vacancy_id)
+                    if existing:
+                        st.session_state.generated_profile = existing
+                        st.session_state.profile_source = 'existing'
+                        st.session_state.reused_vacancy_id = match.vacancy_id
+                        st.session_state.similar_vacancies = []
+                        # Adapt: langsung buka editor; simpan hasilnya sebagai vacancy baru
+                        st.session_state.edit_mode = bool(adapt_clicked)
+                        st.rerun()
+
+    if st.session_state.get('profile_source') == 'existing' and st.session_state.get('reused_vacancy_id'):
+        with st.container(border=True):
+            col_info, col_match = st.columns([3, 1])
+            with col_info:
+                st.info(f"Loaded saved vacancy ID {st.session_state.reused_vacancy_id}. "
+                        "Use it as is, or edit/refine it and save it as a new vacancy.")
+            with col_match:
+                if st.button("▸ Find Matching Talents", type="primary", width="stretch", key="match_reused"):
+                    st.session_state.talent_match_vacancy_id = st.session_state.reused_vacancy_id
+                    st.session_state.talent_match_role_name = job_data.get('position_name', role_name)
+                    st.switch_page("pages/1_Talent_Matching.py")
+
+    # Draft template: enrichment dengan AI bersifat opsional
+    if st.session_state.get('profile_source') == 'template':
+        with st.container(border=True):
+            col_info, col_enrich = st.columns([3, 1])
+            with col_info:
+                st.info("Draft assembled from the competency phrase library. Enrich it with AI for role-specific wording.")
+                # Respons identik diambil dari cache (core/llm_cache.py)
+                use_cached = st.checkbox("Reuse cached AI response if available", value=True,
+                    help="Uncheck to force a fresh AI response for the same draft")
+            with col_enrich:
+                enrich_clicked = st.button("✨ Enrich with AI", type="primary", width="stretch")
+            if enrich_clicked:
+                with st.spinner("Enriching job profile..."):
+                    try:
+                        # Section tampil selama streaming (lihat stream_job_profile); dengan deadline,
+                        # hedged request dan fallback ke draft template (core/llm_hedge.py)
+                        response = hedged_stream_text(build_enrichment_prompt(job_data, job_context),
+                                                      use_cache=use_cached, fallback=lambda: json.dumps(job_data))
+                        stream_job_profile(response)
+                        enriched = finish_job_profile(response, job_data, job_context)
+                        if response.source == 'fallback':
+                            st.warning("The AI did not answer in time, so the template draft was kept. Please try again.")
+                        else:
+                            st.session_state.generated_profile = enriched
+                            st.session_state.profile_source = 'ai'
+                            st.session_state.edit_mode = False
+                            st.toast("✅ Job profile enriched with AI", icon="🎉")
+                            st.rerun()
+                    except Exception as e:
+                        st.error(f"AI enrichment failed: {str(e)}")
     col1, col2 = st.columns(2)
     
     with col1:
@@ -459,41 +645,17 @@ if st.session_state.generated_profile:
             else:
                 with st.spinner("Refining job profile..."):
                     try:
-                        # Configure API
-                        api_key = st.secrets["GEMINI_API_KEY"]
-                        genai.configure(api_key=api_key)
-                        model = genai.GenerativeModel('gemini-2.5-flash-lite')
-                        
-                        # Create refinement prompt
-                        refinement_prompt = f"""
-You are an expert HR consultant.
-TASK: Refine the following job description based on user feedback.
-
-CURRENT PROFILE (JSON):
-{json.dumps(job_data)}
-
-USER FEEDBACK:
-"{refinement_instructions}"
-
-INSTRUCTIONS:
-1. Apply the user's feedback strictly.
-2. Maintain the same JSON structure.
-3. Keep the "Concise, Punchy, Direct" tone.
-
-REQUIRED OUTPUT (JSON format):
-(Same structure as before)
-"""
-                        response = model.generate_content(refinement_prompt)
-                        content = response.text.strip()
-                        if content.startswith("```json"):
-                            content = content[7:]
-                        if content.endswith("```"):
-                            content = content[:-3]
-                            
-                        new_job_data = json.loads(content)
-                        st.session_state.generated_profile = new_job_data
-                        st.toast("✓ Profile refined successfully!", icon="◆")
-                        st.rerun()
+                        refinement_prompt = build_refinement_prompt(job_data, refinement_instructions)
+                        response = hedged_stream_text(refinement_prompt, fallback=lambda: json.dumps(job_data))
+                        stream_job_profile(response)
+                        new_job_data = finish_job_profile(response, job_data)
+                        if response.source == 'fallback':
+                            st.warning("The AI did not answer in time, so the profile was not changed. Please try again.")
+                        else:
+                            st.session_state.generated_profile = new_job_data
+                            st.session_state.profile_source = 'ai'
+                            st.toast("✅ Profile refined successfully!", icon="✨")
+                            st.rerun()
                     except Exception as e:
                         st.error(f"Refinement failed: {str(e)}")
 
@@ -560,6 +722,7 @@ REQUIRED OUTPUT (JSON format):
                 # Store vacancy_id for talent matching link - FEATURE 1
                 st.session_state.last_saved_vacancy_id = vacancy_id
                 st.session_state.show_reset_button = True
+                st.session_state.pop('reused_vacancy_id', None)
             else:
                 st.error("❌ Failed to save vacancy to database")
         except Exception as e:
@@ -585,6 +748,9 @@ REQUIRED OUTPUT (JSON format):
                 # Clear the session state to reset the form
                 del st.session_state.generated_profile
                 del st.session_state.show_reset_button
+                st.session_state.pop('profile_source', None)
+                st.session_state.pop('similar_vacancies', None)
+                st.session_state.pop('reused_vacancy_id', None)
                 if 'edit_mode' in st.session_state:
                     del st.session_state.edit_mode
                 if 'last_saved_vacancy_id' in st.session_state:
@@ -610,4 +776,7 @@ st.markdown("""
 <div style='text-align: center; color: #6B7B94; padding: 2rem 0;'>
     <small>Talent Intelligence Dashboard © 2025. All rights reserved.</small>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Hotspot Python rerun ini (hanya saat ?profile=1)
+render_page_profile(page_profiler)
@@ -2,6 +2,11 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from core.db import get_engine
+from core.employee_search import search_employees, get_employee_search_index
+from core.profile_prefetch import get_profile_prefetcher, predict_next_profiles
+from core.admin import is_admin_enabled
+from core.query_metrics import set_query_tags
+from core.profiler import start_page_profiler, render_page_profile
 import numpy as np
 
 # Page config
@@ -10,6 +15,10 @@ st.set_page_config(
     page_icon="●",
     layout="wide"
 )
+# Tag query DB dari halaman ini (core/query_metrics.py)
+set_query_tags(page="Employee Profile")
+# ?profile=1 (admin): sampling profiler untuk rerun ini (core/profiler.py)
+page_profiler = start_page_profiler()
 
 # Dark RPG Theme CSS
 st.markdown("""
@@ -209,122 +218,57 @@ def get_db_engine():
 engine = get_db_engine()
 
 # Data loading functions
-@st.cache_data(ttl=300)
-def load_employee_list():
-    query = """
-    SELECT 
-        e.employee_id,
-        e.fullname,
-        pos.name as position_name,
-        dept.name as department_name,
-        g.name as grade_name
-    FROM employees e
-    LEFT JOIN dim_positions pos ON e.position_id = pos.position_id
-    LEFT JOIN dim_departments dept ON e.department_id = dept.department_id
-    LEFT JOIN dim_grades g ON e.grade_id = g.grade_id
-    ORDER BY e.fullname
-    """
-    with engine.connect() as conn:
-        return pd.read_sql(query, conn)
-
-@st.cache_data(ttl=300)
 def load_employee_profile(employee_id):
-    """Load complete employee profile data"""
-    
-    # Basic info
-    basic_query = """
-    SELECT 
-        e.employee_id,
-        e.fullname,
-        pos.name as position_name,
-        dept.name as department_name,
-        div.name as division_name,
-        g.name as grade_name,
-        edu.name as education_name,
-        e.years_of_service_months
-    FROM employees e
-    LEFT JOIN dim_positions pos ON e.position_id = pos.position_id
-    LEFT JOIN dim_departments dept ON e.department_id = dept.department_id
-    LEFT JOIN dim_divisions div ON e.division_id = div.division_id
-    LEFT JOIN dim_grades g ON e.grade_id = g.grade_id
-    LEFT JOIN dim_education edu ON e.education_id = edu.education_id
-    WHERE e.employee_id = %s
-    """
-    
-    # Performance
-    perf_query = """
-    SELECT rating
-    FROM performance_yearly
-    WHERE employee_id = %s
-    ORDER BY year DESC
-    LIMIT 1
-    """
-    
-    # Competencies
-    comp_query = """
-    SELECT 
-        cp.pillar_label,
-        cy.score
-    FROM competencies_yearly cy
-    JOIN dim_competency_pillars cp ON cy.pillar_code = cp.pillar_code
-    WHERE cy.employee_id = %s
-      AND cy.year = (SELECT MAX(year) FROM competencies_yearly)
-    ORDER BY cy.score DESC
-    """
-    
-    # Cognitive
-    cog_query = """
-    SELECT iq, gtq, tiki, pauli, faxtor, mbti, disc
-    FROM profiles_psych
-    WHERE employee_id = %s
-    """
-    
-    # Strengths
-    strengths_query = """
-    SELECT theme, rank
-    FROM strengths
-    WHERE employee_id = %s
-    ORDER BY rank
-    LIMIT 5
-    """
-    
-    with engine.connect() as conn:
-        basic_df = pd.read_sql(basic_query, conn, params=(employee_id,))
-        perf_df = pd.read_sql(perf_query, conn, params=(employee_id,))
-        comp_df = pd.read_sql(comp_query, conn, params=(employee_id,))
-        cog_df = pd.read_sql(cog_query, conn, params=(employee_id,))
-        strengths_df = pd.read_sql(strengths_query, conn, params=(employee_id,))
-    
-    return {
-        'basic': basic_df.iloc[0] if not basic_df.empty else None,
-        'performance': perf_df.iloc[0]['rating'] if not perf_df.empty else 0,
-        'competencies': comp_df,
-        'cognitive': cog_df.iloc[0] if not cog_df.empty else None,
-        'strengths': strengths_df
-    }
+    """Load complete employee profile data from the warm LRU profile cache"""
+    return get_profile_prefetcher(engine).get(employee_id)
 
 # Main UI
 st.markdown('<div class="profile-card">', unsafe_allow_html=True)
 
-# Employee selector
-employees_df = load_employee_list()
-employee_options = {f"{row['fullname']} - {row['position_name']}": row['employee_id'] 
-                   for _, row in employees_df.iterrows()}
+# Employee selector (server-side search: only the top matches reach the browser)
+employee_query = st.text_input(
+    "🔍 Search Employee",
+    placeholder="Type a name or employee ID...",
+    key="profile_employee_query"
+)
+employees_df = search_employees(engine, employee_query, limit=50)
+employee_options = dict(zip(
+    employees_df['fullname'] + " - " + employees_df['position_name'].fillna('N/A'),
+    employees_df['employee_id']
+))
+
+# Keep the current selection available while the user types a new search
+current_label = st.session_state.get('profile_selected_label')
+if current_label and current_label not in employee_options and 'profile_selected_id' in st.session_state:
+    employee_options = {current_label: st.session_state.profile_selected_id, **employee_options}
+
+if not employee_options:
+    st.warning("No employees match your search.")
+    st.stop()
 
 selected_label = st.selectbox(
-    "🔍 Select Employee to View Profile",
+    "Select Employee to View Profile",
     options=list(employee_options.keys()),
-    help="Type to search by name"
+    key="profile_selected_label",
+    help="Refine the list with the search box above"
 )
 
 selected_employee_id = employee_options[selected_label]
+st.session_state.profile_selected_id = selected_employee_id
+
+# Remember recent search hits for the prefetcher
+if employee_query:
+    recent_hits = [eid for eid in employees_df['employee_id'].head(3) if eid != selected_employee_id]
+    st.session_state.profile_recent_hits = (
+        recent_hits + [eid for eid in st.session_state.get('profile_recent_hits', []) if eid not in recent_hits]
+    )[:6]
 
 st.markdown('</div>', unsafe_allow_html=True)
 
 # Load profile data
 profile = load_employee_profile(selected_employee_id)
 
-if profile['basic'] is None:
+if not profile.found:
     st.error("Employee data not found")
     st.stop()
 
@@ -334,17 +278,17 @@ st.markdown(f"""
 <div class="character-header">
     <div class="avatar-box">●</div>
     <div class="character-info">
-        <h1>{profile['basic']['fullname']}</h1>
-        <div class="character-title">{profile['basic']['position_name']}</div>
+        <h1>{profile.basic['fullname']}</h1>
+        <div class="character-title">{profile.basic['position_name']}</div>
         <div style="color: #8B9DB8; margin-top: 0.5rem;">
-            {profile['basic']['department_name']} • {profile['basic']['grade_name']}
+            {profile.basic['department_name']} • {profile.basic['grade_name']}
         </div>
     </div>
 </div>
 """, unsafe_allow_html=True)
 
 # HP Bar (Performance Rating)
-rating = profile['performance']
+rating = profile.performance
 hp_percent = (rating / 5) * 100
 
 st.markdown('<div class="section-title">⭐ Performance Level</div>', unsafe_allow_html=True)
@@ -361,13 +305,13 @@ st.markdown('</div>', unsafe_allow_html=True)
 st.markdown('<br>', unsafe_allow_html=True)
 col1, col2, col3, col4 = st.columns(4)
 
-exp_years = profile['basic']['years_of_service_months'] / 12
+exp_years = profile.basic['years_of_service_months'] / 12
 
 with col1:
     st.markdown(f"""
     <div class="stat-box">
         <div class="stat-label">▸ Level</div>
-        <div class="stat-value">{profile['basic']['grade_name']}</div>
+        <div class="stat-value">{profile.basic['grade_name']}</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -380,7 +324,7 @@ with col2:
     """, unsafe_allow_html=True)
 
 with col3:
-    avg_comp = profile['competencies']['score'].mean() if not profile['competencies'].empty else 0
+    avg_comp = profile.competencies['score'].mean() if not profile.competencies.empty else 0
     st.markdown(f"""
     <div class="stat-box">
         <div class="stat-label">◆ Avg Competency</div>
@@ -389,7 +333,7 @@ with col3:
     """, unsafe_allow_html=True)
 
 with col4:
-    iq = profile['cognitive']['iq'] if profile['cognitive'] is not None else 0
+    iq = profile.cognitive['iq'] if profile.cognitive is not None else 0
     st.markdown(f"""
     <div class="stat-box">
         <div class="stat-label">🧠 Intelligence</div>
@@ -407,12 +351,12 @@ with col_left:
     st.markdown('<div class="profile-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">■ Competency Stats</div>', unsafe_allow_html=True)
     
-    if not profile['competencies'].empty:
+    if not profile.competencies.empty:
         fig_radar = go.Figure()
         
         fig_radar.add_trace(go.Scatterpolar(
-            r=profile['competencies']['score'].tolist(),
-            theta=profile['competencies']['pillar_label'].tolist(),
+            r=profile.competencies['score'].tolist(),
+            theta=profile.competencies['pillar_label'].tolist(),
             fill='toself',
             line_color='#4A90E2',
             fillcolor='rgba(74, 144, 226, 0.3)',
@@ -421,8 +365,8 @@ with col_left:
         
         # Max line (perfect 5.0)
         fig_radar.add_trace(go.Scatterpolar(
-            r=[5.0] * len(profile['competencies']),
-            theta=profile['competencies']['pillar_label'].tolist(),
+            r=[5.0] * len(profile.competencies),
+            theta=profile.competencies['pillar_label'].tolist(),
             fill='toself',
             line=dict(color='#51CF66', dash='dash'),
             fillcolor='rgba(81, 207, 102, 0.1)',
@@ -464,13 +408,13 @@ with col_right:
     st.markdown('<div class="profile-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">🧠 Cognitive Abilities</div>', unsafe_allow_html=True)
     
-    if profile['cognitive'] is not None:
+    if profile.cognitive is not None:
         cog_data = {
-            'IQ': profile['cognitive']['iq'],
-            'GTQ': profile['cognitive']['gtq'],
-            'TIKI': profile['cognitive']['tiki'],
-            'Pauli': profile['cognitive']['pauli'],
-            'Faxtor': profile['cognitive']['faxtor']
+            'IQ': profile.cognitive['iq'],
+            'GTQ': profile.cognitive['gtq'],
+            'TIKI': profile.cognitive['tiki'],
+            'Pauli': profile.cognitive['pauli'],
+            'Faxtor': profile.cognitive['faxtor']
         }
         
         # Normalize to 0-100 scale for visual
@@ -495,10 +439,10 @@ with col_bottom1:
     st.markdown('<div class="profile-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">◆ Top Strengths</div>', unsafe_allow_html=True)
     
-    if not profile['strengths'].empty:
+    if not profile.strengths.empty:
         # Create single HTML block with all badges
         badges_html = '<div style="display: flex; flex-wrap: wrap; gap: 0.5rem;">'
-        for _, strength in profile['strengths'].iterrows():
+        for _, strength in profile.strengths.iterrows():
             badges_html += f'<span class="badge">#{strength["rank"]} {strength["theme"]}</span>'
         badges_html += '</div>'
         st.markdown(badges_html, unsafe_allow_html=True)
@@ -511,9 +455,9 @@ with col_bottom2:
     st.markdown('<div class="profile-card">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">🎭 Personality Type</div>', unsafe_allow_html=True)
     
-    if profile['cognitive'] is not None:
-        mbti = profile['cognitive']['mbti'] if pd.notna(profile['cognitive']['mbti']) else 'N/A'
-        disc = profile['cognitive']['disc'] if pd.notna(profile['cognitive']['disc']) else 'N/A'
+    if profile.cognitive is not None:
+        mbti = profile.cognitive['mbti'] if pd.notna(profile.cognitive['mbti']) else 'N/A'
+        disc = profile.cognitive['disc'] if pd.notna(profile.cognitive['disc']) else 'N/A'
         
         st.markdown(f"""
         <div style="background: rgba(74, 144, 226, 0.1); padding: 1rem; border-radius: 8px; margin-bottom: 0.5rem;">
@@ -549,15 +493,8 @@ with tab1:
     st.markdown('<div class="profile-card">', unsafe_allow_html=True)
     st.markdown("### ▸ PAPI Kostick - Work Style Preferences (20 Scales)")
     
-    # Load PAPI data
-    papi_query = """
-    SELECT scale_code, score
-    FROM papi_scores
-    WHERE employee_id = %s
-    ORDER BY scale_code
-    """
-    with engine.connect() as conn:
-        papi_df = pd.read_sql(papi_query, conn, params=(selected_employee_id,))
+    # PAPI data comes with the cached profile (no extra query on reruns)
+    papi_df = profile.papi
     
     if not papi_df.empty:
         # Create horizontal bar chart
@@ -612,15 +549,8 @@ with tab2:
     st.markdown('<div class="profile-card">', unsafe_allow_html=True)
     st.markdown("### 📈 Performance Rating Trend Over Years")
     
-    # Load performance history
-    perf_history_query = """
-    SELECT year, rating
-    FROM performance_yearly
-    WHERE employee_id = %s
-    ORDER BY year
-    """
-    with engine.connect() as conn:
-        perf_history_df = pd.read_sql(perf_history_query, conn, params=(selected_employee_id,))
+    # Performance history comes with the cached profile
+    perf_history_df = profile.performance_history
     
     if not perf_history_df.empty:
         fig_perf = go.Figure()
@@ -684,7 +614,7 @@ with tab3:
     all_tvs = []
     
     # Competencies (10 TVs)
-    for _, row in profile['competencies'].iterrows():
+    for _, row in profile.competencies.iterrows():
         all_tvs.append({
             'TGV': 'COMPETENCY',
             'Variable': row['pillar_label'],
@@ -693,13 +623,13 @@ with tab3:
         })
     
     # Cognitive (5 TVs)
-    if profile['cognitive'] is not None:
+    if profile.cognitive is not None:
         for col in ['iq', 'gtq', 'tiki', 'pauli', 'faxtor']:
-            if pd.notna(profile['cognitive'][col]):
+            if pd.notna(profile.cognitive[col]):
                 all_tvs.append({
                     'TGV': 'COGNITIVE',
                     'Variable': col.upper(),
-                    'Score': f"{profile['cognitive'][col]:.2f}",  # Convert to string
+                    'Score': f"{profile.cognitive[col]:.2f}",  # Convert to string
                     'Type': 'Numeric'
                 })
     
@@ -714,22 +644,22 @@ with tab3:
             })
     
     # Personality (2 TVs)
-    if profile['cognitive'] is not None:
+    if profile.cognitive is not None:
         all_tvs.append({
             'TGV': 'PERSONALITY',
             'Variable': 'MBTI',
-            'Score': profile['cognitive']['mbti'] if pd.notna(profile['cognitive']['mbti']) else 'N/A',
+            'Score': profile.cognitive['mbti'] if pd.notna(profile.cognitive['mbti']) else 'N/A',
             'Type': 'Categorical'
         })
         all_tvs.append({
             'TGV': 'PERSONALITY',
             'Variable': 'DISC',
-            'Score': profile['cognitive']['disc'] if pd.notna(profile['cognitive']['disc']) else 'N/A',
+            'Score': profile.cognitive['disc'] if pd.notna(profile.cognitive['disc']) else 'N/A',
             'Type': 'Categorical'
         })
     
     # Strengths (Top 5)
-    for _, strength in profile['strengths'].iterrows():
+    for _, strength in profile.strengths.iterrows():
         all_tvs.append({
             'TGV': 'STRENGTHS',
             'Variable': strength['theme'],
@@ -768,11 +698,11 @@ with tab4:
     st.info("📌 **Current Status:**")
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.markdown(f"**Position:** {profile['basic']['position_name']}")
+        st.markdown(f"**Position:** {profile.basic['position_name']}")
     with col2:
-        st.markdown(f"**Department:** {profile['basic']['department_name']}")
+        st.markdown(f"**Department:** {profile.basic['department_name']}")
     with col3:
-        st.markdown(f"**Grade:** {profile['basic']['grade_name']}")
+        st.markdown(f"**Grade:** {profile.basic['grade_name']}")
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -786,7 +716,7 @@ with tab4:
         years_since_promotion = exp_years % 3  # Placeholder logic
         st.metric("📅 Time in Current Role", f"{years_since_promotion:.1f} years")
     with col3:
-        st.metric("◆ Education", profile['basic']['education_name'])
+        st.metric("◆ Education", profile.basic['education_name'])
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -799,8 +729,8 @@ with tab5:
     st.markdown("#### ▸ Recommended Focus Areas")
     
     # Find weakest competencies
-    if not profile['competencies'].empty:
-        weakest_comps = profile['competencies'].nsmallest(3, 'score')
+    if not profile.competencies.empty:
+        weakest_comps = profile.competencies.nsmallest(3, 'score')
         
         st.markdown("**🔧 Areas for Improvement:**")
         for _, comp in weakest_comps.iterrows():
@@ -814,8 +744,8 @@ with tab5:
     st.markdown("<br>", unsafe_allow_html=True)
     
     # Find strengths
-    if not profile['competencies'].empty:
-        strongest_comps = profile['competencies'].nlargest(3, 'score')
+    if not profile.competencies.empty:
+        strongest_comps = profile.competencies.nlargest(3, 'score')
         
         st.markdown("**◆ Continue Leveraging:**")
         for _, comp in strongest_comps.iterrows():
@@ -861,6 +791,34 @@ with tab5:
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Warm the profile cache with the profiles the user is likely to open next
+prefetcher = get_profile_prefetcher(engine)
+try:
+    peers_df = get_employee_search_index(engine).peers(selected_employee_id, column='department_id')
+    prefetcher.prefetch(predict_next_profiles(
+        selected_employee_id,
+        listed_ids=list(employee_options.values()),
+        peers_df=peers_df,
+        recent_hits=st.session_state.get('profile_recent_hits', [])
+    ))
+except Exception:
+    pass  # Prefetching is best-effort; never break the page for it
+
+# Statistik cache hanya untuk operator (flag admin)
+if is_admin_enabled():
+    with st.expander("⚙ Profile cache statistics", expanded=False):
+        cache_stats = prefetcher.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Hit Rate", f"{cache_stats['hit_rate'] * 100:.1f}%")
+        col2.metric("Cached Profiles", f"{cache_stats['size']} / {cache_stats['maxsize']}")
+        col3.metric("Prefetch Precision", f"{cache_stats['prefetch_precision'] * 100:.1f}%")
+        col4.metric("Evictions", cache_stats['evictions'])
+        st.caption(
+            f"Hits: {cache_stats['hits']} • Misses: {cache_stats['misses']} • "
+            f"Prefetched: {cache_stats['prefetch_loads']} • In flight: {cache_stats['in_flight']} • "
+            f"Skipped (lane busy): {cache_stats['prefetch_skipped']} • Dropped: {cache_stats['prefetch_dropped']}"
+        )
+
 # Footer
 st.markdown('<br>', unsafe_allow_html=True)
 st.markdown("""
@@ -868,3 +826,6 @@ st.markdown("""
     <small>Talent Intelligence Dashboard © 2025. All rights reserved.</small>
 </div>
 """, unsafe_allow_html=True)
+
+# Hotspot Python rerun ini (hanya saat ?profile=1)
+render_page_profile(page_profiler)
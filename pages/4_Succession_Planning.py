@@ -0,0 +1,138 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from core.db import get_engine
+from core.dimensions import get_dimension_registry
+from core.fit_matrix import get_fit_matrix
+from core.query_metrics import set_query_tags
+from core.profiler import start_page_profiler, render_page_profile
+
+# Page config
+st.set_page_config(
+    page_title="Succession Planning",
+    page_icon="◆",
+    layout="wide"
+)
+# Tag query DB dari halaman ini (core/query_metrics.py)
+set_query_tags(page="Succession Planning")
+# ?profile=1 (admin): sampling profiler untuk rerun ini (core/profiler.py)
+page_profiler = start_page_profiler()
+
+st.title("◆ Succession Planning")
+st.caption(
+    "Internal candidates for every position, ranked against that position's high performers "
+    "(rating 5, latest year). Scores come from the precomputed employee × position fit matrix."
+)
+
+engine = get_engine()
+if not engine:
+    st.error("❌ Database connection failed")
+    st.stop()
+
+with st.spinner("Loading fit matrix..."):
+    fit = get_fit_matrix(engine)
+registry = get_dimension_registry(engine)
+positions = registry.frame('positions')
+position_names = positions.set_index('position_id')['name']
+
+# ============================================================================
+# SUCCESSION CANDIDATES FOR ONE POSITION
+# ============================================================================
+col1, col2, col3 = st.columns([3, 1, 1])
+with col1:
+    position_id = st.selectbox(
+        "Target Position",
+        options=positions['position_id'].tolist(),
+        format_func=lambda pid: position_names.get(pid, str(pid)),
+    )
+with col2:
+    top_n = st.number_input("Candidates", min_value=5, max_value=200, value=20, step=5)
+with col3:
+    exclude_incumbents = st.checkbox("Exclude incumbents", value=True,
+                                     help="Hide employees who already hold this position")
+
+if position_id is not None:
+    candidates = registry.attach_names(
+        fit.top_candidates(position_id, k=int(top_n), exclude_incumbents=exclude_incumbents)
+    )
+    strength = fit.bench_strength(exclude_incumbents=True).set_index('position_id')
+    benchmark = strength.loc[position_id] if position_id in strength.index else None
+
+    if benchmark is not None:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Benchmark Size", int(benchmark['benchmark_n']))
+        col2.metric("Ready Candidates (≥ 80)", int(benchmark['ready_candidates']))
+        col3.metric("Best Score", f"{benchmark['best_score']:.2f}" if pd.notna(benchmark['best_score']) else "N/A")
+        if benchmark['benchmark_fallback']:
+            st.info("ℹ️ This position has no high performers; candidates are ranked against all high performers.")
+
+    if candidates.empty:
+        st.warning("⚠️ No scored candidates for this position")
+    else:
+        chart = candidates.head(15).iloc[::-1]
+        fig = go.Figure(go.Bar(
+            x=chart['final_match_rate'],
+            y=chart['fullname'],
+            orientation='h',
+            marker_color='#4A90E2',
+            text=chart['final_match_rate'].round(1),
+            textposition='outside',
+        ))
+        fig.update_layout(
+            height=max(300, 28 * len(chart)),
+            margin=dict(l=10, r=10, t=10, b=10),
+            xaxis_title="Match Score",
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+        )
+        st.plotly_chart(fig, width="stretch", config={'displayModeBar': False})
+
+        st.dataframe(
+            candidates,
+            column_config={
+                'final_match_rate': st.column_config.NumberColumn('Match Score', format="%.2f"),
+                'data_completeness_pct': st.column_config.ProgressColumn(
+                    'Data Completeness',
+                    help='Percentage of available talent data (out of 37 total variables)',
+                    format="%.1f%%",
+                    min_value=0,
+                    max_value=100,
+                ),
+            },
+            hide_index=True,
+            width="stretch",
+        )
+
+# ============================================================================
+# BENCH STRENGTH OVERVIEW
+# ============================================================================
+st.divider()
+st.subheader("Bench Strength")
+threshold = st.slider("Ready threshold (match score)", min_value=50, max_value=150, value=80, step=5)
+overview = fit.bench_strength(threshold=threshold, exclude_incumbents=True)
+overview.insert(1, 'position_name', overview['position_id'].map(position_names))
+overview = overview.drop(columns=['position_id']).sort_values(['ready_candidates', 'best_score'])
+st.caption("Positions with the fewest ready internal candidates first.")
+st.dataframe(
+    overview,
+    column_config={
+        'position_name': 'Position',
+        'ready_candidates': 'Ready Candidates',
+        'best_score': st.column_config.NumberColumn('Best Score', format="%.2f"),
+        'benchmark_n': 'Benchmark Size',
+        'benchmark_fallback': 'All-HP Fallback',
+    },
+    hide_index=True,
+    width="stretch",
+)
+
+# Footer
+st.markdown('<br>', unsafe_allow_html=True)
+st.markdown("""
+<div style='text-align: center; color: #6B7B94; padding: 2rem 0;'>
+    <small>Talent Intelligence Dashboard © 2025. All rights reserved.</small>
+</div>
+""", unsafe_allow_html=True)
+
+# Hotspot Python rerun ini (hanya saat ?profile=1)
+render_page_profile(page_profiler)
@@ -0,0 +1,122 @@
+import streamlit as st
+import pandas as pd
+from core.db import get_engine
+from core.vacancy_library import (search_vacancies, get_job_level_facets, get_library_schema,
+                                  SEARCH_BUDGET_MS, DEFAULT_PAGE_SIZE)
+from core.query_metrics import set_query_tags
+from core.profiler import start_page_profiler, render_page_profile
+
+# Page config
+st.set_page_config(
+    page_title="Vacancy Library",
+    page_icon="▤",
+    layout="wide"
+)
+# Tag query DB dari halaman ini (core/query_metrics.py)
+set_query_tags(page="Vacancy Library")
+# ?profile=1 (admin): sampling profiler untuk rerun ini (core/profiler.py)
+page_profiler = start_page_profiler()
+
+st.title("▤ Vacancy Library")
+st.caption("Every job vacancy saved from the Job Generator, newest first. Search covers role names, "
+           "competencies, responsibilities and qualifications.")
+
+engine = get_engine()
+if not engine:
+    st.error("❌ Database connection failed")
+    st.stop()
+
+# ============================================================================
+# SEARCH & FACETS
+# ============================================================================
+col1, col2, col3 = st.columns([3, 2, 1])
+with col1:
+    query = st.text_input("Search vacancies", placeholder="e.g., data analyst, stakeholder, SQL...")
+
+# Halaman ini hanya membaca: migrasi job_vacancies dijalankan dari script (--migrate)
+if get_library_schema(engine) == 'legacy':
+    st.caption("Search index not set up yet (run `python scripts/vacancy_search_report.py --migrate`); "
+               "searching without it is slower.")
+
+# Facet per job level (tanpa teks pencarian di-cache, refresh saat job_vacancies berubah)
+facets = get_job_level_facets(engine, query)
+total = sum(facets.values())
+with col2:
+    level_options = [None] + list(facets)
+    job_level = st.selectbox(
+        "Job Level",
+        options=level_options,
+        format_func=lambda level: f"All levels ({total})" if level is None
+        else f"{level or '(no level)'} ({facets[level]})",
+    )
+with col3:
+    page_size = st.selectbox("Per page", [10, DEFAULT_PAGE_SIZE, 50], index=1)
+
+# Keyset pagination: simpan cursor tiap halaman yang sudah dibuka, reset saat filter berubah
+filter_key = (query, job_level, page_size)
+if st.session_state.get('library_filter_key') != filter_key:
+    st.session_state.library_filter_key = filter_key
+    st.session_state.library_cursors = [None]
+cursors = st.session_state.library_cursors
+
+page = search_vacancies(engine, query, job_level=job_level, cursor=cursors[-1], page_size=page_size)
+
+budget_note = f"⚠️ over the {SEARCH_BUDGET_MS} ms budget" if page.over_budget else f"budget {SEARCH_BUDGET_MS} ms"
+matched = facets.get(job_level, 0) if job_level is not None else total
+st.caption(f"{matched} vacancies · page {len(cursors)} · {page.duration_ms:.0f} ms ({budget_note})")
+
+# ============================================================================
+# RESULTS
+# ============================================================================
+if page.rows.empty:
+    st.info("No vacancies found. Save a job profile from the Job Generator to add it here.")
+
+for vacancy in page.rows.to_dict('records'):
+    created = pd.Timestamp(vacancy['created_at']).strftime('%Y-%m-%d') if pd.notna(vacancy['created_at']) else '-'
+    title = f"**{vacancy['role_name']}** · {vacancy['job_level'] or '-'} · ID {vacancy['vacancy_id']} · {created}"
+    with st.expander(title):
+        if vacancy['role_purpose']:
+            st.markdown(vacancy['role_purpose'])
+
+        col_left, col_right = st.columns(2)
+        with col_left:
+            st.markdown("**Key Responsibilities**")
+            for item in vacancy['key_responsibilities'] or []:
+                st.markdown(f"- {item}")
+        with col_right:
+            st.markdown("**Required Competencies**")
+            for item in vacancy['required_competencies'] or []:
+                name, _, description = item.partition(': ')
+                st.markdown(f"- **{name}**" + (f": {description}" if description else ""))
+            st.markdown("**Qualifications**")
+            for item in vacancy['qualifications'] or []:
+                st.markdown(f"- {item}")
+
+        if st.button("▸ Find Matching Talents", key=f"match_{vacancy['vacancy_id']}", type="primary"):
+            st.session_state.talent_match_vacancy_id = int(vacancy['vacancy_id'])
+            st.session_state.talent_match_role_name = vacancy['role_name']
+            st.switch_page("pages/1_Talent_Matching.py")
+
+# Navigasi halaman (hanya maju/mundur: keyset tidak mendukung lompat ke halaman N)
+_, col_prev, col_page, col_next, _ = st.columns([.3, .1, .2, .1, .3])
+with col_prev:
+    if st.button("◀", key="library_prev", width="stretch", disabled=len(cursors) <= 1):
+        cursors.pop()
+        st.rerun()
+with col_page:
+    st.markdown(f"<p style='text-align: center;'>Page {len(cursors)}</p>", unsafe_allow_html=True)
+with col_next:
+    if st.button("▶", key="library_next", width="stretch", disabled=not page.has_more):
+        cursors.append(page.next_cursor)
+        st.rerun()
+
+# Footer
+st.markdown('<br>', unsafe_allow_html=True)
+st.markdown("""
+<div style='text-align: center; color: #6B7B94; padding: 2rem 0;'>
+    <small>Talent Intelligence Dashboard © 2025. All rights reserved.</small>
+</div>
+""", unsafe_allow_html=True)
+
+# Hotspot Python rerun ini (hanya saat ?profile=1)
+render_page_profile(page_profiler)
@@ -0,0 +1,179 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from core.admin import require_admin, get_pool_status, get_session_memory, get_server_activity
+from core.db import get_engine, get_workload_stats
+from core.matching import get_matching_flight_stats, get_recent_matching_runs, get_matching_in_flight
+from core.profile_prefetch import get_profile_prefetcher
+from core.query_cancel import query_canceller
+from core.query_metrics import get_query_metrics, set_query_tags
+from core.swr_cache import all_swr_cache_stats
+from core.warmup import get_warmup_status
+from core.lazy import import_timings
+from core.llm_cache import get_llm_cache
+from core.llm_hedge import get_llm_metrics
+from core.vacancy_benchmark import get_compile_stats
+from core.profiler import start_page_profiler, render_page_profile
+
+st.set_page_config(page_title="Performance", page_icon="⚙", layout="wide")
+# Tag query DB dari halaman ini (core/query_metrics.py)
+set_query_tags(page="Performance")
+# ?profile=1 (admin): sampling profiler untuk rerun ini (core/profiler.py)
+page_profiler = start_page_profiler()
+
+# Halaman operator: hanya terdaftar di navigasi (app.py) saat flag admin aktif; guard untuk pemanggilan langsung
+require_admin()
+
+st.title("⚙ Performance")
+st.caption(f"Live diagnostics of this server process • {datetime.now():%Y-%m-%d %H:%M:%S}")
+if st.button("🔄 Refresh"):
+    st.rerun()
+
+engine = get_engine()
+
+# ============================================================================
+# CONNECTION POOL & WORKLOAD LANES
+# ============================================================================
+st.subheader("Connection Pool")
+pool = get_pool_status(engine)
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Utilization", f"{pool['utilization'] * 100:.0f}%")
+col2.metric("Checked Out", f"{pool['checked_out']} / {pool['pool_size'] + pool['max_overflow']}")
+col3.metric("Idle", pool['idle'])
+col4.metric("Overflow In Use", pool['overflow_in_use'])
+st.caption(pool['status'])
+st.dataframe(pd.DataFrame(get_workload_stats()), hide_index=True, width="stretch")
+
+# ============================================================================
+# CACHES
+# ============================================================================
+st.subheader("Caches")
+swr_stats = pd.DataFrame(all_swr_cache_stats())
+if not swr_stats.empty:
+    swr_stats['hit_rate'] = swr_stats['hits'] / (swr_stats['hits'] + swr_stats['misses']).where(lambda n: n > 0)
+st.dataframe(swr_stats, hide_index=True, width="stretch")
+
+profile_stats = get_profile_prefetcher(engine).stats()
+flight_stats = get_matching_flight_stats()
+cancel_stats = query_canceller.stats()
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.markdown("**Profile LRU cache**")
+    st.metric("Hit Rate", f"{profile_stats['hit_rate'] * 100:.1f}%")
+    st.caption(
+        f"Hits: {profile_stats['hits']} • Misses: {profile_stats['misses']} • "
+        f"Evictions: {profile_stats['evictions']} • Expired: {profile_stats['expirations']} • "
+        f"Size: {profile_stats['size']} / {profile_stats['maxsize']}"
+    )
+with col2:
+    st.markdown("**Matching single-flight**")
+    st.metric("Executions Saved", flight_stats['saved'])
+    st.caption(f"Calls: {flight_stats['calls']} • Executions: {flight_stats['executions']}")
+with col3:
+    st.markdown("**Query cancellation**")
+    st.metric("Cancel Requests", cancel_stats['cancel_requests'])
+    st.caption(
+        f"Errors: {cancel_stats['cancel_errors']} • Watched sessions: {cancel_stats['watched_sessions']}"
+        + (f" • Last error: {cancel_stats['last_error']}" if cancel_stats['last_error'] else "")
+    )
+
+llm_stats = get_llm_cache().stats()
+st.markdown("**LLM response cache**")
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Hit Rate", f"{llm_stats['hit_rate'] * 100:.1f}%")
+col2.metric("Entries", llm_stats['entries'])
+col3.metric("Size", f"{llm_stats['bytes'] / 1024 / 1024:.1f} / {llm_stats['max_bytes'] / 1024 / 1024:.0f} MB")
+col4.metric("Evictions", llm_stats['evictions'])
+st.caption(
+    f"Hits: {llm_stats['hits']} • Misses: {llm_stats['misses']} • Expired: {llm_stats['expired']} • "
+    f"Writes: {llm_stats['writes']} • TTL: {llm_stats['ttl_hours']} h • {llm_stats['directory']}"
+)
+
+st.markdown("**LLM latency** (hedged requests, deadline fallbacks)")
+llm_latency = pd.DataFrame(get_llm_metrics().summary())
+if llm_latency.empty:
+    st.info("No LLM calls since the server started.")
+else:
+    st.dataframe(llm_latency, hide_index=True, width="stretch")
+
+benchmark_stats = get_compile_stats()
+st.markdown("**Vacancy benchmark compilation**")
+st.caption(
+    f"Compiled: {benchmark_stats['compiled']} • Errors: {benchmark_stats['errors']}"
+    + (f" • Last error: {benchmark_stats['last_error']}" if benchmark_stats['last_error'] else "")
+)
+
+warmup = get_warmup_status()
+st.markdown(f"**Warm-up:** {warmup['state']}")
+if warmup['steps']:
+    st.dataframe(pd.DataFrame(warmup['steps']), hide_index=True, width="stretch")
+if import_timings:
+    st.caption("Lazy imports: " + " • ".join(f"{name} {sec * 1000:.0f} ms" for name, sec in import_timings.items()))
+
+# ============================================================================
+# QUERY LATENCY
+# ============================================================================
+st.subheader("Query Latency")
+metrics = get_query_metrics()
+window_label = st.selectbox("Window", ["Last 5 minutes", "Last hour", "Whole buffer"], index=1)
+window = {"Last 5 minutes": 300, "Last hour": 3600, "Whole buffer": None}[window_label]
+latency = pd.DataFrame(metrics.summary(window=window))
+if latency.empty:
+    st.info("No statements recorded yet.")
+else:
+    st.dataframe(latency.head(25), hide_index=True, width="stretch")
+st.caption(f"Statements recorded: {metrics.total} • Errors: {metrics.errors}")
+
+st.markdown("**Slowest recent matching runs**")
+runs = pd.DataFrame(get_recent_matching_runs(n=15, slowest=True))
+if runs.empty:
+    st.info("No matching runs since the server started.")
+else:
+    runs['started_at'] = pd.to_datetime(runs['started_at'], unit='s')
+    st.dataframe(runs, hide_index=True, width="stretch")
+
+# ============================================================================
+# SESSIONS
+# ============================================================================
+st.subheader("Session State Memory")
+sessions = get_session_memory()
+if sessions.empty:
+    st.info("Session information is not available from the Streamlit runtime.")
+else:
+    st.metric("Total", f"{sessions['bytes'].sum() / 1024 / 1024:.1f} MB across {len(sessions)} sessions")
+    st.dataframe(
+        sessions.assign(kb=(sessions['bytes'] / 1024).round(1)).drop(columns=['bytes']),
+        hide_index=True, width="stretch"
+    )
+
+# ============================================================================
+# IN-FLIGHT QUERIES
+# ============================================================================
+st.subheader("In-Flight Queries")
+col1, col2 = st.columns(2)
+with col1:
+    st.markdown("**Cancellable jobs (this process)**")
+    jobs = pd.DataFrame(query_canceller.in_flight())
+    if jobs.empty:
+        st.caption("None")
+    else:
+        st.dataframe(jobs, hide_index=True, width="stretch")
+with col2:
+    st.markdown("**Coalesced matching runs**")
+    coalesced = get_matching_in_flight()
+    if not coalesced:
+        st.caption("None")
+    else:
+        st.dataframe(
+            pd.DataFrame([{'key': repr(k), 'extra_waiters': w} for k, w in coalesced.items()]),
+            hide_index=True, width="stretch"
+        )
+
+st.markdown("**Server activity (pg_stat_activity)**")
+try:
+    st.dataframe(get_server_activity(engine), hide_index=True, width="stretch")
+except Exception as e:
+    st.warning(f"Could not read pg_stat_activity: {e}")
+
+# Hotspot Python rerun ini (hanya saat ?profile=1)
+render_page_profile(page_profiler)
@@ -0,0 +1,141 @@
+"""
+Local fake LLM server for testing the Job Generator without an API key.
+
+Serves the JSON protocol of the 'http' backend (core/llm_client.py, HTTPModel)
+and answers with the deterministic StubModel responses. The latency is
+configurable with a long tail, so the hedged requests, deadlines and fallbacks
+of core/llm_hedge.py can be tried out locally:
+
+    python scripts/fake_llm_server.py --latency-ms 800 --tail-rate 0.15 --tail-ms 20000
+    LLM_BACKEND=http LLM_HTTP_URL=http://127.0.0.1:8765 streamlit run app.py
+
+--model-latency-ms overrides the typical latency for one model (e.g. a fast
+fallback model). --fail-rate makes some requests answer with HTTP 503.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.llm_client import StubModel
+
+CHUNK_CHARS = 24
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/generate':
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        model_name = body.get('model', 'fake')
+        latency_s, outcome = self.server.draw_latency(model_name)
+        if outcome == 'fail':
+            self.send_error(503, "Simulated model failure")
+            return
+
+        text = StubModel(model_name)._respond(body.get('prompt', ''))
+        chunks = [text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)]
+        # Latency sampai chunk pertama; sisa waktu streaming 10% dari itu
+        time.sleep(latency_s)
+        if not body.get('stream'):
+            self._send(200, json.dumps({'text': text}).encode('utf-8'), 'application/json')
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                self._write_chunk((json.dumps({'text': chunk}) + '\n').encode('utf-8'))
+                time.sleep(latency_s * 0.1 / len(chunks))
+            self._write_chunk(b'')
+        except (BrokenPipeError, ConnectionResetError):
+            # Client meninggalkan request (hedge kalah / deadline)
+            pass
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, args):
+        super().__init__(address, FakeLLMHandler)
+        self.args = args
+        self.verbose = args.verbose
+        self.model_latency = dict(self._model_override(value) for value in args.model_latency_ms)
+        self.random = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    @staticmethod
+    def _model_override(value):
+        model_name, _, ms = value.partition('=')
+        return model_name, float(ms)
+
+    def draw_latency(self, model_name):
+        """(seconds to the first chunk, 'ok' / 'fail') for one request."""
+        with self.lock:
+            self.requests += 1
+            roll, jitter = self.random.random(), self.random.lognormvariate(0, 0.25)
+        if roll < self.args.fail_rate:
+            return 0.0, 'fail'
+        typical_ms = self.model_latency.get(model_name, self.args.latency_ms)
+        if model_name not in self.model_latency and roll < self.args.fail_rate + self.args.tail_rate:
+            return self.args.tail_ms / 1000 * jitter, 'ok'
+        return typical_ms / 1000 * jitter, 'ok'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake LLM server with configurable tail latency")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=800, help="typical time to the first chunk")
+    parser.add_argument("--tail-rate", type=float, default=0.1, help="share of requests in the slow tail")
+    parser.add_argument("--tail-ms", type=float, default=15000, help="time to the first chunk in the tail")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--model-latency-ms", action="append", default=[], metavar="MODEL=MS",
+                        help="fixed typical latency (no tail) for one model, e.g. gemini-2.0-flash-lite=300")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible latencies")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    server = FakeLLMServer((args.host, args.port), args)
+    print(f"Fake LLM server on http://{args.host}:{args.port}/generate "
+          f"(typical {args.latency_ms:g} ms, {args.tail_rate:.0%} tail at {args.tail_ms:g} ms, "
+          f"{args.fail_rate:.0%} failures)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Generate job profiles for many roles from a CSV (batch mode of the Job Generator).
+
+The CSV needs a header with role_name (required), job_level, competencies
+(separated by ';' or '|') and context. Profiles are generated concurrently
+with a rate limit, retries and per-item timeouts (see core/job_batch.py),
+written to a JSONL file, and optionally saved to job_vacancies in one bulk
+insert. Run from the repository root so .streamlit/secrets.toml is found
+(GEMINI_API_KEY can also come from the environment; LLM_BACKEND=stub runs
+offline):
+
+    python scripts/generate_job_profiles.py roles.csv
+    python scripts/generate_job_profiles.py roles.csv --concurrency 8 --rate-per-minute 60 --save
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_tools import get_engine_manual
+from core.job_batch import (
+    DEFAULT_CONCURRENCY, DEFAULT_MAX_RETRIES, DEFAULT_RATE_PER_MINUTE, DEFAULT_TIMEOUT_S,
+    read_batch_csv, run_batch,
+)
+from core.job_generator import save_job_vacancies_bulk
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate job profiles for every role in a CSV")
+    parser.add_argument("csv", help="CSV with role_name, job_level, competencies, context")
+    parser.add_argument("--output", help="JSONL file for the results (default: <csv>.profiles.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="parallel model calls")
+    parser.add_argument("--rate-per-minute", type=float, default=DEFAULT_RATE_PER_MINUTE,
+                        help="maximum model requests per minute")
+    parser.add_argument("--retries", type=int, default=DEFAULT_MAX_RETRIES, help="retries per role")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_S, help="seconds per attempt")
+    parser.add_argument("--no-cache", action="store_true", help="ignore cached responses")
+    parser.add_argument("--save", action="store_true", help="bulk insert successful profiles into job_vacancies")
+    args = parser.parse_args()
+
+    with open(args.csv, "rb") as f:
+        items, errors = read_batch_csv(f.read())
+    for error in errors:
+        print(f"⚠️ {error}")
+    if not items:
+        print("❌ No roles to generate")
+        return 1
+
+    def progress(done, total, result):
+        status = "✅" if result.ok else f"❌ {result.error}"
+        cached = " (cached)" if result.cached else ""
+        print(f"   [{done:>3}/{total}] {result.item.role_name:<40} {result.duration_s:6.1f}s "
+              f"x{result.attempts}{cached} {status}")
+
+    print(f"Generating {len(items)} job profiles (concurrency {args.concurrency}, "
+          f"{args.rate_per_minute:g}/min)...")
+    results = run_batch(items, concurrency=args.concurrency, rate_per_minute=args.rate_per_minute,
+                        max_retries=args.retries, timeout_s=args.timeout,
+                        use_cache=not args.no_cache, progress=progress)
+
+    output = args.output or os.path.splitext(args.csv)[0] + ".profiles.jsonl"
+    with open(output, "w", encoding="utf-8") as f:
+        for r in results:
+            f.write(json.dumps({
+                "row": r.item.row, "role_name": r.item.role_name, "job_level": r.item.job_level,
+                "profile": r.profile, "error": r.error, "attempts": r.attempts,
+            }) + "\n")
+    succeeded = [r for r in results if r.ok]
+    print(f"✅ {len(succeeded)}/{len(results)} profiles generated → {output}")
+
+    if args.save and succeeded:
+        engine = get_engine_manual()
+        if not engine:
+            print("❌ Failed to connect to database")
+            return 1
+        vacancy_ids = save_job_vacancies_bulk([r.to_vacancy() for r in succeeded], engine=engine)
+        if vacancy_ids is None:
+            print("❌ Failed to save vacancies")
+            return 1
+        print(f"✅ Saved {len(vacancy_ids)} vacancies (IDs {vacancy_ids[0]}–{vacancy_ids[-1]})")
+
+    return 0 if len(succeeded) == len(results) else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
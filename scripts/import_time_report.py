@@ -0,0 +1,116 @@
+"""
+Import-time report for the Streamlit entry points.
+
+For app.py, home.py and every page in pages/, the module-level imports are executed in
+a fresh interpreter with `python -X importtime`, so each page's cold-start
+import cost is measured in isolation. Pages over the budget make the script
+exit with status 1, and --history appends the results to a JSONL file so the
+numbers can be tracked over time.
+
+Usage:
+    python scripts/import_time_report.py
+    python scripts/import_time_report.py --budget-ms 2000 --top 8
+    python scripts/import_time_report.py --history scripts/import_times.jsonl
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BUDGET_MS = 2500
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def entry_points():
+    return [ROOT / "app.py", ROOT / "home.py"] + sorted((ROOT / "pages").glob("*.py"))
+
+
+def module_level_imports(path):
+    """Source of the top-level import statements of a script."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    return "\n".join(
+        ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def measure(path):
+    """Run the script's imports with -X importtime; return (total_ms, {top-level module: ms}, error)."""
+    code = module_level_imports(path)
+    env = dict(os.environ, PYTHONPATH=str(ROOT), TALENT_WARMUP="0")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # Hanya modul level teratas (tanpa indentasi) agar tidak dihitung dua kali
+        if match and len(match.group(3)) <= 1:
+            modules[match.group(4)] = modules.get(match.group(4), 0) + int(match.group(2)) / 1000.0
+    error = proc.stderr.strip().splitlines()[-1] if proc.returncode != 0 else None
+    return sum(modules.values()), modules, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"import-time budget per page in ms (default {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--top", type=int, default=5, help="heaviest top-level imports to list per page")
+    parser.add_argument("--history", help="append the results as one JSON line to this file")
+    args = parser.parse_args()
+
+    results = []
+    for path in entry_points():
+        total_ms, modules, error = measure(path)
+        heaviest = sorted(modules.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        results.append({
+            "page": str(path.relative_to(ROOT)),
+            "total_ms": round(total_ms, 1),
+            "over_budget": total_ms > args.budget_ms,
+            "heaviest": [{"module": m, "ms": round(ms, 1)} for m, ms in heaviest],
+            "error": error,
+        })
+
+    print(f"Import time per entry point (budget {args.budget_ms:.0f} ms)\n")
+    for r in results:
+        flag = "OVER BUDGET" if r["over_budget"] else "ok"
+        print(f"{r['page']:<32} {r['total_ms']:>9.1f} ms  {flag}")
+        for h in r["heaviest"]:
+            print(f"    {h['module']:<40} {h['ms']:>9.1f} ms")
+        if r["error"]:
+            print(f"    ! import failed: {r['error']}")
+    print()
+
+    if args.history:
+        try:
+            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip()
+        except OSError:
+            commit = None
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "commit": commit,
+                "python": sys.version.split()[0],
+                "budget_ms": args.budget_ms,
+                "results": results,
+            }) + "\n")
+        print(f"Appended results to {args.history}")
+
+    over = [r["page"] for r in results if r["over_budget"] or r["error"]]
+    if over:
+        print(f"Over budget or failing: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Refresh the precomputed matching rankings after a data load.
+
+Computes the Default Mode ranking and the Mode B ranking for every position,
+department, division and grade, and stores them in precomputed_rankings
+(see core/precomputed.py). Run from the repository root so
+.streamlit/secrets.toml is found:
+
+    python scripts/refresh_precomputed_rankings.py
+    python scripts/refresh_precomputed_rankings.py --only position_id grade_id
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_tools import get_engine_manual
+from core.precomputed import PRECOMPUTED_FILTER_COLUMNS, refresh_precomputed_rankings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh precomputed_rankings after a data load")
+    parser.add_argument("--only", nargs="+", choices=PRECOMPUTED_FILTER_COLUMNS,
+                        default=PRECOMPUTED_FILTER_COLUMNS,
+                        help="Mode B filter columns to precompute (default: all)")
+    args = parser.parse_args()
+
+    engine = get_engine_manual()
+    if not engine:
+        print("❌ Failed to connect to database")
+        return 1
+
+    def progress(done, total, ranking_key, seconds):
+        print(f"   [{done:>4}/{total}] {ranking_key:<24} {seconds:6.1f}s")
+
+    print("Refreshing precomputed rankings...")
+    result = refresh_precomputed_rankings(engine, filter_columns=args.only, progress=progress)
+    print(f"✅ {result['rankings']} rankings stored for data version {result['data_version']} "
+          f"({result['removed']} stale removed) in {result['duration_s']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
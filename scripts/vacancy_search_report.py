@@ -0,0 +1,120 @@
+"""
+Latency report for the Vacancy Library search (core/vacancy_library.py).
+
+Runs the searches the page issues (first page, deep keyset pages, free-text
+and prefix searches built from saved role names, job level filters) against
+the configured database and prints p50/p95/max per scenario. Exits with
+status 1 when any scenario's p95 is over the budget. Run from the repository
+root so .streamlit/secrets.toml is found:
+
+    python scripts/vacancy_search_report.py
+    python scripts/vacancy_search_report.py --repeat 20 --deep-pages 50 --budget-ms 50
+
+Neither the page nor a save upgrades an existing table; --migrate applies the
+one-time job_vacancies migration (search_vector column, created_at backfill
+and indexes, see ensure_job_vacancies_schema) first.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from db_tools import get_engine_manual
+from core.job_generator import ensure_job_vacancies_schema
+from core.vacancy_library import SEARCH_BUDGET_MS, get_job_level_facets, get_library_schema, search_vacancies
+
+
+def sample_terms(engine, limit=10):
+    """Most common words of recent role names (realistic search input)."""
+    with engine.connect() as conn:
+        names = conn.execute(text("""
+            SELECT role_name FROM public.job_vacancies
+            ORDER BY created_at DESC, vacancy_id DESC
+            LIMIT 500
+        """)).scalars().all()
+    counts = {}
+    for name in names:
+        for word in name.lower().split():
+            if len(word) >= 4:
+                counts[word] = counts.get(word, 0) + 1
+    return sorted(counts, key=counts.get, reverse=True)[:limit]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Vacancy Library search latency")
+    parser.add_argument("--repeat", type=int, default=10, help="runs per scenario")
+    parser.add_argument("--deep-pages", type=int, default=20, help="keyset pages to walk for the deep-page scenario")
+    parser.add_argument("--budget-ms", type=float, default=SEARCH_BUDGET_MS, help="p95 budget per page")
+    parser.add_argument("--migrate", action="store_true", help="apply the job_vacancies migration before measuring")
+    args = parser.parse_args()
+
+    engine = get_engine_manual()
+    if not engine:
+        print("❌ Failed to connect to database")
+        return 1
+
+    if args.migrate:
+        ensure_job_vacancies_schema(engine, migrate=True)
+    schema = get_library_schema(engine)
+    if schema is None:
+        print("❌ public.job_vacancies does not exist (run with --migrate)")
+        return 1
+    if schema == 'legacy':
+        print("⚠️ search_vector column missing, measuring the ILIKE fallback (run with --migrate)")
+
+    facets = get_job_level_facets(engine)
+    print(f"Vacancies: {sum(facets.values())} ({len(facets)} job levels)")
+    terms = sample_terms(engine)
+
+    scenarios = {"first page": lambda: [search_vacancies(engine)]}
+    if terms:
+        scenarios["full word"] = lambda: [search_vacancies(engine, term) for term in terms]
+        scenarios["prefix"] = lambda: [search_vacancies(engine, term[:3]) for term in terms]
+        scenarios["two words"] = lambda: [search_vacancies(engine, f"{a} {b}") for a, b in zip(terms, terms[1:])]
+    if facets:
+        scenarios["job level"] = lambda: [search_vacancies(engine, job_level=level) for level in facets]
+
+    def deep_pages():
+        pages, cursor = [], None
+        for _ in range(args.deep_pages):
+            page = search_vacancies(engine, cursor=cursor)
+            pages.append(page)
+            if not page.has_more:
+                break
+            cursor = page.next_cursor
+        return pages
+    scenarios["deep pages"] = deep_pages
+
+    # Pemanasan: koneksi pool dan cache halaman Postgres
+    search_vacancies(engine)
+
+    over_budget = []
+    print(f"\n{'scenario':<14} {'runs':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name, run in scenarios.items():
+        durations = [page.duration_ms for _ in range(args.repeat) for page in run()]
+        p95 = percentile(durations, 95)
+        flag = "  ⚠️ over budget" if p95 > args.budget_ms else ""
+        print(f"{name:<14} {len(durations):>6} {statistics.median(durations):>8.1f} {p95:>8.1f} "
+              f"{max(durations):>8.1f}{flag}")
+        if p95 > args.budget_ms:
+            over_budget.append(name)
+
+    if over_budget:
+        print(f"\n❌ p95 over the {args.budget_ms:g} ms budget: {', '.join(over_budget)}")
+        return 1
+    print(f"\n✅ All scenarios within the {args.budget_ms:g} ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())